@@ -1,7 +1,7 @@
 # auditlog/admin.py
 
 from django.contrib import admin
-from auditlog.models import ShareActionLog
+from auditlog.models import ShareActionDailyCount, ShareActionLog, ShareActionLogArchive
 
 
 @admin.register(ShareActionLog)
@@ -22,9 +22,32 @@ class ShareActionLogAdmin(admin.ModelAdmin):
         "project",
     )
     search_fields = (
-        "actor__username",
-        "target_user__username",
+        "actor_username",
+        "target_username",
         "document__title",
         "project__name",
     )
     ordering = ("-timestamp",)
+
+
+@admin.register(ShareActionLogArchive)
+class ShareActionLogArchiveAdmin(admin.ModelAdmin):
+    list_display = (
+        "timestamp",
+        "actor_username",
+        "target_username",
+        "role",
+        "action",
+        "document_id",
+        "project_id",
+    )
+    list_filter = ("action", "role")
+    search_fields = ("actor_username", "target_username")
+    ordering = ("-timestamp",)
+
+
+@admin.register(ShareActionDailyCount)
+class ShareActionDailyCountAdmin(admin.ModelAdmin):
+    list_display = ("day", "project_id", "document_id", "action", "role", "count")
+    list_filter = ("action", "role")
+    ordering = ("-day",)
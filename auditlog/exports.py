@@ -2,8 +2,43 @@
 
 import csv
 from io import StringIO
-from typing import Iterable
+from typing import Iterable, Iterator
+from django.http import StreamingHttpResponse
 from auditlog.models import ShareActionLog
+from core.exports import cell, export_chunks
+
+"""
+Audit Log Exports
+-----------------
+export_logs_to_csv() builds the whole file in memory and is only meant for
+small, already-loaded lists of logs. Downloads go through export_response(),
+which streams:
+
+- rows come from values_list(...).iterator(): one query (usernames are
+  denormalized, document/project names joined), fetched EXPORT_CHUNK_SIZE
+  rows at a time
+- the file is generated in ~64 KB chunks (see core/exports.py), so memory
+  stays constant however many rows the queryset has
+- gzip=True compresses the chunks on the fly (a .gz download)
+
+Formats: CSV, JSON Lines, and Parquet (needs the optional 'pyarrow' package;
+already compressed, so gzip does not apply). Exports too big to stream from
+a web worker run as background jobs (documents/exports.py).
+"""
+
+EXPORT_CHUNK_SIZE = 2000
+
+EXPORT_COLUMNS = ["Timestamp", "Actor", "Target User", "Role", "Action", "Document", "Project"]
+EXPORT_FIELDS = [
+    "timestamp",
+    "actor_username",
+    "target_username",
+    "role",
+    "action",
+    "document__title",
+    "project__name",
+]
+JSON_KEYS = ["timestamp", "actor", "target_user", "role", "action", "document", "project"]
 
 
 def export_logs_to_csv(logs: Iterable[ShareActionLog]) -> str:
@@ -20,21 +55,13 @@ def export_logs_to_csv(logs: Iterable[ShareActionLog]) -> str:
     writer = csv.writer(buffer)
 
     # Header row
-    writer.writerow([
-        "Timestamp",
-        "Actor",
-        "Target User",
-        "Role",
-        "Action",
-        "Document",
-        "Project"
-    ])
+    writer.writerow(EXPORT_COLUMNS)
 
     for log in logs:
         writer.writerow([
             log.timestamp.isoformat(),
-            log.actor.username if log.actor else "",
-            log.target_user.username if log.target_user else "",
+            log.actor_username,
+            log.target_username,
             log.role,
             log.action,
             log.document.title if log.document else "",
@@ -42,3 +69,29 @@ def export_logs_to_csv(logs: Iterable[ShareActionLog]) -> str:
         ])
 
     return buffer.getvalue()
+
+
+def export_rows(logs, chunk_size: int = EXPORT_CHUNK_SIZE) -> Iterator[tuple]:
+    """Export rows (in EXPORT_FIELDS order, timestamps as ISO strings, None as "") of a ShareActionLog queryset."""
+    for row in logs.values_list(*EXPORT_FIELDS).iterator(chunk_size=chunk_size):
+        yield tuple(cell(value) for value in row)
+
+
+def export_response(logs, filename: str, fmt: str = "csv", gzip: bool = False) -> StreamingHttpResponse:
+    """
+    A streaming download of a ShareActionLog queryset.
+
+    Args:
+        logs: QuerySet of ShareActionLog
+        filename: Download name without extension
+        fmt: csv, jsonl or parquet
+        gzip: Compress on the fly (ignored for Parquet)
+
+    Raises:
+        ValueError: Unknown format
+        ExportUnavailable: The format needs a package that is not installed
+    """
+    chunks, content_type, extension = export_chunks(export_rows(logs), EXPORT_COLUMNS, JSON_KEYS, fmt, gzip)
+    response = StreamingHttpResponse(chunks, content_type=content_type)
+    response["Content-Disposition"] = f'attachment; filename="{filename}.{extension}"'
+    return response
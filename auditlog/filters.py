@@ -36,10 +36,10 @@ def filter_logs(
         qs = qs.filter(document_id=document_id)
 
     if actor_username:
-        qs = qs.filter(actor__username=actor_username)
+        qs = qs.filter(actor_username=actor_username)
 
     if target_username:
-        qs = qs.filter(target_user__username=target_username)
+        qs = qs.filter(target_username=target_username)
 
     if action:
         qs = qs.filter(action=action)
@@ -0,0 +1,44 @@
+# auditlog/management/commands/archive_audit_logs.py
+
+from datetime import timedelta
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.timezone import now
+from auditlog.models import ShareActionLog
+from auditlog.retention import archive_logs, backfill_usernames
+
+
+class Command(BaseCommand):
+    help = (
+        "Move share audit log rows older than the retention period out of the hot table "
+        "into the archive table, counting them per day first (see auditlog/retention.py)"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--days", type=int, help="Keep this many days in the hot table (default AUDIT_LOG_RETENTION_DAYS)")
+        parser.add_argument("--batch-size", type=int, default=5000)
+        parser.add_argument("--delete", action="store_true", help="Delete old rows instead of archiving them (daily counts are kept)")
+        parser.add_argument("--dry-run", action="store_true", help="Only report how many rows would move")
+        parser.add_argument("--backfill-usernames", action="store_true", help="Also fill in actor/target usernames on older rows")
+
+    def handle(self, *args, **kwargs):
+        days = kwargs["days"] if kwargs["days"] is not None else getattr(settings, "AUDIT_LOG_RETENTION_DAYS", 365)
+        if days < 0:
+            raise CommandError("--days must not be negative")
+        cutoff = now() - timedelta(days=days)
+
+        if kwargs["backfill_usernames"] and not kwargs["dry_run"]:
+            updated = backfill_usernames(batch_size=kwargs["batch_size"])
+            self.stdout.write(f"Filled in {updated} missing actor/target usernames")
+
+        pending = ShareActionLog.objects.filter(timestamp__lt=cutoff).count()
+        verb = "deleted" if kwargs["delete"] else "archived"
+        if kwargs["dry_run"]:
+            self.stdout.write(f"{pending} rows older than {cutoff:%Y-%m-%d %H:%M} would be {verb}")
+            return
+
+        def progress(moved):
+            self.stdout.write(f"  {moved}/{pending} rows {verb}")
+
+        moved = archive_logs(cutoff, batch_size=kwargs["batch_size"], delete=kwargs["delete"], progress=progress)
+        self.stdout.write(self.style.SUCCESS(f"{moved} rows older than {cutoff:%Y-%m-%d %H:%M} {verb}"))
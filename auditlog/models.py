@@ -2,6 +2,7 @@
 
 from django.db import models
 from django.contrib.auth.models import User
+from django.utils import timezone
 from documents.models import Document
 from projects.models import Project
 
@@ -15,7 +16,11 @@ class ShareActionLog(models.Model):
         ("role_changed", "Role Changed"),
     ]
 
-    timestamp = models.DateTimeField(auto_now_add=True)
+    # Generated by auditlog.writer.record(); makes asynchronous writes idempotent (null on older rows)
+    entry_id = models.UUIDField(null=True, blank=True, unique=True, editable=False)
+
+    # Set when the entry is recorded, not when it is written (see auditlog/writer.py)
+    timestamp = models.DateTimeField(default=timezone.now)
 
     # Who performed the action
     actor = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, related_name="audit_actor")
@@ -33,7 +38,80 @@ class ShareActionLog(models.Model):
     document = models.ForeignKey(Document, on_delete=models.CASCADE, null=True, blank=True)
     project = models.ForeignKey(Project, on_delete=models.SET_NULL, null=True)
 
+    # Usernames at the time of the action: filters need no join, and they outlive the users
+    actor_username = models.CharField(max_length=150, blank=True, default="")
+    target_username = models.CharField(max_length=150, blank=True, default="")
+
+    class Meta:
+        # The log views filter by document or project and page by (timestamp, id)
+        indexes = [
+            models.Index(fields=["document", "timestamp", "id"], name="auditlog_document_time_idx"),
+            models.Index(fields=["project", "timestamp", "id"], name="auditlog_project_time_idx"),
+            models.Index(fields=["action", "role"], name="auditlog_action_role_idx"),
+            models.Index(fields=["timestamp"], name="auditlog_timestamp_idx"),  # retention cutoff
+        ]
+
+    def fill_usernames(self):
+        if self.actor_id and not self.actor_username:
+            self.actor_username = self.actor.username
+        if self.target_user_id and not self.target_username:
+            self.target_username = self.target_user.username
+
+    def save(self, *args, **kwargs):
+        self.fill_usernames()
+        super().save(*args, **kwargs)
+
     def __str__(self):
         location = self.document or self.project
         location_str = f"on {location}" if location else "with unknown context"
         return f"{self.timestamp} - {self.actor} {self.action} {self.role} for {self.target_user} {location_str}"
+
+
+class ShareActionLogArchive(models.Model):
+    """
+    ShareActionLog rows moved out of the hot table by archive_audit_logs
+    (see auditlog/retention.py). Same ids and columns, but the references are
+    plain ids: archived history survives deleted documents and users.
+    """
+
+    id = models.BigIntegerField(primary_key=True)
+    timestamp = models.DateTimeField()
+    actor_id = models.BigIntegerField(null=True, blank=True)
+    actor_username = models.CharField(max_length=150, blank=True, default="")
+    target_user_id = models.BigIntegerField(null=True, blank=True)
+    target_username = models.CharField(max_length=150, blank=True, default="")
+    role = models.CharField(max_length=32, null=True, blank=True)
+    action = models.CharField(max_length=32, choices=ShareActionLog.ACTION_CHOICES)
+    document_id = models.BigIntegerField(null=True, blank=True)
+    project_id = models.BigIntegerField(null=True, blank=True)
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["document_id", "timestamp"], name="auditarchive_document_time_idx"),
+            models.Index(fields=["project_id", "timestamp"], name="auditarchive_project_time_idx"),
+            models.Index(fields=["timestamp"], name="auditarchive_timestamp_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.timestamp} - {self.actor_username} {self.action} {self.role} for {self.target_username} (archived)"
+
+
+class ShareActionDailyCount(models.Model):
+    """Per-day action counts of archived (or deleted) ShareActionLog rows, kept after the rows are gone."""
+
+    day = models.DateField()
+    project_id = models.BigIntegerField(null=True, blank=True)
+    document_id = models.BigIntegerField(null=True, blank=True)
+    action = models.CharField(max_length=32, choices=ShareActionLog.ACTION_CHOICES)
+    role = models.CharField(max_length=32, blank=True, default="")
+    count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["project_id", "day"], name="auditcount_project_day_idx"),
+            models.Index(fields=["day"], name="auditcount_day_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.day} {self.action} {self.role}: {self.count}"
@@ -0,0 +1,91 @@
+# auditlog/retention.py
+
+from collections import Counter
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.db.models import F, OuterRef, Subquery
+from django.utils import timezone
+from auditlog.models import ShareActionDailyCount, ShareActionLog, ShareActionLogArchive
+
+"""
+Audit Log Retention
+-------------------
+Keeps ShareActionLog (the "hot" table the log views and exports query)
+small: rows older than the retention cutoff are moved, oldest first, into
+ShareActionLogArchive, or dropped with delete=True.
+
+- Each batch is one transaction: the rows are counted into
+  ShareActionDailyCount (day, project, document, action, role), copied to
+  the archive and deleted. An interrupted run leaves no row both archived
+  and live, and never counts a row twice.
+- Batches are found through the timestamp index, so the cost is per batch,
+  not per table.
+
+Django cannot declare partitioned tables; on PostgreSQL the archive table
+can be turned into a range-partitioned one by hand, since nothing but this
+module writes to it.
+"""
+
+ARCHIVE_FIELDS = [
+    "id",
+    "timestamp",
+    "actor_id",
+    "actor_username",
+    "target_user_id",
+    "target_username",
+    "role",
+    "action",
+    "document_id",
+    "project_id",
+]
+
+
+def _add_daily_counts(counts: Counter) -> None:
+    for (day, project_id, document_id, action, role), n in counts.items():
+        key = dict(day=day, project_id=project_id, document_id=document_id, action=action, role=role)
+        if not ShareActionDailyCount.objects.filter(**key).update(count=F("count") + n):
+            ShareActionDailyCount.objects.create(count=n, **key)
+
+
+def archive_logs(before, batch_size=5000, delete=False, progress=None) -> int:
+    """
+    Moves (or deletes) ShareActionLog rows with timestamp < `before`.
+    `progress(moved_so_far)` is called after each batch. Returns the row count.
+    """
+    moved = 0
+    while True:
+        with transaction.atomic():
+            rows = list(
+                ShareActionLog.objects.filter(timestamp__lt=before).order_by("timestamp", "id").values(*ARCHIVE_FIELDS)[:batch_size]
+            )
+            if not rows:
+                break
+            _add_daily_counts(Counter(
+                (timezone.localdate(r["timestamp"]), r["project_id"], r["document_id"], r["action"], r["role"] or "")
+                for r in rows
+            ))
+            if not delete:
+                ShareActionLogArchive.objects.bulk_create(
+                    [ShareActionLogArchive(**r) for r in rows], ignore_conflicts=True
+                )
+            ShareActionLog.objects.filter(id__in=[r["id"] for r in rows]).delete()
+        moved += len(rows)
+        if progress:
+            progress(moved)
+    return moved
+
+
+def backfill_usernames(batch_size=10000, progress=None) -> int:
+    """Fills actor_username/target_username on rows logged before they existed. Returns the fields filled."""
+    updated = 0
+    for field, fk in (("actor_username", "actor_id"), ("target_username", "target_user_id")):
+        username = Subquery(User.objects.filter(pk=OuterRef(fk)).values("username")[:1])
+        missing = ShareActionLog.objects.filter(**{field: "", f"{fk}__isnull": False})
+        while True:
+            ids = list(missing.order_by("id").values_list("id", flat=True)[:batch_size])
+            if not ids:
+                break
+            updated += ShareActionLog.objects.filter(id__in=ids).update(**{field: username})
+            if progress:
+                progress(updated)
+    return updated
@@ -0,0 +1,19 @@
+# auditlog/tasks.py
+
+from celery import shared_task
+
+from auditlog import writer
+
+WRITE_RETRY_DELAY = 5  # seconds; doubles per retry, up to 10 minutes
+
+
+@shared_task(bind=True, acks_late=True, max_retries=None)
+def write_share_action_logs(self, payloads):
+    """
+    Write audit log entries sent by auditlog.writer (AUDIT_LOG_ASYNC). Retried
+    until the database takes them.
+    """
+    try:
+        return writer.write_payloads(payloads)
+    except Exception as e:
+        raise self.retry(exc=e, countdown=min(WRITE_RETRY_DELAY * 2 ** self.request.retries, 600))
@@ -2,12 +2,28 @@
 
 from django.contrib.auth.decorators import login_required
 from django.shortcuts import render, get_object_or_404
-from django.http import HttpResponseForbidden, HttpResponse
+from django.http import HttpResponseForbidden, HttpResponse, HttpResponseBadRequest
 from documents.models import Document
 from auditlog.filters import filter_logs
 from core.permissions import can_manage_permissions
 from auditlog.models import ShareActionLog
-from auditlog.exports import export_logs_to_csv
+from auditlog.exports import export_response
+from core.exports import ExportUnavailable
+from core.pagination import paginate_request
+
+LOG_SORT_FIELDS = {"timestamp": "timestamp", "action": "action"}
+
+
+def _export(request, logs, filename):
+	"""Streams `logs` in ?format= (csv, jsonl, parquet), gzipped with ?gzip=1."""
+	fmt = request.GET.get("format", "csv").strip().lower()
+	gzip = request.GET.get("gzip", "").lower() in ("1", "true", "yes")
+	try:
+		return export_response(logs.order_by("-timestamp", "-id"), filename, fmt=fmt, gzip=gzip)
+	except ValueError as e:
+		return HttpResponseBadRequest(str(e))
+	except ExportUnavailable as e:
+		return HttpResponse(status=501, content=str(e))
 
 @login_required
 def audit_log_filtered_view(request, document_id):
@@ -23,14 +39,16 @@ def audit_log_filtered_view(request, document_id):
     role = request.GET.get("role", "").strip()
 
     if actor:
-        logs = logs.filter(actor__username__icontains=actor)
+        logs = logs.filter(actor_username__icontains=actor)
     if target:
-        logs = logs.filter(target_user__username__icontains=target)
+        logs = logs.filter(target_username__icontains=target)
     if action:
         logs = logs.filter(action=action)
     if role:
         logs = logs.filter(role=role)
 
+    logs = paginate_request(request, logs, sort_fields=LOG_SORT_FIELDS, default_sort="-timestamp")
+
     return render(request, "auditlog/log_list.html", {
         "document": document,
         "logs": logs,
@@ -49,12 +67,8 @@ def audit_log_export_csv(request, document_id):
 	if not can_manage_permissions(request.user, document):
 		return HttpResponse(status=403, content="Permission denied.")
 
-	logs = ShareActionLog.objects.filter(document=document).select_related("actor", "target_user", "project")
-	csv_content = export_logs_to_csv(logs)
-
-	response = HttpResponse(csv_content, content_type="text/csv")
-	response["Content-Disposition"] = f'attachment; filename="audit_log_{document_id}.csv"'
-	return response
+	logs = ShareActionLog.objects.filter(document=document)
+	return _export(request, logs, f"audit_log_{document_id}")
 
 @login_required
 def project_audit_log_view(request, project_id):
@@ -74,14 +88,16 @@ def project_audit_log_view(request, project_id):
 	role = request.GET.get("role", "").strip()
 
 	if actor:
-		logs = logs.filter(actor__username__icontains=actor)
+		logs = logs.filter(actor_username__icontains=actor)
 	if target:
-		logs = logs.filter(target_user__username__icontains=target)
+		logs = logs.filter(target_username__icontains=target)
 	if action:
 		logs = logs.filter(action=action)
 	if role:
 		logs = logs.filter(role=role)
 
+	logs = paginate_request(request, logs, sort_fields=LOG_SORT_FIELDS, default_sort="-timestamp")
+
 	return render(request, "auditlog/log_list.html", {
 		"project": project,
 		"logs": logs,
@@ -103,10 +119,6 @@ def project_log_export_csv(request, project_id):
 	if not request.user.is_superuser and (not membership or membership.role != "owner"):
 		return HttpResponseForbidden("Permission denied.")
 
-	logs = ShareActionLog.objects.filter(project=project, document__isnull=True).select_related("actor", "target_user")
-	csv_content = export_logs_to_csv(logs)
-
-	response = HttpResponse(csv_content, content_type="text/csv")
-	response["Content-Disposition"] = f'attachment; filename="project_log_{project_id}.csv"'
-	return response
+	logs = ShareActionLog.objects.filter(project=project, document__isnull=True)
+	return _export(request, logs, f"project_log_{project_id}")
 
@@ -0,0 +1,167 @@
+# auditlog/writer.py
+
+import logging
+import uuid
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.utils.dateparse import parse_datetime
+from auditlog.models import ShareActionLog
+from documents.models import Document
+from projects.models import Project
+
+"""
+Audit Log Writer
+----------------
+Everything that logs a share action goes through record():
+
+    from auditlog import writer as audit
+
+    with audit.buffered():
+        for user in users:
+            assign_perm(...)
+            audit.record(actor=actor, target_user=user, document=doc, project=doc.project, role=role, action="shared")
+
+- Outside buffered(), record() writes the entry at once (one INSERT).
+- buffered() is a transaction.atomic() block that collects the entries
+  recorded in it and writes them with one bulk_create as it exits, inside
+  the transaction. If the block raises, its entries are dropped with the
+  rest of its work. Nested buffered() blocks are savepoints: a rolled-back
+  inner block drops only its own entries. (An inner plain atomic() block
+  that rolls back does not drop entries recorded in it; use buffered() for
+  blocks that may.)
+- With AUDIT_LOG_ASYNC, entries are instead sent to Celery
+  (write_share_action_logs) once the transaction commits, and written by a
+  worker. Nothing is sent for a transaction that rolls back. If the broker
+  cannot be reached, the entries are written here instead; the task is
+  acknowledged only after the rows are written, so a worker dying mid-write
+  leaves it to be redelivered. Every entry carries an entry_id generated in
+  record(), and redelivered (or doubly sent) entries are skipped on it, so
+  nothing is written twice.
+
+The buffer stack lives in a ContextVar (like core/role_cache.py's request
+layer), so concurrent requests under ASGI never share one.
+
+Timestamps are taken in record(), so the log keeps the time of the action,
+not of the write.
+"""
+
+logger = logging.getLogger(__name__)
+
+PAYLOAD_FIELDS = [
+    "entry_id",
+    "timestamp",
+    "actor_id",
+    "actor_username",
+    "target_user_id",
+    "target_username",
+    "role",
+    "action",
+    "document_id",
+    "project_id",
+]
+
+_buffers: ContextVar[list | None] = ContextVar("audit_log_buffers", default=None)
+
+
+def record(**fields) -> ShareActionLog:
+    """
+    Logs a share action (ShareActionLog fields as keyword arguments). Returns
+    the entry, which has no pk when buffered or sent to Celery.
+    """
+    entry = ShareActionLog(**{"entry_id": uuid.uuid4(), **fields})
+    entry.fill_usernames()
+    buffers = _buffers.get()
+    if buffers:
+        buffers[-1].append(entry)
+    else:
+        _flush([entry])
+    return entry
+
+
+@contextmanager
+def buffered():
+    """An atomic block whose audit entries are written together as it exits (see module docstring)."""
+    buffers = _buffers.get()
+    token = None
+    if buffers is None:
+        buffers = []
+        token = _buffers.set(buffers)
+    try:
+        with transaction.atomic():
+            buffers.append([])
+            try:
+                yield
+            except BaseException:
+                buffers.pop()
+                raise
+            entries = buffers.pop()
+            if buffers:
+                buffers[-1].extend(entries)
+            elif entries:
+                _flush(entries)
+    finally:
+        if token is not None:
+            _buffers.reset(token)
+
+
+def _flush(entries) -> None:
+    if getattr(settings, "AUDIT_LOG_ASYNC", False):
+        # Sent only once committed: a rolled-back transaction (or savepoint) drops the callback
+        transaction.on_commit(lambda: _ship(entries))
+    else:
+        ShareActionLog.objects.bulk_create(entries)
+
+
+def to_payload(entry: ShareActionLog) -> dict:
+    payload = {field: getattr(entry, field) for field in PAYLOAD_FIELDS}
+    payload["entry_id"] = str(entry.entry_id) if entry.entry_id else None
+    payload["timestamp"] = entry.timestamp.isoformat()
+    return payload
+
+
+def from_payload(payload: dict) -> ShareActionLog:
+    return ShareActionLog(**{**payload, "timestamp": parse_datetime(payload["timestamp"])})
+
+
+def write_payloads(payloads) -> int:
+    """
+    Writes entries sent to Celery (the write_share_action_logs body). Rows
+    deleted since the entry was recorded get the model's on_delete treatment:
+    entries of a deleted document are dropped (CASCADE), a deleted user or
+    project is set to None (SET_NULL). Entries already written (a redelivered
+    task) are skipped. Returns the number of entries processed.
+    """
+    entries = [from_payload(payload) for payload in payloads]
+
+    def existing(model, ids):
+        return set(model.objects.filter(pk__in={i for i in ids if i is not None}).values_list("pk", flat=True))
+
+    documents = existing(Document, (e.document_id for e in entries))
+    projects = existing(Project, (e.project_id for e in entries))
+    users = existing(User, (i for e in entries for i in (e.actor_id, e.target_user_id)))
+    entries = [e for e in entries if e.document_id is None or e.document_id in documents]
+    for e in entries:
+        if e.project_id not in projects:
+            e.project_id = None
+        if e.actor_id not in users:
+            e.actor_id = None
+        if e.target_user_id not in users:
+            e.target_user_id = None
+    with transaction.atomic():
+        ShareActionLog.objects.bulk_create(entries, ignore_conflicts=True)
+    return len(entries)
+
+
+def _ship(entries) -> None:
+    from auditlog.tasks import write_share_action_logs
+    try:
+        write_share_action_logs.delay([to_payload(entry) for entry in entries])
+    except Exception as e:
+        # Broker down: the transaction has committed, so write the entries here rather than lose them
+        logger.warning("Could not queue %d audit log entries, writing them directly: %s", len(entries), e)
+        # The message may have reached the broker anyway; entry_id keeps the two writes from doubling up
+        ShareActionLog.objects.bulk_create(entries, ignore_conflicts=True)
@@ -0,0 +1,11 @@
+# config/celery.py
+
+import os
+from celery import Celery
+
+# Set the default settings module for Celery workers
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings")
+
+app = Celery("config")
+app.config_from_object("django.conf:settings", namespace="CELERY")
+app.autodiscover_tasks()
@@ -34,6 +34,7 @@ INSTALLED_APPS = [
     "projects",
     "documents",
     "auditlog",
+    "storage",
 ]
 
 MIDDLEWARE = [
@@ -42,6 +43,7 @@ MIDDLEWARE = [
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
     "django.contrib.auth.middleware.AuthenticationMiddleware",
+    "core.middleware.RoleCacheMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
 ]
@@ -105,11 +107,76 @@ STATICFILES_DIRS = [BASE_DIR / "static"]
 # File uploads 
 MEDIA_URL = "/media/"
 MEDIA_ROOT = BASE_DIR / "media"
-STORAGE_BACKEND = "windows"  # options: "windows", "azure"
+STORAGE_BACKEND = config("STORAGE_BACKEND", "windows")  # options: "windows", "linux", "azure", "s3"
+STORAGE_FSYNC = config("STORAGE_FSYNC", "full")  # linux backend: "full", "file" or "none"
+FILE_UPLOAD_PERMISSIONS = 0o644  # stored files must be readable by the web server (FILE_SERVE_MODE)
+# Store identical file contents once (sha256-addressed blobs, see storage/content_addressed.py)
+STORAGE_DEDUPLICATE = config("STORAGE_DEDUPLICATE", "False") == "True"
+# Who sends protected media bytes: "django" (Python, dev), "nginx" (X-Accel-Redirect) or "apache" (X-Sendfile)
+FILE_SERVE_MODE = config("FILE_SERVE_MODE", "django")
+FILE_SERVE_INTERNAL_PREFIX = "/protected-media/"  # nginx `internal` location aliased to MEDIA_ROOT
+
+# S3-compatible storage (STORAGE_BACKEND = "s3"); set the endpoint for MinIO & co.
+AWS_STORAGE_BUCKET_NAME = config("AWS_STORAGE_BUCKET_NAME", "dms-documents")
+AWS_S3_ENDPOINT_URL = config("AWS_S3_ENDPOINT_URL", "")
+AWS_S3_REGION_NAME = config("AWS_S3_REGION_NAME", "")
+AWS_ACCESS_KEY_ID = config("AWS_ACCESS_KEY_ID", "")
+AWS_SECRET_ACCESS_KEY = config("AWS_SECRET_ACCESS_KEY", "")
+AWS_S3_MAX_POOL_CONNECTIONS = 50
+AWS_S3_MULTIPART_THRESHOLD = 8 * 1024 * 1024
+AWS_S3_MULTIPART_CHUNKSIZE = 8 * 1024 * 1024
+AWS_S3_MAX_CONCURRENCY = 8
+AWS_QUERYSTRING_EXPIRE = 300  # presigned download URL lifetime, seconds
+
+# Cache (shared layer of the effective-role cache; point at Redis in production,
+# e.g. DJANGO_CACHE_BACKEND=django.core.cache.backends.redis.RedisCache)
+CACHES = {
+    "default": {
+        "BACKEND": config("DJANGO_CACHE_BACKEND", "django.core.cache.backends.locmem.LocMemCache"),
+        "LOCATION": config("DJANGO_CACHE_LOCATION", ""),
+    }
+}
+ROLE_CACHE_TIMEOUT = 300  # seconds; entries are also invalidated on commit of role changes (core/role_cache.py)
 
 # Celery (with Redis)
 CELERY_BROKER_URL = config("CELERY_BROKER_URL", "redis://localhost:6379/0")
 CELERY_RESULT_BACKEND = CELERY_BROKER_URL
 
+# Resumable chunked uploads (documents/uploads.py)
+UPLOAD_CHUNK_SIZE = 8 * 1024 * 1024  # max bytes per chunk request
+UPLOAD_MAX_SIZE = None  # optional cap on declared file size, in bytes
+UPLOAD_SESSION_TTL_HOURS = 24
+UPLOAD_PRESIGN_EXPIRY = 900  # seconds a presigned direct-upload URL stays valid
+
+# SharePoint import file downloads (documents/importers/downloads.py)
+IMPORT_DOWNLOAD_WORKERS = 8  # parallel downloads
+IMPORT_DOWNLOAD_PER_HOST = 4  # of which at most this many against one host
+IMPORT_DOWNLOAD_RETRIES = 3  # 429/5xx responses and dropped connections
+IMPORT_DOWNLOAD_BACKOFF = 0.5  # seconds; doubles per retry
+IMPORT_DOWNLOAD_TIMEOUT = 60  # seconds to connect / between received bytes
+
+# Background export jobs (documents/exports.py)
+EXPORT_JOB_STALE_AFTER = 900  # seconds without progress before an active job is considered dead
+EXPORT_JOB_RETENTION_DAYS = 7  # finished jobs and their files are purged after this (purge_export_jobs)
+
+# Share audit log (auditlog/writer.py; retention: auditlog/retention.py, manage.py archive_audit_logs)
+AUDIT_LOG_RETENTION_DAYS = 365  # older rows move to the archive table
+AUDIT_LOG_ASYNC = False  # True: entries are written by a Celery worker after commit (auditlog/writer.py)
+
+# Bulk sharing (documents.services.bulk_update_access, POST /documents/share/bulk/)
+BULK_SHARE_MAX_PAIRS = 100000  # documents x users per call
+
+# Keyset pagination (core.pagination)
+PAGINATION_PAGE_SIZE = 50
+
+# Full-text search (documents.search)
+SEARCH_RESULT_LIMIT = 50
+
+# Content extraction (documents/extraction.py)
+CONTENT_EXTRACTION_ENABLED = config("CONTENT_EXTRACTION_ENABLED", "True") == "True"  # needs a Celery broker
+CONTENT_EXTRACTION_MAX_FILE_SIZE = 50 * 1024 * 1024  # bytes; larger files are skipped
+CONTENT_EXTRACTION_MAX_CHARS = 1_000_000
+CONTENT_EXTRACTION_TIME_LIMIT = 120  # seconds per file (Celery soft time limit; a deadline with backfill --sync)
+
 # Default primary key field type
 DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
@@ -1,7 +1,8 @@
 # config\urls.py
 
 import os
-from django.http import Http404
+import posixpath
+from django.http import Http404, HttpResponseRedirect
 from django.urls import re_path
 from django.contrib import admin
 from django.urls import path, include
@@ -9,31 +10,48 @@ from django.conf import settings
 from django.conf.urls.static import static
 from core.views import dashboard
 from django.contrib.auth import views as auth_views
-from django.views.static import serve as static_serve
+from asgiref.sync import sync_to_async
+from core.async_views import async_login_required
+from core.file_serving import aserve_file
 from core.views import dashboard
 from core.permissions import can_view_document
 from documents.models import Document
-from django.contrib.auth.decorators import login_required
+from storage.factory import get_storage_backend
 
-@login_required
-def safe_serve(request, path, document_root=None, show_indexes=False):
-	# Expecting: documents/<doc_id>/versions/<version_number>/filename
+def _normalize_media_path(path):
+	"""
+	Returns `path` normalized, refusing anything that could leave the folder
+	the access check is made for: `..` segments, absolute paths, backslashes.
+	"""
+	if path.startswith("/") or "\\" in path or ".." in path.split("/"):
+		raise ValueError(path)
+	return posixpath.normpath(path)
+
+
+@async_login_required
+async def safe_serve(request, path, document_root=None, show_indexes=False):
+	# Expecting: documents/<doc_id>/versions/<token or number>/filename
 	try:
+		path = _normalize_media_path(path)
 		parts = path.split('/')
-		doc_id = int(parts[1])  # documents/1/versions/3/filename
-		document = Document.objects.get(id=doc_id)
+		if parts[0] != "documents":
+			raise ValueError(path)
+		doc_id = int(parts[1])  # documents/1/versions/<token>/filename
+		document = await Document.objects.aget(id=doc_id)
 	except (IndexError, ValueError, Document.DoesNotExist):
 		raise Http404("Invalid document path.")
 
-	if not can_view_document(request.user, document):
+	if not await sync_to_async(can_view_document)(request.user, document):
 		raise Http404("You do not have access to this file.")
 
-	full_path = os.path.join(document_root, path)
-	if not os.path.exists(full_path):
-		raise Http404("File not found.")
-
-	return static_serve(request, path, document_root=document_root, show_indexes=show_indexes)
+	storage = get_storage_backend()
+	if storage.presigned_urls:
+		# Object storage: the bucket serves the bytes through a short-lived signed URL
+		return HttpResponseRedirect(await sync_to_async(storage.url)(path))
 
+	# Sharded/deduplicated backends keep the bytes under a different physical path
+	physical_path = await sync_to_async(storage.resolve)(path)
+	return await aserve_file(request, physical_path, document_root, filename=path)
 	
 urlpatterns = [
     # Django Admin
@@ -59,10 +77,13 @@ urlpatterns = [
     path("accounts/logout/", auth_views.LogoutView.as_view(next_page="home"), name="logout"),
 ]
 
-# Serve media in dev with 404 fallback
+# Permission-checked media; the bytes go out via FILE_SERVE_MODE (see core/file_serving.py)
+urlpatterns += [
+    re_path(r'^media/(?P<path>.*)$', safe_serve, {'document_root': settings.MEDIA_ROOT}),
+]
+
 if settings.DEBUG:
     urlpatterns += [
-        re_path(r'^media/(?P<path>.*)$', safe_serve, {'document_root': settings.MEDIA_ROOT}),
 		path("dev/", include("documents.urls_dev")), 
     ]
 
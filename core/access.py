@@ -1,15 +1,16 @@
 # core/access.py
 
-from auditlog.models import ShareActionLog
+from auditlog import writer as audit
 from guardian.shortcuts import get_perms, assign_perm, remove_perm
 from projects.models import ProjectMembership
+from core import role_cache
 
 def update_access(actor, target_user, container, role, remove=False):
 	"""
 	Shared logic for managing access across Document, Project, DataRow.
 
 	- Assigns or removes permissions
-	- Logs the action to ShareActionLog
+	- Logs the action to ShareActionLog (auditlog.writer)
 	"""
 	from documents.models import Document
 	from projects.models import Project
@@ -28,7 +29,8 @@ def update_access(actor, target_user, container, role, remove=False):
 			if current_perms:
 				for perm in ["owner_document", "editor_document", "commenter_document"]:
 					remove_perm(perm, target_user, container)
-				ShareActionLog.objects.create(
+				role_cache.invalidate_document(target_user, container)
+				audit.record(
 					actor=actor,
 					target_user=target_user,
 					document=container,
@@ -49,8 +51,9 @@ def update_access(actor, target_user, container, role, remove=False):
 			for perm in perm_map.values():
 				remove_perm(perm, target_user, container)
 			assign_perm(perm_map[role], target_user, container)
+			role_cache.invalidate_document(target_user, container)
 
-			ShareActionLog.objects.create(
+			audit.record(
 				actor=actor,
 				target_user=target_user,
 				document=container,
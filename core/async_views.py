@@ -0,0 +1,59 @@
+# core/async_views.py
+
+from functools import wraps
+
+from asgiref.sync import sync_to_async
+from django.contrib.auth.views import redirect_to_login
+from django.http import Http404, HttpResponseNotAllowed
+
+"""
+Async View Helpers
+------------------
+Django 4.2's login_required / require_POST / csrf_exempt wrap views in a
+plain function, which makes an `async def` view look synchronous (Django then
+runs it in a thread and gets a coroutine back). These keep the wrapped view
+a coroutine function. aget_object_or_404 stands in for the 5.0 shortcut.
+"""
+
+
+async def aget_user(request):
+	"""Resolves the lazy request.user without touching the ORM from the event loop."""
+	# Any attribute access evaluates the SimpleLazyObject (one session + user query)
+	await sync_to_async(lambda: request.user.is_authenticated)()
+	return request.user
+
+
+async def aget_object_or_404(queryset, **lookup):
+	obj = await queryset.filter(**lookup).afirst()
+	if obj is None:
+		raise Http404(f"No {queryset.model._meta.object_name} matches the given query.")
+	return obj
+
+
+def async_login_required(view):
+	@wraps(view)
+	async def wrapper(request, *args, **kwargs):
+		user = await aget_user(request)
+		if not user.is_authenticated:
+			return redirect_to_login(request.get_full_path())
+		return await view(request, *args, **kwargs)
+	return wrapper
+
+
+def async_require_http_methods(methods):
+	def decorator(view):
+		@wraps(view)
+		async def wrapper(request, *args, **kwargs):
+			if request.method not in methods:
+				return HttpResponseNotAllowed(methods)
+			return await view(request, *args, **kwargs)
+		return wrapper
+	return decorator
+
+
+async_require_POST = async_require_http_methods(["POST"])
+
+
+def async_csrf_exempt(view):
+	view.csrf_exempt = True
+	return view
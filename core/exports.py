@@ -0,0 +1,180 @@
+# core/exports.py
+
+import csv
+import datetime
+import json
+import zlib
+from io import StringIO
+from typing import Iterable, Iterator
+
+"""
+Tabular Exports
+---------------
+Generators that turn rows (tuples, in column order) into export files a
+chunk at a time, so neither a streaming response nor a background export
+job ever holds more than a chunk in memory:
+
+- csv:      header row + rows
+- jsonl:    one JSON object per row, keyed by the column keys
+- parquet:  one row group per `row_group_size` rows; needs the optional
+            'pyarrow' package
+- gzip:     compresses any of the text formats on the fly (Parquet is
+            already compressed)
+
+Chunks are ~STREAM_BUFFER_SIZE bytes, written as str (text formats) or
+bytes; encode_chunks() turns either into bytes.
+"""
+
+STREAM_BUFFER_SIZE = 64 * 1024
+
+# format -> (content type, file extension)
+EXPORT_FORMATS = {
+	"csv": ("text/csv", "csv"),
+	"jsonl": ("application/x-ndjson", "jsonl"),
+	"parquet": ("application/vnd.apache.parquet", "parquet"),
+}
+
+
+class ExportUnavailable(Exception):
+	"""The requested export format cannot be produced here."""
+
+
+def cell(value):
+	"""A database value as an export cell: ISO dates, None as ""."""
+	if value is None:
+		return ""
+	if isinstance(value, (datetime.datetime, datetime.date)):
+		return value.isoformat()
+	return value
+
+
+def stream_csv(rows: Iterable[tuple], columns) -> Iterator[str]:
+	buffer = StringIO()
+	writer = csv.writer(buffer)
+	writer.writerow(columns)
+	for row in rows:
+		writer.writerow(row)
+		if buffer.tell() >= STREAM_BUFFER_SIZE:
+			yield buffer.getvalue()
+			buffer.seek(0)
+			buffer.truncate()
+	yield buffer.getvalue()
+
+
+def stream_jsonl(rows: Iterable[tuple], keys) -> Iterator[str]:
+	lines, size = [], 0
+	for row in rows:
+		line = json.dumps(dict(zip(keys, row)), ensure_ascii=False) + "\n"
+		lines.append(line)
+		size += len(line)
+		if size >= STREAM_BUFFER_SIZE:
+			yield "".join(lines)
+			lines, size = [], 0
+	yield "".join(lines)
+
+
+class _ChunkSink:
+	"""A write-only file for pyarrow: collects what it writes until taken."""
+
+	closed = False
+
+	def __init__(self):
+		self.chunks = []
+		self.position = 0
+
+	def write(self, data):
+		self.chunks.append(bytes(data))
+		self.position += len(data)
+		return len(data)
+
+	def tell(self):
+		return self.position
+
+	def flush(self):
+		pass
+
+	def close(self):
+		self.closed = True
+
+	def take(self) -> bytes:
+		data, self.chunks = b"".join(self.chunks), []
+		return data
+
+
+def _pyarrow():
+	try:
+		import pyarrow
+		import pyarrow.parquet
+	except ImportError:
+		raise ExportUnavailable("Parquet export requires the optional 'pyarrow' package.")
+	return pyarrow, pyarrow.parquet
+
+
+def stream_parquet(rows: Iterable[tuple], keys, row_group_size: int = 20000) -> Iterator[bytes]:
+	"""All columns as strings; each row group is sent as soon as it is written."""
+	pa, pq = _pyarrow()
+	schema = pa.schema([(key, pa.string()) for key in keys])
+	sink = _ChunkSink()
+	writer = pq.ParquetWriter(sink, schema)
+
+	def write(batch):
+		columns = [[str(value) for value in column] for column in zip(*batch)]
+		writer.write_table(pa.Table.from_arrays([pa.array(c, pa.string()) for c in columns], schema=schema))
+
+	batch = []
+	for row in rows:
+		batch.append(row)
+		if len(batch) >= row_group_size:
+			write(batch)
+			batch = []
+			yield sink.take()
+	if batch:
+		write(batch)
+	writer.close()
+	yield sink.take()
+
+
+def encode_chunks(chunks: Iterable) -> Iterator[bytes]:
+	for chunk in chunks:
+		yield chunk.encode("utf-8") if isinstance(chunk, str) else chunk
+
+
+def gzip_stream(chunks: Iterable) -> Iterator[bytes]:
+	compressor = zlib.compressobj(wbits=zlib.MAX_WBITS | 16)  # gzip container
+	for chunk in encode_chunks(chunks):
+		data = compressor.compress(chunk)
+		if data:
+			yield data
+	yield compressor.flush()
+
+
+def check_format(fmt: str) -> None:
+	"""Raises ValueError for an unknown format, ExportUnavailable if it cannot be produced here."""
+	if fmt not in EXPORT_FORMATS:
+		raise ValueError(f"Unknown export format: {fmt}")
+	if fmt == "parquet":
+		_pyarrow()
+
+
+def export_chunks(rows: Iterable[tuple], columns, keys, fmt: str = "csv", gzip: bool = False):
+	"""
+	Returns (chunks, content type, file extension) for `rows` in `fmt`.
+
+	Args:
+		rows: Tuples of cell values, in column order
+		columns: Header labels (CSV)
+		keys: Field names (JSON Lines, Parquet)
+		fmt: One of EXPORT_FORMATS
+		gzip: Compress on the fly (ignored for Parquet)
+	"""
+	check_format(fmt)  # fail here, not once the first chunk is pulled
+	content_type, extension = EXPORT_FORMATS[fmt]
+	if fmt == "csv":
+		chunks = stream_csv(rows, columns)
+	elif fmt == "jsonl":
+		chunks = stream_jsonl(rows, keys)
+	else:
+		return stream_parquet(rows, keys), content_type, extension
+	if gzip:
+		return gzip_stream(chunks), "application/gzip", f"{extension}.gz"
+	return chunks, content_type, extension
@@ -0,0 +1,205 @@
+# core/file_serving.py
+
+import mimetypes
+import os
+import re
+from urllib.parse import quote
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.http import FileResponse, Http404, HttpResponse, HttpResponseNotModified, StreamingHttpResponse
+from django.utils._os import safe_join
+from django.utils.http import http_date, parse_http_date_safe
+
+"""
+Protected File Delivery
+-----------------------
+Django decides *whether* a file may be downloaded; who moves the bytes is
+set by FILE_SERVE_MODE:
+
+- "django":  stream from Python (dev / no front-end server). Supports
+             single byte ranges, ETag/If-None-Match, Last-Modified/If-Modified-Since.
+- "nginx":   respond with X-Accel-Redirect to FILE_SERVE_INTERNAL_PREFIX + path;
+             nginx needs a matching `internal` location aliased to MEDIA_ROOT.
+- "apache":  respond with X-Sendfile (mod_xsendfile) carrying the absolute path.
+
+With the front-end modes the worker is released as soon as headers are sent,
+and nginx/Apache handle ranges and conditional requests themselves.
+"""
+
+RANGE_RE = re.compile(r"^bytes=(\d*)-(\d*)$")
+STREAM_CHUNK_SIZE = 64 * 1024
+
+
+def _etag(stat) -> str:
+	return f'"{stat.st_mtime_ns:x}-{stat.st_size:x}"'
+
+
+def _not_modified(request, etag, mtime) -> bool:
+	if_none_match = request.headers.get("If-None-Match")
+	if if_none_match:
+		# If-None-Match wins over If-Modified-Since (RFC 9110 13.2.2)
+		tags = [tag.strip() for tag in if_none_match.split(",")]
+		return "*" in tags or etag in tags or f"W/{etag}" in tags
+	since = parse_http_date_safe(request.headers.get("If-Modified-Since", ""))
+	return since is not None and int(mtime) <= since
+
+
+def _parse_range(header, size):
+	"""
+	Returns (start, end) inclusive for a single satisfiable byte range, None
+	to ignore the header (multiple/malformed ranges are served in full), or
+	"unsatisfiable".
+	"""
+	match = RANGE_RE.match(header.strip())
+	if not match:
+		return None
+	first, last = match.groups()
+	if not first and not last:
+		return None
+	if not first:
+		# Suffix range: the last N bytes
+		length = int(last)
+		if length == 0:
+			return "unsatisfiable"
+		return max(size - length, 0), size - 1
+	start = int(first)
+	end = min(int(last), size - 1) if last else size - 1
+	if start >= size or (last and int(last) < start):
+		return "unsatisfiable"
+	return start, end
+
+
+def _read_range(path, start, length):
+	with open(path, "rb") as fh:
+		fh.seek(start)
+		remaining = length
+		while remaining > 0:
+			piece = fh.read(min(STREAM_CHUNK_SIZE, remaining))
+			if not piece:
+				break
+			remaining -= len(piece)
+			yield piece
+
+
+async def _aread_range(path, start, length):
+	read = sync_to_async(lambda fh, size: fh.read(size), thread_sensitive=False)
+	fh = await sync_to_async(open, thread_sensitive=False)(path, "rb")
+	try:
+		fh.seek(start)
+		remaining = length
+		while remaining > 0:
+			piece = await read(fh, min(STREAM_CHUNK_SIZE, remaining))
+			if not piece:
+				break
+			remaining -= len(piece)
+			yield piece
+	finally:
+		fh.close()
+
+
+def _prepare(request, path, document_root, filename=None):
+	"""
+	Does everything but the body: returns (response, body) where body is
+	None for complete responses, or (full_path, start, length) still to be
+	streamed into `response`. `filename` (the logical name) drives the
+	content type when the stored path has none, e.g. content-addressed blobs.
+	"""
+	try:
+		full_path = safe_join(document_root, path)
+	except Exception:
+		raise Http404("Invalid file path.")
+	try:
+		stat = os.stat(full_path)
+	except OSError:
+		raise Http404("File not found.")
+	if not os.path.isfile(full_path):
+		raise Http404("File not found.")
+
+	content_type, encoding = mimetypes.guess_type(filename or full_path)
+	content_type = content_type or "application/octet-stream"
+	mode = getattr(settings, "FILE_SERVE_MODE", "django")
+
+	if mode == "nginx":
+		prefix = getattr(settings, "FILE_SERVE_INTERNAL_PREFIX", "/protected-media/")
+		response = HttpResponse(content_type=content_type)
+		response["X-Accel-Redirect"] = prefix.rstrip("/") + "/" + quote(path.replace("\\", "/").lstrip("/"))
+		return response, None
+	if mode == "apache":
+		response = HttpResponse(content_type=content_type)
+		response["X-Sendfile"] = full_path
+		return response, None
+
+	etag = _etag(stat)
+	last_modified = http_date(stat.st_mtime)
+	if _not_modified(request, etag, stat.st_mtime):
+		response = HttpResponseNotModified()
+		response["ETag"] = etag
+		response["Last-Modified"] = last_modified
+		return response, None
+
+	byte_range = None
+	range_header = request.headers.get("Range")
+	if range_header and request.method in ("GET", "HEAD"):
+		# If-Range: only honour the range if the client's copy is still current
+		if_range = request.headers.get("If-Range")
+		if not if_range or if_range == etag or if_range == last_modified:
+			byte_range = _parse_range(range_header, stat.st_size)
+
+	body = None
+	if byte_range == "unsatisfiable":
+		response = HttpResponse(status=416)
+		response["Content-Range"] = f"bytes */{stat.st_size}"
+	elif byte_range:
+		start, end = byte_range
+		body = (full_path, start, end - start + 1)
+		response = StreamingHttpResponse(status=206, content_type=content_type)
+		response["Content-Range"] = f"bytes {start}-{end}/{stat.st_size}"
+	else:
+		body = (full_path, 0, stat.st_size)
+		response = StreamingHttpResponse(content_type=content_type)
+	if body:
+		response["Content-Length"] = str(body[2])
+	if encoding:
+		response["Content-Encoding"] = encoding
+	response["Accept-Ranges"] = "bytes"
+	response["ETag"] = etag
+	response["Last-Modified"] = last_modified
+	return response, body
+
+
+def _with_sync_body(response, body):
+	"""
+	Attaches a synchronous body. Whole files become a FileResponse so the WSGI
+	server can hand the descriptor to wsgi.file_wrapper (os.sendfile under gunicorn).
+	"""
+	full_path, start, length = body
+	if response.status_code == 206:
+		response.streaming_content = _read_range(full_path, start, length)
+		return response
+	file_response = FileResponse(open(full_path, "rb"), content_type=response["Content-Type"])
+	for header, value in response.items():
+		file_response[header] = value
+	return file_response
+
+
+def serve_file(request, path, document_root, filename=None):
+	"""Delivers `path` under `document_root`; the caller has already checked access."""
+	response, body = _prepare(request, path, document_root, filename)
+	return _with_sync_body(response, body) if body else response
+
+
+async def aserve_file(request, path, document_root, filename=None):
+	"""
+	Async serve_file for ASGI: file reads run in worker threads and the body
+	is an async iterator, so a slow client holds no thread between chunks.
+	"""
+	response, body = await sync_to_async(_prepare, thread_sensitive=False)(request, path, document_root, filename)
+	if not body:
+		return response
+	if not isinstance(request, ASGIRequest):
+		# Under WSGI Django would buffer an async iterator in memory; stream synchronously there
+		return _with_sync_body(response, body)
+	response.streaming_content = _aread_range(*body)
+	return response
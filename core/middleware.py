@@ -0,0 +1,47 @@
+# core/middleware.py
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from core import role_cache
+
+
+class RoleCacheMiddleware:
+	"""
+	Scopes the effective-role cache to a single request and reports
+	its counters in the X-Role-Cache response header.
+	"""
+	sync_capable = True
+	async_capable = True
+
+	def __init__(self, get_response):
+		self.get_response = get_response
+		if iscoroutinefunction(get_response):
+			markcoroutinefunction(self)
+
+	def __call__(self, request):
+		if iscoroutinefunction(self):
+			return self.__acall__(request)
+		token = role_cache.begin_request()
+		try:
+			response = self.get_response(request)
+		finally:
+			stats = role_cache.end_request(token)
+		return self._annotate(response, stats)
+
+	async def __acall__(self, request):
+		# The layer dict is shared by reference, so sync_to_async'd permission
+		# checks (which run in a copied context) still fill it
+		token = role_cache.begin_request()
+		try:
+			response = await self.get_response(request)
+		finally:
+			stats = role_cache.end_request(token)
+		return self._annotate(response, stats)
+
+	@staticmethod
+	def _annotate(response, stats):
+		response["X-Role-Cache"] = (
+			f"request_hits={stats['request_hits']}; "
+			f"shared_hits={stats['shared_hits']}; "
+			f"misses={stats['misses']}"
+		)
+		return response
@@ -0,0 +1,151 @@
+# core/pagination.py
+
+from django.conf import settings
+from django.core import signing
+from django.db.models import Q
+
+"""
+Keyset Pagination
+-----------------
+Cursor-based paging for list views. Each page is fetched with a
+WHERE (sort_field, id) > (last_value, last_id) predicate instead of OFFSET,
+so deep pages cost the same as the first one as long as the sort field is
+indexed.
+
+Cursors are signed, opaque strings carrying the sort key, the boundary row's
+sort value/id and the direction. A cursor issued for another sort key is
+ignored (the first page is returned).
+"""
+
+CURSOR_SALT = "core.pagination.keyset"
+
+
+class KeysetPage:
+	"""One page of results plus the cursors needed to move around it."""
+
+	def __init__(self, object_list, sort, sort_options, next_cursor, previous_cursor, prefix=""):
+		self.object_list = object_list
+		self.sort = sort
+		self.sort_options = sort_options
+		self.next_cursor = next_cursor
+		self.previous_cursor = previous_cursor
+		self.cursor_param = f"{prefix}cursor"
+		self.sort_param = f"{prefix}sort"
+
+	@property
+	def has_next(self) -> bool:
+		return self.next_cursor is not None
+
+	@property
+	def has_previous(self) -> bool:
+		return self.previous_cursor is not None
+
+	def __iter__(self):
+		return iter(self.object_list)
+
+	def __len__(self):
+		return len(self.object_list)
+
+
+def _resolve_sort(sort: str | None, sort_fields: dict, default_sort: str) -> tuple[str, str, bool]:
+	"""Returns (sort key as requested, model field path, descending)."""
+	if not sort or sort.lstrip("-") not in sort_fields:
+		sort = default_sort
+	descending = sort.startswith("-")
+	return sort, sort_fields[sort.lstrip("-")], descending
+
+
+def _model_field(model, path: str):
+	"""Follows a `a__b__c` lookup path to the final model field."""
+	field = None
+	for part in path.split("__"):
+		field = model._meta.get_field(part)
+		model = field.related_model or model
+	return field
+
+
+def _row_value(obj, path: str):
+	for part in path.split("__"):
+		obj = getattr(obj, part)
+	return obj
+
+
+def _encode_cursor(sort: str, field_path: str, obj, direction: str) -> str:
+	value = _row_value(obj, field_path)
+	if hasattr(value, "isoformat"):
+		value = value.isoformat()
+	return signing.dumps({"s": sort, "v": value, "id": obj.pk, "d": direction}, salt=CURSOR_SALT, compress=True)
+
+
+def _decode_cursor(cursor: str | None) -> dict | None:
+	if not cursor:
+		return None
+	try:
+		return signing.loads(cursor, salt=CURSOR_SALT)
+	except signing.BadSignature:
+		return None
+
+
+def paginate_keyset(queryset, *, cursor=None, sort=None, sort_fields=None, default_sort="-created",
+                    page_size=None, prefix="") -> KeysetPage:
+	"""
+	Returns a KeysetPage of `queryset`.
+
+	Args:
+		queryset: Unordered (or arbitrarily ordered) queryset; ordering is replaced.
+		cursor: Opaque cursor from a previous page's next/previous_cursor.
+		sort: Requested sort key, e.g. "title" or "-created".
+		sort_fields: Allowed sort keys mapped to non-null model field paths,
+			e.g. {"created": "created_at", "title": "title"}.
+		default_sort: Sort key used when `sort` is missing or not allowed.
+		page_size: Rows per page (defaults to settings.PAGINATION_PAGE_SIZE).
+		prefix: Query-string prefix when several lists share one page.
+	"""
+	sort_fields = sort_fields or {"created": "created_at"}
+	page_size = page_size or getattr(settings, "PAGINATION_PAGE_SIZE", 50)
+	sort, field_path, descending = _resolve_sort(sort, sort_fields, default_sort)
+
+	decoded = _decode_cursor(cursor)
+	if decoded and decoded.get("s") != sort:
+		decoded = None
+	backwards = bool(decoded) and decoded.get("d") == "previous"
+
+	# Walking backwards runs the query in reverse order and flips the page afterwards
+	reverse_scan = descending != backwards
+	ordering = [f"-{field_path}", "-pk"] if reverse_scan else [field_path, "pk"]
+
+	if decoded:
+		value = _model_field(queryset.model, field_path).to_python(decoded["v"])
+		op = "lt" if reverse_scan else "gt"
+		queryset = queryset.filter(
+			Q(**{f"{field_path}__{op}": value}) |
+			Q(**{field_path: value, f"pk__{op}": decoded["id"]})
+		)
+
+	rows = list(queryset.order_by(*ordering)[:page_size + 1])
+	has_more = len(rows) > page_size
+	rows = rows[:page_size]
+
+	if backwards:
+		rows.reverse()
+		has_next, has_previous = True, has_more
+	else:
+		has_next, has_previous = has_more, bool(decoded)
+
+	next_cursor = _encode_cursor(sort, field_path, rows[-1], "next") if rows and has_next else None
+	previous_cursor = _encode_cursor(sort, field_path, rows[0], "previous") if rows and has_previous else None
+
+	return KeysetPage(rows, sort, sorted(sort_fields), next_cursor, previous_cursor, prefix=prefix)
+
+
+def paginate_request(request, queryset, *, sort_fields, default_sort="-created", page_size=None, prefix="") -> KeysetPage:
+	"""Reads `<prefix>cursor` and `<prefix>sort` from request.GET and paginates."""
+	return paginate_keyset(
+		queryset,
+		cursor=request.GET.get(f"{prefix}cursor"),
+		sort=request.GET.get(f"{prefix}sort"),
+		sort_fields=sort_fields,
+		default_sort=default_sort,
+		page_size=page_size,
+		prefix=prefix,
+	)
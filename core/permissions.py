@@ -1,8 +1,10 @@
 # core/permissions.py
 
-from guardian.shortcuts import get_perms
+from guardian.core import ObjectPermissionChecker
 from documents.models import Document
 from django.contrib.auth.models import User
+from projects.models import ProjectMembership
+from core import role_cache
 
 """
 Permission Utilities
@@ -17,6 +19,26 @@ ROLE_PERM_MAP = {
     "commenter": "commenter_document"
 }
 
+NO_ACCESS = {
+	"role": None,
+	"perms": [],
+	"membership_role": None,
+	"can_edit": False,
+	"can_comment": False,
+	"can_manage": False,
+}
+
+
+def get_document_access(user: User, document: Document) -> dict:
+	"""
+	Returns the resolved access dict for one document (see resolve_document_roles),
+	served from the effective-role cache when possible.
+	"""
+	if not user or not document or not user.is_authenticated:
+		return NO_ACCESS
+	return role_cache.get_or_resolve(user, document, resolve_document_roles)
+
+
 def has_document_role(user: User, document: Document, role: str) -> bool:
     """
     Returns True if the user has the given role for the document.
@@ -24,7 +46,7 @@ def has_document_role(user: User, document: Document, role: str) -> bool:
     if not user or not document or role not in ROLE_PERM_MAP:
         return False
 
-    return ROLE_PERM_MAP[role] in get_perms(user, document)
+    return ROLE_PERM_MAP[role] in get_document_access(user, document)["perms"]
 
 
 def get_user_document_role(user: User, document: Document) -> str | None:
@@ -32,50 +54,84 @@ def get_user_document_role(user: User, document: Document) -> str | None:
 	Returns the highest role a user has for a given document, or None.
 	Role hierarchy: owner > editor > commenter
 	"""
-	if not user or not document:
-		return None
-
-	perms = set(get_perms(user, document))
-
-	if ROLE_PERM_MAP["owner"] in perms:
-		return "owner"
-	if ROLE_PERM_MAP["editor"] in perms:
-		return "editor"
-	if ROLE_PERM_MAP["commenter"] in perms:
-		return "commenter"
-		
-	membership = document.project.memberships.filter(user=user).first()
-	if membership:
-		return membership.role
-
-	return None
+	return get_document_access(user, document)["role"]
 
 
 def can_view_document(user, document):
-	return document.project.memberships.filter(user=user).exists()
+	return get_document_access(user, document)["membership_role"] is not None
 
 
 def can_edit_document(user: User, document: Document) -> bool:
-	return (
-		has_document_role(user, document, "editor") or
-		has_document_role(user, document, "owner") or
-		document.project.memberships.filter(user=user, role__in=["editor", "owner"]).exists()
-	)
+	return get_document_access(user, document)["can_edit"]
 
 
 def can_comment_on_document(user: User, document: Document) -> bool:
-	return (
-		has_document_role(user, document, "commenter") or
-		can_edit_document(user, document) or
-		document.project.memberships.filter(user=user, role="commenter").exists()
-	)
+	return get_document_access(user, document)["can_comment"]
 
 
 def can_manage_permissions(user: User, document: Document) -> bool:
 	"""
 	Returns True if the user is the owner of the document and can share/unshare.
 	"""
-	return (
-		has_document_role(user, document, "owner") or
-		document.project.memberships.filter(user=user, role="owner").exists()
+	return get_document_access(user, document)["can_manage"]
+
+
+def _role_from_perms(perms, membership_role: str | None) -> str | None:
+	"""
+	Highest document role (owner > editor > commenter) from guardian perms,
+	falling back to the project membership role.
+	"""
+	for role in ("owner", "editor", "commenter"):
+		if ROLE_PERM_MAP[role] in perms:
+			return role
+	return membership_role
+
+
+def resolve_document_roles(user: User, documents) -> dict[int, dict]:
+	"""
+	Resolves role and permission flags for many documents at once.
+
+	Guardian object perms (user + group) and the user's project memberships
+	are fetched in a fixed number of queries regardless of how many documents
+	are passed, then evaluated in memory. This is the single source of truth
+	for the per-document helpers above.
+
+	Returns:
+		{document.id: {"role", "perms", "membership_role", "can_edit", "can_comment", "can_manage"}}
+	"""
+	documents = list(documents)
+	if not user or not documents:
+		return {}
+
+	checker = ObjectPermissionChecker(user)
+	checker.prefetch_perms(documents)
+
+	project_ids = {doc.project_id for doc in documents}
+	membership_map = dict(
+		ProjectMembership.objects.filter(user=user, project_id__in=project_ids)
+		.values_list("project_id", "role")
 	)
+
+	resolved = {}
+	for doc in documents:
+		perms = set(checker.get_perms(doc)) & set(ROLE_PERM_MAP.values())
+		membership_role = membership_map.get(doc.project_id)
+
+		can_edit = (
+			ROLE_PERM_MAP["editor"] in perms or
+			ROLE_PERM_MAP["owner"] in perms or
+			membership_role in ("editor", "owner")
+		)
+		resolved[doc.id] = {
+			"role": _role_from_perms(perms, membership_role),
+			"perms": sorted(perms),
+			"membership_role": membership_role,
+			"can_edit": can_edit,
+			"can_comment": (
+				ROLE_PERM_MAP["commenter"] in perms or
+				can_edit or
+				membership_role == "commenter"
+			),
+			"can_manage": ROLE_PERM_MAP["owner"] in perms or membership_role == "owner",
+		}
+	return resolved
@@ -0,0 +1,182 @@
+# core/role_cache.py
+
+import threading
+import time
+from collections import Counter
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+"""
+Effective Role Cache
+--------------------
+Caches resolved document access (see core.permissions.resolve_document_roles)
+per (user, document) in two layers:
+
+- request layer: a plain dict living for one request (RoleCacheMiddleware)
+- shared layer: Django's cache framework, shared across workers
+
+Shared entries are stamped with a per-(user, project) generation, so a
+project membership change invalidates every document in that project for
+the user with a single write, and with a per-user generation for changes
+that reach every project (groups, superuser/active flags). Document-level
+share changes delete the single (user, document) entry.
+
+Invalidations drop request-layer entries at once but touch the shared layer
+only when the surrounding transaction commits: done earlier, a concurrent
+request could re-cache the pre-commit role for ROLE_CACHE_TIMEOUT.
+Receivers in documents/signals.py cover group, group permission, user flag
+and project membership changes; document shares invalidate explicitly
+(documents/services.py, core/access.py).
+"""
+
+KEY_PREFIX = "dms:role"
+
+_request_layer: ContextVar[dict | None] = ContextVar("role_cache_request_layer", default=None)
+
+_stats = Counter()
+_stats_lock = threading.Lock()
+
+
+def _entry_key(user_id, document_id) -> str:
+	return f"{KEY_PREFIX}:{user_id}:doc:{document_id}"
+
+
+def _generation_key(user_id, project_id) -> str:
+	return f"{KEY_PREFIX}:{user_id}:project:{project_id}"
+
+
+def _user_generation_key(user_id) -> str:
+	return f"{KEY_PREFIX}:{user_id}:user"
+
+
+def _new_generation() -> int:
+	return time.time_ns()
+
+
+def _count(stat: str, n: int = 1) -> None:
+	with _stats_lock:
+		_stats[stat] += n
+	layer = _request_layer.get()
+	if layer is not None:
+		layer["stats"][stat] += n
+
+
+def _timeout() -> int:
+	return getattr(settings, "ROLE_CACHE_TIMEOUT", 300)
+
+
+def begin_request():
+	"""Opens a request-scoped layer. Returns a token for end_request()."""
+	return _request_layer.set({"entries": {}, "stats": Counter()})
+
+
+def end_request(token) -> Counter:
+	"""Closes the request-scoped layer and returns its hit/miss counters."""
+	layer = _request_layer.get()
+	_request_layer.reset(token)
+	return layer["stats"] if layer is not None else Counter()
+
+
+def get_or_resolve(user, document, resolve) -> dict:
+	"""
+	Returns the cached access dict for (user, document), calling
+	resolve(user, [document]) on a miss and storing the result in both layers.
+	"""
+	local_key = (user.pk, document.pk)
+	layer = _request_layer.get()
+	if layer is not None and local_key in layer["entries"]:
+		_count("request_hits")
+		return layer["entries"][local_key]
+
+	entry_key = _entry_key(user.pk, document.pk)
+	generation_keys = [_user_generation_key(user.pk), _generation_key(user.pk, document.project_id)]
+	found = cache.get_many([entry_key, *generation_keys])
+
+	generation = []
+	for key in generation_keys:
+		value = found.get(key)
+		if value is None:
+			# Never reuse an old generation: entries stamped before an eviction stay invalid
+			value = _new_generation()
+			if not cache.add(key, value, timeout=None):
+				value = cache.get(key, value)
+		generation.append(value)
+	generation = tuple(generation)
+
+	entry = found.get(entry_key)
+	if entry is not None and entry[0] == generation:
+		_count("shared_hits")
+		access = entry[1]
+	else:
+		_count("misses")
+		access = resolve(user, [document])[document.pk]
+		cache.set(entry_key, (generation, access), timeout=_timeout())
+
+	if layer is not None:
+		layer["entries"][local_key] = access
+	return access
+
+
+def invalidate_document(user, document) -> None:
+	"""Drops the cached access of one user on one document."""
+	_count("invalidations")
+	layer = _request_layer.get()
+	if layer is not None:
+		layer["entries"].pop((user.pk, document.pk), None)
+	key = _entry_key(user.pk, document.pk)
+	transaction.on_commit(lambda: cache.delete(key))
+
+
+def invalidate_documents(pairs) -> None:
+	"""Bulk invalidate_document for (user_id, document_id) pairs, in one cache round trip."""
+	pairs = set(pairs)
+	if not pairs:
+		return
+	_count("invalidations", len(pairs))
+	layer = _request_layer.get()
+	if layer is not None:
+		for pair in pairs:
+			layer["entries"].pop(pair, None)
+	keys = [_entry_key(user_id, document_id) for user_id, document_id in pairs]
+	transaction.on_commit(lambda: cache.delete_many(keys))
+
+
+def _drop_request_entries(user_ids) -> None:
+	layer = _request_layer.get()
+	if layer is not None:
+		# The request layer is tiny; dropping all of the users' entries avoids a lookup
+		for key in [k for k in layer["entries"] if k[0] in user_ids]:
+			del layer["entries"][key]
+
+
+def invalidate_project(user_id, project_id) -> None:
+	"""Drops the cached access of one user on every document in a project."""
+	_count("invalidations")
+	_drop_request_entries({user_id})
+	key = _generation_key(user_id, project_id)
+	transaction.on_commit(lambda: cache.set(key, _new_generation(), timeout=None))
+
+
+def invalidate_users(user_ids) -> None:
+	"""Drops the cached access of the given users on every document."""
+	user_ids = set(user_ids)
+	if not user_ids:
+		return
+	_count("invalidations", len(user_ids))
+	_drop_request_entries(user_ids)
+	keys = [_user_generation_key(user_id) for user_id in user_ids]
+	transaction.on_commit(lambda: cache.set_many(dict.fromkeys(keys, _new_generation()), timeout=None))
+
+
+def get_stats() -> dict:
+	"""Process-wide hit/miss counters since start (or the last reset_stats)."""
+	with _stats_lock:
+		return dict(_stats)
+
+
+def reset_stats() -> None:
+	with _stats_lock:
+		_stats.clear()
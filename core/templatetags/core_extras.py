@@ -10,3 +10,17 @@ def dict_get(d, key):
 @register.filter
 def add_class(field, css_class):
 	return field.as_widget(attrs={**field.field.widget.attrs, "class": css_class})
+
+@register.simple_tag(takes_context=True)
+def query_replace(context, *pairs):
+	"""
+	Returns the current query string with params replaced, given as
+	alternating name/value arguments. Empty values drop the param.
+	"""
+	params = context["request"].GET.copy()
+	for key, value in zip(pairs[::2], pairs[1::2]):
+		if value in (None, ""):
+			params.pop(key, None)
+		else:
+			params[key] = value
+	return params.urlencode()
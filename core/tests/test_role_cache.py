@@ -0,0 +1,68 @@
+# core/tests/test_role_cache.py
+
+from django.contrib.auth.models import Group, User
+from django.core.cache import cache
+from django.test import TestCase
+from guardian.shortcuts import assign_perm
+
+from core.permissions import get_document_access, resolve_document_roles
+from documents.models import Document
+from documents.services import share_document
+from projects.models import Project, ProjectMembership
+
+
+class RoleCacheInvalidationTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.owner = User.objects.create_user("owner", password="pw")
+        self.user = User.objects.create_user("member", password="pw")
+        self.project = Project.objects.create(name="P", created_by=self.owner)
+        ProjectMembership.objects.create(project=self.project, user=self.owner, role="owner")
+        ProjectMembership.objects.create(project=self.project, user=self.user, role="viewer")
+        self.document = Document.objects.create(project=self.project, title="Doc", created_by=self.owner)
+
+    def role(self):
+        return get_document_access(self.user, self.document)["role"]
+
+    def test_share_invalidates_after_commit(self):
+        self.assertEqual(self.role(), "viewer")
+        with self.captureOnCommitCallbacks() as callbacks:
+            share_document(self.document, self.owner, self.user, "editor")
+            # A concurrent request that read before the commit caches the old role
+            self.assertEqual(self.role(), "viewer")
+        for callback in callbacks:
+            callback()
+        self.assertEqual(self.role(), "editor")
+
+    def test_membership_change_invalidates(self):
+        self.assertEqual(self.role(), "viewer")
+        with self.captureOnCommitCallbacks(execute=True):
+            ProjectMembership.objects.filter(user=self.user).get().delete()
+        self.assertIsNone(self.role())
+
+    def test_group_membership_invalidates(self):
+        group = Group.objects.create(name="reviewers")
+        assign_perm("documents.commenter_document", group, self.document)
+        self.assertEqual(self.role(), "viewer")
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.groups.add(group)
+        self.assertEqual(self.role(), "commenter")
+        with self.captureOnCommitCallbacks(execute=True):
+            group.user_set.clear()
+        self.assertEqual(self.role(), "viewer")
+
+    def test_group_document_permission_invalidates(self):
+        group = Group.objects.create(name="reviewers")
+        self.user.groups.add(group)
+        self.assertEqual(self.role(), "viewer")
+        with self.captureOnCommitCallbacks(execute=True):
+            assign_perm("documents.owner_document", group, self.document)
+        self.assertEqual(self.role(), "owner")
+
+    def test_superuser_flag_invalidates(self):
+        self.assertFalse(get_document_access(self.user, self.document)["can_manage"])
+        self.user.is_superuser = True
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.save()
+        expected = resolve_document_roles(User.objects.get(pk=self.user.pk), [self.document])[self.document.id]
+        self.assertEqual(get_document_access(self.user, self.document), expected)
@@ -0,0 +1,16 @@
+# documents/apps.py
+
+from django.apps import AppConfig
+
+
+class DocumentsConfig(AppConfig):
+	name = "documents"
+	default_auto_field = "django.db.models.BigAutoField"
+
+	def ready(self):
+		from django.db.models.signals import post_migrate
+		from documents import signals  # noqa: F401  (registers search index receivers)
+		from documents.search import create_search_schema
+
+		# The full-text index tables are not models; create them with the rest of the schema
+		post_migrate.connect(create_search_schema, sender=self)
@@ -0,0 +1,239 @@
+# documents/exports.py
+
+import hashlib
+import logging
+import time
+from datetime import timedelta
+from tempfile import SpooledTemporaryFile
+
+from django.conf import settings
+from django.core.files import File
+from django.db import IntegrityError, transaction
+from django.utils.timezone import now
+
+from core.exports import cell, check_format, encode_chunks, export_chunks
+from documents.models import Document, ExportJob
+from storage.factory import get_storage_backend
+
+"""
+Export Jobs
+-----------
+Exports too big to stream from a web worker (audit logs, document
+inventories) run in Celery instead:
+
+1. request_export() records an ExportJob and queues run_export_job on commit.
+   An identical request (same kind, scope, format) made while a job is queued
+   or running gets that job back instead of starting another; a partial
+   unique index on dedup_key settles concurrent requests.
+2. The worker streams the rows through the core/exports.py writers and
+   appends the output to exports/<job id>/<file> in the storage backend
+   APPEND_SIZE bytes at a time (backends without appends get a spooled temp
+   file, saved once). rows_done is updated every PROGRESS_EVERY rows and
+   at least every HEARTBEAT_SECONDS.
+3. The job page polls the status; once done it links to the download view.
+
+Active jobs that have not reported progress for EXPORT_JOB_STALE_AFTER
+seconds (a killed worker) are failed the next time someone asks for the same
+export. A worker that was only slow notices at its next progress update (or
+when finishing), stops and deletes its output instead of overwriting the
+failed job. Finished jobs and their files are purged after
+EXPORT_JOB_RETENTION_DAYS by purge_export_jobs.
+"""
+
+logger = logging.getLogger(__name__)
+
+EXPORT_CHUNK_SIZE = 2000
+PROGRESS_EVERY = 10000
+HEARTBEAT_SECONDS = 30  # progress is also saved this often, so slow exports are not taken for dead ones
+APPEND_SIZE = 4 * 1024 * 1024
+
+INVENTORY_COLUMNS = [
+	"ID", "Title", "Project", "Created By", "Created At", "Active", "Versions", "Latest Version", "Last Uploaded At",
+]
+INVENTORY_FIELDS = [
+	"id",
+	"title",
+	"project__name",
+	"created_by__username",
+	"created_at",
+	"active",
+	"version_count",
+	"latest_version__version_number",
+	"last_uploaded_at",
+]
+INVENTORY_KEYS = [
+	"id", "title", "project", "created_by", "created_at", "active", "versions", "latest_version", "last_uploaded_at",
+]
+
+
+def inventory_rows(documents, chunk_size: int = EXPORT_CHUNK_SIZE):
+	"""Inventory export rows (INVENTORY_FIELDS order) of a Document queryset."""
+	for row in documents.values_list(*INVENTORY_FIELDS).iterator(chunk_size=chunk_size):
+		yield tuple(cell(value) for value in row)
+
+
+def _export_source(job):
+	"""(rows, row count, CSV columns, JSON keys, file name without extension) for a job."""
+	if job.kind == "audit":
+		from auditlog.exports import EXPORT_COLUMNS, JSON_KEYS, export_rows
+		from auditlog.models import ShareActionLog
+
+		if job.document_id:
+			logs, name = ShareActionLog.objects.filter(document_id=job.document_id), f"audit_log_{job.document_id}"
+		else:
+			logs = ShareActionLog.objects.filter(project_id=job.project_id, document__isnull=True)
+			name = f"project_log_{job.project_id}"
+		logs = logs.order_by("-timestamp", "-id")
+		return export_rows(logs), logs.count(), EXPORT_COLUMNS, JSON_KEYS, name
+	documents = Document.objects.filter(project_id=job.project_id).order_by("id")
+	return inventory_rows(documents), documents.count(), INVENTORY_COLUMNS, INVENTORY_KEYS, f"inventory_{job.project_id}"
+
+
+def dedup_key(kind, project_id, document_id, fmt, gzip) -> str:
+	return hashlib.sha256(f"{kind}:{project_id or ''}:{document_id or ''}:{fmt}:{int(gzip)}".encode()).hexdigest()
+
+
+def _fail_stale_jobs(key) -> None:
+	stale_after = timedelta(seconds=getattr(settings, "EXPORT_JOB_STALE_AFTER", 900))
+	ExportJob.objects.filter(
+		dedup_key=key, status__in=ExportJob.ACTIVE_STATUSES, updated_at__lt=now() - stale_after
+	).update(status="failed", error="The export worker stopped responding.", finished_at=now())
+
+
+def request_export(user, kind, fmt="csv", gzip=False, project=None, document=None):
+	"""
+	Starts an export, or joins an identical one still in progress. Returns
+	(job, created). The caller has checked that `user` may export the scope.
+
+	Raises:
+		ValueError: Unknown kind or format
+		ExportUnavailable: The format needs a package that is not installed
+	"""
+	if kind not in dict(ExportJob.KIND_CHOICES):
+		raise ValueError(f"Unknown export kind: {kind}")
+	check_format(fmt)
+	gzip = gzip and fmt != "parquet"
+	if document is not None:
+		project = document.project
+	key = dedup_key(kind, project.id if project else None, document.id if document else None, fmt, gzip)
+
+	_fail_stale_jobs(key)
+	job = ExportJob.objects.filter(dedup_key=key, status__in=ExportJob.ACTIVE_STATUSES).first()
+	if job:
+		return job, False
+	try:
+		with transaction.atomic():
+			job = ExportJob.objects.create(
+				kind=kind, project=project, document=document, format=fmt, gzip=gzip, dedup_key=key, requested_by=user,
+			)
+	except IntegrityError:
+		# An identical request got there first
+		return ExportJob.objects.get(dedup_key=key, status__in=ExportJob.ACTIVE_STATUSES), False
+	transaction.on_commit(lambda: _dispatch(job.id))
+	return job, True
+
+
+def _dispatch(job_id):
+	from documents.tasks import run_export_job
+	try:
+		run_export_job.delay(str(job_id))
+	except Exception as e:
+		# Broker down: fail the job rather than leave identical requests waiting on it
+		logger.warning("Could not queue export job %s: %s", job_id, e)
+		ExportJob.objects.filter(pk=job_id, status="queued").update(
+			status="failed", error="The export could not be queued.", finished_at=now()
+		)
+
+
+def _write(storage, path, chunks) -> int:
+	"""Writes byte chunks to `path` in storage. Returns the size."""
+	if storage.supports_append:
+		size, pending, pending_size = 0, [], 0
+		for chunk in chunks:
+			pending.append(chunk)
+			pending_size += len(chunk)
+			if pending_size >= APPEND_SIZE:
+				size += storage.append(path, pending)
+				pending, pending_size = [], 0
+		if pending or not size:
+			size += storage.append(path, pending or [b""])
+		return size
+	with SpooledTemporaryFile(max_size=APPEND_SIZE) as spool:
+		for chunk in chunks:
+			spool.write(chunk)
+		size = spool.tell()
+		spool.seek(0)
+		storage.save(File(spool, name=path.rsplit("/", 1)[-1]), path)
+	return size
+
+
+class _Abandoned(Exception):
+	"""The job stopped being "running" under us (failed as stale)."""
+
+
+def run_export(job_id) -> str | None:
+	"""
+	Runs a queued job (the Celery task body). Returns the final status, None if
+	the job was not queued or was failed as stale while this worker ran it.
+	"""
+	if not ExportJob.objects.filter(pk=job_id, status="queued").update(status="running", updated_at=now()):
+		return None  # already taken by another worker, or failed meanwhile
+	job = ExportJob.objects.select_related("project", "document").get(pk=job_id)
+	running = ExportJob.objects.filter(pk=job.pk, status="running")
+	storage = get_storage_backend()
+	path = None
+	try:
+		rows, total, columns, keys, name = _export_source(job)
+		running.update(rows_total=total, updated_at=now())
+		done = 0
+
+		def counted():
+			nonlocal done
+			reported, reported_at = 0, time.monotonic()
+			for row in rows:
+				yield row
+				done += 1
+				if done - reported >= PROGRESS_EVERY or time.monotonic() - reported_at >= HEARTBEAT_SECONDS:
+					if not running.update(rows_done=done, updated_at=now()):
+						raise _Abandoned()
+					reported, reported_at = done, time.monotonic()
+
+		chunks, _, extension = export_chunks(counted(), columns, keys, job.format, job.gzip)
+		filename = f"{name}.{extension}"
+		path = f"exports/{job.id}/{filename}"
+		size = _write(storage, path, encode_chunks(chunks))
+		if not running.update(
+			status="done", rows_done=done, output_path=path, filename=filename, size=size, finished_at=now()
+		):
+			raise _Abandoned()
+	except Exception as e:
+		if path:
+			try:
+				storage.delete(path)
+			except Exception:
+				pass
+		if isinstance(e, _Abandoned):
+			logger.warning("Export job %s was failed as stale while running; discarded its output", job_id)
+			return None
+		logger.exception("Export job %s failed", job_id)
+		running.update(status="failed", error=str(e), finished_at=now())
+		return "failed"
+	return "done"
+
+
+def purge_finished_jobs(days=None) -> int:
+	"""Deletes finished jobs older than `days` (EXPORT_JOB_RETENTION_DAYS) and their files. Returns the count."""
+	days = getattr(settings, "EXPORT_JOB_RETENTION_DAYS", 7) if days is None else days
+	storage = get_storage_backend()
+	purged = 0
+	jobs = ExportJob.objects.filter(status__in=("done", "failed"), finished_at__lt=now() - timedelta(days=days))
+	for job in jobs.iterator():
+		if job.output_path:
+			try:
+				storage.delete(job.output_path)
+			except Exception as e:
+				logger.warning("Could not delete export file %s: %s", job.output_path, e)
+				continue
+		job.delete()
+		purged += 1
+	return purged
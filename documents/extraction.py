@@ -0,0 +1,183 @@
+# documents/extraction.py
+
+import logging
+import shutil
+import tempfile
+import time
+import zipfile
+from pathlib import Path
+from xml.etree import ElementTree
+
+from django.conf import settings
+
+from documents.models import DocumentVersion
+from storage.factory import get_storage_backend
+
+"""
+Content Extraction
+------------------
+Pulls plain text out of uploaded version files so their contents are
+searchable. Runs in Celery workers (documents.tasks.extract_version_text),
+triggered when a DocumentVersion is created, and in bulk via
+`python manage.py backfill_content_extraction`.
+
+Files are streamed from the storage backend into a spooled temp file (most
+formats need random access) and skipped if they exceed
+CONTENT_EXTRACTION_MAX_FILE_SIZE. Extracted text is capped at
+CONTENT_EXTRACTION_MAX_CHARS. Workers stop a file at the task's soft time
+limit; outside Celery (backfill --sync) extract_version takes a
+`time_limit` that the extractors check as they go.
+"""
+
+logger = logging.getLogger(__name__)
+
+WORD_NS = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+SPOOL_MEMORY_LIMIT = 8 * 1024 * 1024
+
+
+class ExtractionTimeout(Exception):
+	pass
+
+
+class _TextBuffer:
+	"""Collects text pieces until a character budget (or the time budget, if any) is spent."""
+	def __init__(self, max_chars, deadline=None):
+		self.max_chars = max_chars
+		self.deadline = deadline
+		self.parts = []
+		self.length = 0
+
+	@property
+	def full(self) -> bool:
+		# Checked by the extractors after every element/row/page
+		if self.deadline is not None and time.monotonic() > self.deadline:
+			raise ExtractionTimeout()
+		return self.length >= self.max_chars
+
+	def add(self, text):
+		if not text or self.full:
+			return
+		text = text[:self.max_chars - self.length]
+		self.parts.append(text)
+		self.length += len(text)
+
+	def value(self) -> str:
+		return "".join(self.parts)
+
+
+def _extract_plain(fileobj, buffer):
+	raw = fileobj.read(buffer.max_chars * 4)
+	buffer.add(raw.decode("utf-8", errors="replace"))
+
+
+def _extract_docx(fileobj, buffer):
+	with zipfile.ZipFile(fileobj) as archive, archive.open("word/document.xml") as xml:
+		for event, elem in ElementTree.iterparse(xml, events=("end",)):
+			if elem.tag == f"{WORD_NS}t":
+				buffer.add(elem.text)
+			elif elem.tag == f"{WORD_NS}p":
+				buffer.add("\n")
+				elem.clear()
+			if buffer.full:
+				break
+
+
+def _extract_xlsx(fileobj, buffer):
+	from openpyxl import load_workbook
+
+	workbook = load_workbook(fileobj, read_only=True, data_only=True)
+	try:
+		for sheet in workbook.worksheets:
+			buffer.add(f"{sheet.title}\n")
+			for row in sheet.iter_rows(values_only=True):
+				cells = [str(value) for value in row if value is not None]
+				if cells:
+					buffer.add("\t".join(cells) + "\n")
+				if buffer.full:
+					return
+	finally:
+		workbook.close()
+
+
+def _extract_pdf(fileobj, buffer):
+	try:
+		from pypdf import PdfReader
+	except ImportError:
+		raise UnsupportedFormat("PDF extraction requires the optional 'pypdf' package.")
+
+	for page in PdfReader(fileobj).pages:
+		buffer.add((page.extract_text() or "") + "\n")
+		if buffer.full:
+			break
+
+
+EXTRACTORS = {
+	".txt": _extract_plain,
+	".csv": _extract_plain,
+	".md": _extract_plain,
+	".json": _extract_plain,
+	".docx": _extract_docx,
+	".xlsx": _extract_xlsx,
+	".xlsm": _extract_xlsx,
+	".pdf": _extract_pdf,
+}
+
+
+class UnsupportedFormat(Exception):
+	pass
+
+
+def extract_text(fileobj, filename: str, max_chars: int, deadline: float | None = None) -> str:
+	"""
+	Extracts up to `max_chars` characters of text from a seekable binary file.
+	Raises ExtractionTimeout once time.monotonic() passes `deadline`.
+	"""
+	extractor = EXTRACTORS.get(Path(filename).suffix.lower())
+	if extractor is None:
+		raise UnsupportedFormat(f"No extractor for '{filename}'.")
+	buffer = _TextBuffer(max_chars, deadline)
+	extractor(fileobj, buffer)
+	return buffer.value()
+
+
+def extract_version(version: DocumentVersion, storage=None, time_limit: float | None = None) -> str:
+	"""
+	Extracts and stores the text of one version's file, giving up (status
+	"failed") after `time_limit` seconds if set. Returns the resulting
+	extraction_status.
+	"""
+	deadline = time.monotonic() + time_limit if time_limit else None
+	storage = storage or get_storage_backend()
+	path = version.file.name
+	max_size = getattr(settings, "CONTENT_EXTRACTION_MAX_FILE_SIZE", 50 * 1024 * 1024)
+	max_chars = getattr(settings, "CONTENT_EXTRACTION_MAX_CHARS", 1_000_000)
+
+	status, text = "done", ""
+	try:
+		if Path(path).suffix.lower() not in EXTRACTORS:
+			status = "skipped"
+		elif storage.size(path) > max_size:
+			status = "skipped"
+		else:
+			with storage.open(path) as source, tempfile.SpooledTemporaryFile(max_size=SPOOL_MEMORY_LIMIT) as spool:
+				shutil.copyfileobj(source, spool, 1024 * 1024)
+				spool.seek(0)
+				text = extract_text(spool, path, max_chars, deadline)
+	except UnsupportedFormat:
+		status = "skipped"
+	except ExtractionTimeout:
+		logger.warning("Content extraction for version %s exceeded %ss", version.pk, time_limit)
+		status = "failed"
+	except Exception as e:
+		logger.warning("Content extraction failed for version %s: %s", version.pk, e)
+		status = "failed"
+
+	version.content_text = text
+	version.extraction_status = status
+	# Triggers the search re-index of the parent document (documents/signals.py)
+	version.save(update_fields=["content_text", "extraction_status"])
+	return status
+
+
+def mark_failed(version_id: int) -> None:
+	DocumentVersion.objects.filter(id=version_id).update(extraction_status="failed")
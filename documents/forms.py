@@ -1,8 +1,13 @@
 # documents/forms.py
 
+import uuid
+
+from asgiref.sync import sync_to_async
 from django import forms
+from django.db import transaction
 from documents.models import Document, DocumentVersion, Comment
 from core.permissions import can_edit_document, can_comment_on_document
+from documents.services import create_version, publish_staged_version
 from storage.factory import get_storage_backend
 
 
@@ -28,24 +33,36 @@ class DocumentUploadForm(forms.ModelForm):
 		return cleaned
 
 	def save(self, commit=True):
+		"""
+		Stores the file and records it as the document's next version
+		(documents.services.create_version). With commit=False nothing is
+		stored yet: the unsaved version is returned for the caller to adjust,
+		and a later save() stores the file, allocates the version number and
+		writes that same instance.
+		"""
 		instance = super().save(commit=False)
 		instance.document = self.document
 		instance.uploaded_by = self.user
-
-		# 🧠 Calculate and set the version number BEFORE saving
-		latest = self.document.versions.order_by('-version_number').first()
-		instance.version_number = latest.version_number + 1 if latest else 1
-
-		# 🎯 Save the file using storage backend
-		file = self.cleaned_data['file']
-		file_path = f"documents/{self.document.id}/versions/{instance.version_number}/{file.name}"
-		instance.file = self.storage.save(file, file_path)
-
 		if commit:
-			instance.save()
-
+			create_version(
+				self.document, self.cleaned_data['file'], self.user, instance.notes, self.storage, version=instance
+			)
 		return instance
 
+	async def asave(self):
+		"""save() for async views: the file goes through the backend's async API."""
+		instance = self.save(commit=False)
+		file = self.cleaned_data['file']
+		staging_path = f"uploads/{uuid.uuid4().hex}/{file.name}"
+		await self.storage.asave(file, staging_path)
+		try:
+			return await sync_to_async(publish_staged_version)(
+				self.document, staging_path, file.name, self.user, instance.notes, self.storage, version=instance
+			)
+		except BaseException:
+			await self.storage.adelete(staging_path)
+			raise
+
 
 class CommentForm(forms.ModelForm):
 	"""
@@ -103,16 +120,8 @@ class InitialDocumentUploadForm(forms.ModelForm):
 		document = super().save(commit=False)
 		document.created_by = self.user
 		if commit:
-			document.save()
-			file = self.cleaned_data['file']
-			file_path = f"documents/{document.id}/versions/1/{file.name}"
-			stored_file_path = self.storage.save(file, file_path)
-			DocumentVersion.objects.create(
-				document=document,
-				version_number=1,
-				file=stored_file_path,
-				notes="Initial upload",
-				uploaded_by=self.user
-			)
+			with transaction.atomic():
+				document.save()
+				create_version(document, self.cleaned_data['file'], self.user, "Initial upload", self.storage)
 		return document
 
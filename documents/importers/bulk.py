@@ -0,0 +1,581 @@
+# documents/importers/bulk.py
+
+import itertools
+import logging
+import time
+from collections import Counter
+from contextlib import contextmanager
+
+from django.contrib.auth.models import Permission, User
+from django.contrib.contenttypes.models import ContentType
+from django.db import transaction
+from django.db.models import F, Max, OuterRef, Subquery
+from django.db.models.functions import Coalesce, Greatest
+from django.utils.timezone import now
+from guardian.models import UserObjectPermission
+
+from core import role_cache
+from documents import search
+from documents.models import Document, DocumentVersion
+from documents.services import refresh_version_stats
+from projects.models import Project
+from .downloads import Downloader, import_file_path
+from .models import ImportCheckpoint, SharePointImportLog
+from .readers import CsvSource
+from .sharepoint_import import detect_power_bi_usage, import_row, json_safe_row, map_fields, parse_row, parsed_or_now
+
+"""
+Bulk SharePoint Import
+----------------------
+The row-at-a-time importer (sharepoint_import.import_row) costs a dozen
+queries per row. BulkImporter processes the export in chunks instead:
+
+- users, projects and documents are resolved through in-memory caches that
+  live for the whole import; the misses of a chunk are fetched with one
+  query per model and the rest created with bulk_create
+- versions, guardian permission rows and SharePointImportLog rows are
+  written with one bulk_create each
+- file_urls are downloaded in parallel between the chunk's two short
+  transactions (entities, then versions/permissions/logs)
+- if a chunk's writes fail as a whole, they are rolled back (downloaded
+  files deleted) and the chunk is retried row by row, so one bad row only
+  fails itself
+- re-runs are idempotent: the (project, title, version) of every existing
+  version is loaded into a set once, and rows found in it are skipped
+- import_source() keeps an ImportCheckpoint per export (by content hash),
+  advanced in the same transaction as each chunk's writes, so a crashed
+  import resumes after the last committed chunk
+
+With dry_run=True nothing is written or downloaded: every row is parsed,
+mapped and validated, and checked against the DB with the same set-based
+lookups, so the stats say what an import would create and what already
+exists. Either way `timings` holds the seconds spent per stage (parse, map,
+user, project, document, download, version, ACL, log) for the profile of
+`manage.py sharepoint_import`.
+
+bulk_create skips model signals, so the chunk does their work itself:
+Document version stats and counters, role cache invalidation and search
+indexing (after commit). Content extraction is left to
+`manage.py backfill_content_extraction`.
+"""
+
+logger = logging.getLogger(__name__)
+
+UNKNOWN_USER = 'unknown-import'
+
+ACL_ROLES = {
+    'can_view': 'commenter',
+    'can_edit': 'editor',
+    'is_owner': 'owner',
+}
+
+
+class RowError(ValueError):
+    """A row that cannot be imported; logged as a failed SharePointImportLog."""
+
+
+def prepare_row(mapped):
+    """Validates and normalizes one mapped row in place. Raises RowError."""
+    if not mapped.get('project'):
+        raise RowError("Missing project field in mapped data.")
+    if not mapped.get('title'):
+        raise RowError("Missing document title or project.")
+    try:
+        mapped['version'] = int(mapped.get('version', 1))
+    except (TypeError, ValueError):
+        raise RowError(f"Invalid version number: {mapped.get('version')!r}")
+    mapped['uploaded_by'] = mapped.get('uploaded_by') or UNKNOWN_USER
+    mapped['acl'] = {
+        role: [u.strip() for u in mapped[field].split(',') if u.strip()]
+        for field, role in ACL_ROLES.items() if mapped.get(field)
+    }
+    detect_power_bi_usage(mapped)
+    return mapped
+
+
+class BulkImporter:
+    """
+    Imports SharePoint rows in chunks of `chunk_size`. One instance per
+    import run: its caches assume nobody else renames users or projects
+    meanwhile. `progress`, if given, is called with the importer after
+    every chunk. index=False skips per-document search indexing; run
+    `manage.py rebuild_search_index` afterwards (faster for big imports).
+    file_urls are fetched through a Downloader (documents/importers/downloads.py)
+    unless download=False, in which case versions get a placeholder path.
+    Sources that can produce DataFrames (CSV) are preprocessed column-wise
+    with pandas (importers/frames.py) unless vectorize=False.
+    """
+
+    def __init__(self, chunk_size=1000, progress=None, index=True, download=True, downloader=None, dry_run=False,
+                 vectorize=True):
+        self.chunk_size = chunk_size
+        self.vectorize = vectorize
+        self.progress = progress
+        self.index = index
+        self.download = download and not dry_run
+        self.dry_run = dry_run
+        self._downloader = downloader
+        self._owns_downloader = downloader is None
+        self.users = {}      # username -> id
+        self.projects = {}   # name -> id
+        self.documents = {}  # (project_id, title) -> id
+        self.imported = None  # {(project name, title, version number)} already in the DB
+        self.checkpoint = None
+        self.source = None
+        self.stats = Counter()
+        self.timings = Counter()  # stage -> seconds
+        self.elapsed = 0.0
+        self._started = None
+        self._seconds_before = 0.0  # checkpoint.import_seconds of earlier runs
+        self._permissions = None
+        self._planned_ids = itertools.count(-1, -1)  # stand-in ids for what a dry run would create
+
+    # Entry points
+
+    def import_csv(self, file_path, resume=True):
+        return self.import_source(CsvSource(file_path), resume=resume)
+
+    def import_source(self, source, resume=True, limit=None):
+        """
+        Imports a reader from documents/importers/readers.py with a checkpoint:
+        a re-run of the same export (same content hash) continues after the
+        last committed chunk, unless resume=False. `limit` stops after that
+        many rows (the next run continues from there). Dry runs always read
+        the whole export and leave checkpoints alone.
+        """
+        if self.dry_run:
+            self.source = source
+            self._run_source(source, 0, None, limit)
+            return self.stats
+        checkpoint, _ = ImportCheckpoint.objects.get_or_create(
+            source_hash=source.content_hash(), defaults={'source_path': str(source.path)}
+        )
+        if not resume:
+            checkpoint.rows_done, checkpoint.byte_offset, checkpoint.completed_at = 0, None, None
+            checkpoint.import_seconds = 0
+        checkpoint.source_path = str(source.path)
+        checkpoint.save()
+        self.checkpoint, self.source = checkpoint, source
+        self._seconds_before = checkpoint.import_seconds
+        self.stats['resumed_at_row'] = checkpoint.rows_done
+        self._run_source(source, checkpoint.rows_done, checkpoint.byte_offset, limit)
+        if limit is None or self.stats['rows'] < limit:
+            checkpoint.completed_at = now()
+            checkpoint.rows_total = checkpoint.rows_done
+            checkpoint.save(update_fields=['completed_at', 'rows_total', 'updated_at'])
+        return self.stats
+
+    def _run_source(self, source, start_row, start_offset, limit):
+        if self.vectorize and hasattr(source, 'frames'):
+            from .frames import FRAME_ROWS
+
+            frames = source.frames(start_row=start_row, chunk_size=max(self.chunk_size, FRAME_ROWS), limit=limit)
+            self.run_frames(frames)
+        else:
+            self.run(itertools.islice(source.rows(start_row=start_row, start_offset=start_offset), limit))
+
+    def run(self, rows):
+        """Imports an iterable of raw row dicts; returns the stats Counter."""
+        rows = iter(rows)
+
+        def chunks():
+            while True:
+                with self.stage('parse'):  # reading the export counts as parsing
+                    chunk = list(itertools.islice(rows, self.chunk_size))
+                if not chunk:
+                    return
+                yield chunk
+
+        return self._run(chunks(), self.import_chunk)
+
+    def run_frames(self, frames):
+        """Imports an iterable of all-string DataFrames of raw rows; returns the stats Counter."""
+        from .frames import prepared_batches
+
+        frames = iter(frames)
+
+        def batches():
+            while True:
+                with self.stage('parse'):
+                    frame = next(frames, None)
+                if frame is None:
+                    return
+                with self.stage('map'):
+                    prepared = list(prepared_batches(frame, self.chunk_size))
+                yield from prepared
+
+        return self._run(batches(), self.import_prepared_batch)
+
+    def _run(self, batches, import_batch):
+        started = self._started = time.perf_counter()
+        if self.imported is None:
+            self.imported = self._load_imported_keys()
+        try:
+            for batch in batches:
+                import_batch(batch)
+                self.elapsed = time.perf_counter() - started
+                if self.progress:
+                    self.progress(self)
+        finally:
+            self.close()
+        self.elapsed = time.perf_counter() - started
+        return self.stats
+
+    @contextmanager
+    def stage(self, name):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.timings[name] += time.perf_counter() - started
+
+    @property
+    def downloader(self):
+        if self._downloader is None:
+            self._downloader = Downloader()
+        return self._downloader
+
+    def close(self):
+        """Releases the download pool, unless it was passed in by the caller."""
+        if self._owns_downloader and self._downloader is not None:
+            self._downloader.close()
+            self._downloader = None
+
+    @property
+    def rows_per_second(self):
+        return self.stats['rows'] / self.elapsed if self.elapsed else 0.0
+
+    def report(self):
+        s = self.stats
+        return (
+            f"{s['rows']} rows in {self.elapsed:.1f}s ({self.rows_per_second:.0f} rows/s): "
+            f"{s['imported']} imported, {s['skipped']} already imported, {s['failed']} failed; "
+            f"created {s['users']} users, {s['projects']} projects, {s['documents']} documents, "
+            f"{s['versions']} versions, {s['permissions']} permissions"
+        )
+
+    # Chunk processing
+
+    def import_chunk(self, rows):
+        prepared, failed = [], []
+        with self.stage('parse'):
+            parsed = [parse_row(row) for row in rows]
+        with self.stage('map'):
+            for mapped in map(map_fields, parsed):
+                try:
+                    prepared.append(prepare_row(mapped))
+                except RowError as e:
+                    failed.append((mapped, str(e)))
+        self._import_prepared(len(rows), prepared, failed, lambda: rows)
+
+    def import_prepared_batch(self, batch):
+        """Imports one (raw rows DataFrame, prepared, failed) batch of frames.prepared_batches()."""
+        rows, prepared, failed = batch
+        self._import_prepared(len(rows), prepared, failed, lambda: rows.to_dict('records'))
+
+    def _import_prepared(self, row_count, prepared, failed, raw_rows):
+        """Writes a validated chunk; raw_rows() is only called by the row-by-row fallback."""
+        new = [mapped for mapped in prepared if self._row_key(mapped) not in self.imported]
+        skipped = len(prepared) - len(new)  # imported by an earlier run
+        prepared = new
+        created, files = Counter(skipped=skipped), {}
+        try:
+            with transaction.atomic():
+                created.update(self._resolve(prepared, failed))
+            pending = self._new_versions(prepared, failed)
+            # Downloads run between the two transactions: no locks are held while waiting on the network
+            files, download_errors = self._download(pending)
+            with transaction.atomic():
+                created.update(self._write(pending, failed, files, download_errors))
+                self._advance_checkpoint(row_count)
+        except Exception:
+            if self.dry_run:
+                raise
+            logger.exception("Bulk write failed; importing the chunk row by row")
+            for path in files.values():
+                self.downloader.discard(path)
+            self._forget_cached_ids()
+            if self.checkpoint is not None:
+                self.checkpoint.refresh_from_db()
+            created = Counter()
+            for row in raw_rows():
+                mapped = map_fields(parse_row(row))
+                try:
+                    key = self._row_key(prepare_row(mapped))
+                except RowError:
+                    key = None
+                if key in self.imported:
+                    created['skipped'] += 1
+                elif import_row(row, download=self.download):
+                    created['imported'] += 1
+                    if key:
+                        self.imported.add(key)
+                else:
+                    created['failed'] += 1
+            self._advance_checkpoint(row_count)
+        self.stats['rows'] += row_count
+        self.stats.update(created)
+
+    def _resolve(self, prepared, failed):
+        created = Counter()
+        usernames = {m['uploaded_by'] for m in prepared}
+        usernames.update(u for m in prepared for names in m['acl'].values() for u in names)
+        usernames.update(m.get('uploaded_by') or UNKNOWN_USER for m, _ in failed)
+        with self.stage('user'):
+            created['users'], created['users_existing'] = self._resolve_users(usernames)
+        with self.stage('project'):
+            created['projects'], created['projects_existing'] = self._resolve_projects({m['project'] for m in prepared})
+        with self.stage('document'):
+            created['documents'], created['documents_existing'] = self._resolve_documents(prepared)
+        return created
+
+    def _new_versions(self, prepared, failed):
+        """[(mapped, document_id)] for the chunk's new versions; repeats within the chunk go to `failed`."""
+        with self.stage('version'):
+            return self._pending_versions(prepared, failed)
+
+    def _pending_versions(self, prepared, failed):
+        seen, pending = set(), []
+        for mapped in prepared:
+            key = self._row_key(mapped)
+            if key in seen:
+                failed.append((mapped, f"Version {mapped['version']} appears twice for this document."))
+                continue
+            seen.add(key)
+            pending.append((mapped, self.documents[self._document_key(mapped)]))
+        return pending
+
+    def _download(self, pending):
+        """Fetches the rows' file_urls in parallel: ({index: path}, {index: error})."""
+        jobs = {
+            i: (mapped['file_url'], import_file_path(document_id, mapped['version'], mapped['file_url']))
+            for i, (mapped, document_id) in enumerate(pending) if mapped.get('file_url')
+        }
+        if not self.download or not jobs:
+            return {}, {}
+        with self.stage('download'):
+            results = self.downloader.fetch_many(jobs)
+        files = {i: path for i, (path, error) in results.items() if path}
+        errors = {i: error for i, (path, error) in results.items() if error}
+        return files, errors
+
+    def _write(self, pending, failed, files, download_errors):
+        created = Counter()
+        with self.stage('version'):
+            versions, written = [], []
+            for i, (mapped, document_id) in enumerate(pending):
+                if i in download_errors:
+                    failed.append((mapped, download_errors[i]))
+                    continue
+                written.append((mapped, document_id))
+                versions.append(DocumentVersion(
+                    document_id=document_id,
+                    version_number=mapped['version'],
+                    file=files.get(i, "mock/path/or/blob"),  # placeholder when there is nothing to fetch
+                    notes=mapped.get('notes', ''),
+                    uploaded_by_id=self.users[mapped['uploaded_by']],
+                    uploaded_at=parsed_or_now(mapped.get('uploaded_at')),
+                ))
+            touched = {v.document_id for v in versions}
+            if not self.dry_run:
+                DocumentVersion.objects.bulk_create(versions, batch_size=500)
+                self._refresh_documents(touched)
+            created['versions'] = len(versions)
+
+        with self.stage('acl'):
+            permissions, acl_pairs = [], set()
+            existing = set(
+                UserObjectPermission.objects.filter(
+                    content_type_id=self.permissions['content_type'],
+                    object_pk__in=[str(d) for d in touched if d > 0],
+                ).values_list('user_id', 'permission_id', 'object_pk')
+            )
+            created['permissions_existing'] = len(existing)
+            granted = set(existing)
+            for mapped, document_id in written:
+                for role, names in mapped['acl'].items():
+                    for name in names:
+                        grant = (self.users[name], self.permissions[role], str(document_id))
+                        if grant in granted:
+                            continue  # granted before, or by an earlier row of this import
+                        granted.add(grant)
+                        permissions.append(UserObjectPermission(
+                            user_id=grant[0], permission_id=grant[1],
+                            content_type_id=self.permissions['content_type'], object_pk=grant[2],
+                        ))
+                        acl_pairs.add((grant[0], document_id))
+            if not self.dry_run:
+                UserObjectPermission.objects.bulk_create(permissions, batch_size=500)
+            created['permissions'] = len(permissions)
+
+        with self.stage('log'):
+            logs = [self._log(mapped, success=True) for mapped, _ in written]
+            logs += [self._log(mapped, success=False, error=error) for mapped, error in failed]
+            if not self.dry_run:
+                SharePointImportLog.objects.bulk_create(logs, batch_size=500)
+            created['logs'] = len(logs)
+
+        created['imported'] = len(versions)
+        created['failed'] = len(failed)
+        keys = [self._row_key(mapped) for mapped, _ in written]
+        transaction.on_commit(lambda: self.imported.update(keys))
+        if not self.dry_run:
+            transaction.on_commit(lambda: role_cache.invalidate_documents(acl_pairs))
+            if self.index:
+                transaction.on_commit(lambda: self._reindex(touched))
+        return created
+
+    def _log(self, mapped, success, error=""):
+        project_id = self.projects.get(mapped.get('project'))
+        return SharePointImportLog(
+            title=(mapped.get('title') or '')[:255],
+            project_id=project_id,
+            user_id=self.users.get(mapped.get('uploaded_by') or UNKNOWN_USER),
+            success=success,
+            error_detail=error,
+            detected_powerbi=mapped.get('powerbi_detected', False),
+            source_site=mapped.get('source_site', ''),
+            source_list=mapped.get('source_list', ''),
+            raw_row=json_safe_row(mapped),
+        )
+
+    # Lookups: one SELECT for the cache misses, one INSERT for what is still missing.
+    # Each returns (created, found in the DB); a dry run plans negative ids instead of inserting.
+
+    def _resolve_users(self, usernames):
+        missing = {u for u in usernames if u not in self.users}
+        if not missing:
+            return 0, 0
+        found = dict(User.objects.filter(username__in=missing).values_list('username', 'id'))
+        self.users.update(found)
+        new = [User(username=u) for u in missing if u not in self.users]
+        if self.dry_run:
+            self.users.update((u.username, next(self._planned_ids)) for u in new)
+        elif new:
+            # ignore_conflicts: a concurrent import may create the same user first
+            User.objects.bulk_create(new, batch_size=500, ignore_conflicts=True)
+            self.users.update(User.objects.filter(username__in=[u.username for u in new]).values_list('username', 'id'))
+        return len(new), len(found)
+
+    def _resolve_projects(self, names):
+        missing = {n for n in names if n not in self.projects}
+        if not missing:
+            return 0, 0
+        found = dict(Project.objects.filter(name__in=missing).values_list('name', 'id'))
+        self.projects.update(found)
+        new = [Project(name=n) for n in missing if n not in self.projects]
+        if self.dry_run:
+            self.projects.update((p.name, next(self._planned_ids)) for p in new)
+        elif new:
+            Project.objects.bulk_create(new, batch_size=500, ignore_conflicts=True)
+            self.projects.update(Project.objects.filter(name__in=[p.name for p in new]).values_list('name', 'id'))
+        return len(new), len(found)
+
+    @staticmethod
+    def _row_key(mapped):
+        return mapped['project'], mapped['title'], mapped['version']
+
+    @staticmethod
+    def _load_imported_keys():
+        """Every (project name, title, version number) in the DB: one streamed query, then set lookups."""
+        return set(
+            DocumentVersion.objects.order_by()
+            .values_list('document__project__name', 'document__title', 'version_number')
+            .iterator(chunk_size=10000)
+        )
+
+    def _advance_checkpoint(self, rows):
+        if self.checkpoint is None:
+            return
+        self.checkpoint.rows_done += rows
+        self.checkpoint.byte_offset = getattr(self.source, 'offset', None)
+        self.checkpoint.import_seconds = self._seconds_before + time.perf_counter() - self._started
+        self.checkpoint.save(update_fields=['rows_done', 'byte_offset', 'import_seconds', 'updated_at'])
+
+    def _document_key(self, mapped):
+        return self.projects[mapped['project']], mapped['title']
+
+    def _resolve_documents(self, prepared):
+        missing = {}
+        for mapped in prepared:
+            key = self._document_key(mapped)
+            if key not in self.documents:
+                missing.setdefault(key, mapped)  # the first row of a document supplies its fields
+        if not missing:
+            return 0, 0
+        found = Document.objects.filter(
+            project_id__in={p for p, _ in missing if p > 0}, title__in={t for _, t in missing}
+        ).order_by('id').values_list('project_id', 'title', 'id')
+        for project_id, title, document_id in found:
+            if (project_id, title) in missing:
+                self.documents.setdefault((project_id, title), document_id)
+        existing = sum(1 for key in missing if key in self.documents)
+        new = [
+            Document(
+                project_id=project_id,
+                title=title,
+                description=mapped.get('notes', ''),
+                created_by_id=self.users[mapped['uploaded_by']],
+            )
+            for (project_id, title), mapped in missing.items() if (project_id, title) not in self.documents
+        ]
+        if self.dry_run:
+            self.documents.update(((d.project_id, d.title), next(self._planned_ids)) for d in new)
+        elif new:
+            Document.objects.bulk_create(new, batch_size=500)
+            if any(d.pk is None for d in new):
+                # Backends without INSERT ... RETURNING: read the ids back
+                new_keys = {(d.project_id, d.title) for d in new}
+                for project_id, title, document_id in Document.objects.filter(
+                    project_id__in={p for p, _ in new_keys}, title__in={t for _, t in new_keys}
+                ).order_by('-id').values_list('project_id', 'title', 'id'):
+                    if (project_id, title) in new_keys:
+                        self.documents.setdefault((project_id, title), document_id)
+            else:
+                self.documents.update({(d.project_id, d.title): d.pk for d in new})
+        return len(new), existing
+
+    @property
+    def permissions(self):
+        """Permission ids of the three document roles, plus the Document content type id."""
+        if self._permissions is None:
+            content_type = ContentType.objects.get_for_model(Document)
+            codenames = {f'{role}_document': role for role in ACL_ROLES.values()}
+            self._permissions = {
+                codenames[codename]: pk
+                for codename, pk in Permission.objects.filter(
+                    content_type=content_type, codename__in=codenames
+                ).values_list('codename', 'id')
+            }
+            self._permissions['content_type'] = content_type.id
+        return self._permissions
+
+    def _forget_cached_ids(self):
+        # After a rollback, ids created inside the failed transaction no longer exist
+        self.users.clear()
+        self.projects.clear()
+        self.documents.clear()
+
+    def _refresh_documents(self, document_ids):
+        """What the DocumentVersion signals would have done: stats and the version counter."""
+        if not document_ids:
+            return
+        highest = (
+            DocumentVersion.objects.filter(document_id=OuterRef('pk'))
+            .order_by()
+            .values('document_id')
+            .annotate(highest=Max('version_number'))
+            .values('highest')
+        )
+        refresh_version_stats(document_ids)
+        Document.objects.filter(pk__in=document_ids).update(
+            last_version_number=Greatest(F('last_version_number'), Coalesce(Subquery(highest), 0))
+        )
+
+    @staticmethod
+    def _reindex(document_ids):
+        for document_id in sorted(document_ids):
+            try:
+                search.index_document(document_id)
+            except Exception:
+                logger.exception("Could not index imported document %s", document_id)
@@ -0,0 +1,180 @@
+# documents/importers/downloads.py
+
+import logging
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import PurePosixPath
+from urllib.parse import unquote, urlsplit
+
+import requests
+from django.conf import settings
+from django.db import close_old_connections
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from storage.factory import get_storage_backend
+
+"""
+Import File Downloads
+---------------------
+Fetches SharePoint `file_url`s for the importer.
+
+- One requests.Session per Downloader, with a keep-alive pool sized to the
+  worker count; 429/5xx responses are retried by urllib3 with exponential
+  backoff (honouring Retry-After), dropped connections mid-body by us.
+- A bounded thread pool runs IMPORT_DOWNLOAD_WORKERS downloads at once, at
+  most IMPORT_DOWNLOAD_PER_HOST of them against the same host.
+- Response bodies are streamed chunk by chunk into the storage backend: no
+  temp files, constant memory per download. A failed download deletes
+  whatever part of the file was written.
+
+Point it at a local HTTP server (e.g. `python -m http.server`) to test
+without SharePoint.
+"""
+
+logger = logging.getLogger(__name__)
+
+CHUNK_SIZE = 1024 * 1024
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+
+def filename_from_url(url) -> str:
+    return PurePosixPath(unquote(urlsplit(url).path)).name or "download"
+
+
+def import_file_path(document_id, version_number, url) -> str:
+    """Where an imported version's file goes; unique, so a failed import only ever deletes its own files."""
+    return f"documents/{document_id}/versions/{version_number}/{uuid.uuid4().hex[:8]}-{filename_from_url(url)}"
+
+
+class _ResponseFile:
+    """Just enough of a Django File over a streamed response for StorageBackend.save()."""
+
+    def __init__(self, response, name):
+        self.name = name
+        self.size = int(response.headers["Content-Length"]) if "Content-Length" in response.headers else None
+        self._chunks = response.iter_content(CHUNK_SIZE)
+        self._buffer = b""
+
+    def chunks(self, chunk_size=None):
+        yield from self._chunks
+
+    def read(self, size=-1):
+        while size < 0 or len(self._buffer) < size:
+            try:
+                self._buffer += next(self._chunks)
+            except StopIteration:
+                break
+        if size < 0:
+            data, self._buffer = self._buffer, b""
+        else:
+            data, self._buffer = self._buffer[:size], self._buffer[size:]
+        return data
+
+
+class Downloader:
+    """
+    Streams URLs into storage. Use as a context manager (or call close())
+    so the worker threads and pooled connections are released.
+    """
+
+    def __init__(self, storage=None, workers=None, per_host=None, retries=None, backoff=None, timeout=None, session=None):
+        self.storage = storage or get_storage_backend()
+        self.workers = workers or getattr(settings, "IMPORT_DOWNLOAD_WORKERS", 8)
+        self.per_host = per_host or getattr(settings, "IMPORT_DOWNLOAD_PER_HOST", 4)
+        self.retries = getattr(settings, "IMPORT_DOWNLOAD_RETRIES", 3) if retries is None else retries
+        self.backoff = getattr(settings, "IMPORT_DOWNLOAD_BACKOFF", 0.5) if backoff is None else backoff
+        self.timeout = timeout or getattr(settings, "IMPORT_DOWNLOAD_TIMEOUT", 60)
+        self.session = session or self._new_session()
+        self._pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="import-download")
+        self._hosts = {}
+        self._hosts_lock = threading.Lock()
+
+    def _new_session(self):
+        retry = Retry(
+            total=self.retries,
+            connect=self.retries,
+            read=0,  # a dropped body is retried in fetch(), where the partial file can be discarded
+            status=self.retries,
+            status_forcelist=RETRY_STATUSES,
+            allowed_methods=frozenset({"GET"}),
+            backoff_factor=self.backoff,
+            respect_retry_after_header=True,
+            raise_on_status=False,
+        )
+        adapter = HTTPAdapter(pool_connections=self.workers, pool_maxsize=self.workers, max_retries=retry)
+        session = requests.Session()
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        return session
+
+    def _host_slot(self, url):
+        host = urlsplit(url).netloc.lower()
+        with self._hosts_lock:
+            if host not in self._hosts:
+                self._hosts[host] = threading.BoundedSemaphore(self.per_host)
+            return self._hosts[host]
+
+    def fetch(self, url, path) -> str:
+        """Downloads `url` into storage at `path` (blocking). Raises on failure."""
+        attempt = 0
+        while True:
+            try:
+                with self._host_slot(url):
+                    # Connection failures and 429/5xx were already retried by urllib3 here
+                    with self.session.get(url, stream=True, timeout=self.timeout) as response:
+                        response.raise_for_status()
+                        try:
+                            return self.storage.save(_ResponseFile(response, filename_from_url(url)), path)
+                        except (requests.exceptions.ChunkedEncodingError, requests.ConnectionError, requests.Timeout) as e:
+                            # A truncated or dropped body (ChunkedEncodingError) or a read timeout midway
+                            interrupted = e
+            except BaseException:
+                self.discard(path)
+                raise
+            self.discard(path)
+            if attempt >= self.retries:
+                raise interrupted
+            delay = self.backoff * 2 ** attempt
+            logger.info("Retrying %s in %.1fs after %s", url, delay, interrupted)
+            time.sleep(delay)
+            attempt += 1
+
+    def _fetch_in_worker(self, url, path):
+        try:
+            return self.fetch(url, path)
+        finally:
+            # Storage backends may touch the database (content-addressed storage)
+            close_old_connections()
+
+    def fetch_many(self, jobs) -> dict:
+        """
+        Downloads {key: (url, path)} in parallel. Returns {key: (path, None)}
+        for successes and {key: (None, error message)} for failures.
+        """
+        futures = {key: self._pool.submit(self._fetch_in_worker, url, path) for key, (url, path) in jobs.items()}
+        results = {}
+        for key, future in futures.items():
+            try:
+                results[key] = (future.result(), None)
+            except Exception as e:
+                results[key] = (None, f"Download failed: {e}")
+        return results
+
+    def discard(self, path) -> None:
+        try:
+            self.storage.delete(path)
+        except Exception:
+            pass  # nothing was written, or the backend cannot tell
+
+    def close(self):
+        self._pool.shutdown(wait=True)
+        self.session.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
@@ -20,3 +20,19 @@ class SharePointImportLog(models.Model):
 
     def __str__(self):
         return f"[{self.timestamp}] {self.title} (Success={self.success})"
+
+
+class ImportCheckpoint(models.Model):
+    """How far an import of one export got, so a crashed run can resume (see importers/bulk.py)."""
+    source_hash = models.CharField(max_length=64, unique=True)  # SHA-256 of the export file
+    source_path = models.CharField(max_length=1024)
+    rows_done = models.PositiveBigIntegerField(default=0)
+    byte_offset = models.PositiveBigIntegerField(null=True, blank=True)  # where row rows_done+1 starts, if known
+    rows_total = models.PositiveBigIntegerField(null=True, blank=True)  # rows in the export, once a run completed it
+    import_seconds = models.FloatField(default=0)  # time spent importing, summed over resumed runs (not idle time between them)
+    started_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    completed_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"{self.source_path} @ row {self.rows_done}{' (done)' if self.completed_at else ''}"
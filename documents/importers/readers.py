@@ -0,0 +1,360 @@
+# documents/importers/readers.py
+
+import csv
+import datetime
+import hashlib
+import itertools
+import json
+import re
+from pathlib import Path
+
+"""
+Import Sources
+--------------
+Readers that turn a SharePoint export into an iterator of raw row dicts
+(header -> cell text), the input of parse_row/map_fields.
+
+Each source can say where it is, so an import can be checkpointed and
+resumed (see ImportCheckpoint):
+
+- content_hash(): SHA-256 of the file, identifying the export (computed
+  once per source object)
+- rows(start_row, start_offset): rows from a position on
+- offset: after a row has been yielded, where the next one starts
+  (a byte offset for CSV, None where only row numbers make sense)
+
+All of them stream: memory stays constant in the number of rows (XLSX is
+parsed with openpyxl's read-only mode, JSON pages item by item with
+JsonArrayReader).
+"""
+
+HASH_CHUNK_SIZE = 1024 * 1024
+JSON_READ_SIZE = 1024 * 1024
+
+# SharePoint encodes characters in internal column names, e.g. Project_x0020_Name
+ENCODED_CHAR_RE = re.compile(r'_x([0-9a-fA-F]{4})_')
+
+# Graph list item fields that have an export-header equivalent
+GRAPH_FIELD_HEADERS = {
+    'FileLeafRef': 'Document Name',
+    'LinkFilename': 'Document Name',
+    '_ModerationComments': 'Description',
+}
+
+
+def scan_file(path) -> tuple[str, int]:
+    """SHA-256 and newline count of a file, in one pass."""
+    digest, lines = hashlib.sha256(), 0
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b''):
+            digest.update(chunk)
+            lines += chunk.count(b'\n')
+    return digest.hexdigest(), lines
+
+
+def file_sha256(path) -> str:
+    return scan_file(path)[0]
+
+
+class CsvSource:
+    """
+    A UTF-8 CSV export. The file is read in binary and decoded line by line
+    so the byte offset of every row boundary is known; resuming seeks
+    straight there instead of re-reading the rows already imported.
+    """
+
+    def __init__(self, path, encoding='utf-8'):
+        self.path = str(path)
+        self.encoding = encoding
+        self.offset = 0
+        self._hash = None
+        self._lines_total = None
+
+    def content_hash(self) -> str:
+        if self._hash is None:
+            self._hash, self._lines_total = scan_file(self.path)
+        return self._hash
+
+    def approximate_rows(self) -> int:
+        """Line count minus the header, from the hashing pass (cells with line breaks make it an overestimate)."""
+        self.content_hash()
+        return max(self._lines_total - 1, 0)
+
+    def _lines(self, f):
+        for line in f:
+            self.offset += len(line)
+            yield line.decode(self.encoding)
+
+    def rows(self, start_row=0, start_offset=None):
+        with open(self.path, 'rb') as f:
+            self.offset = 0
+            lines = self._lines(f)
+            header = next(csv.reader(lines), None)
+            if header is None:
+                return
+            header[0] = header[0].lstrip('﻿')  # BOM written by Excel
+            if start_offset:
+                f.seek(start_offset)
+                self.offset = start_offset
+                start_row = 0
+            reader = csv.DictReader(lines, fieldnames=header)
+            yield from itertools.islice(reader, start_row, None)
+
+    def frames(self, start_row=0, chunk_size=1000, limit=None):
+        """
+        The same rows as all-string pandas DataFrames of `chunk_size` rows
+        (see importers/frames.py). pandas reads ahead, so positions are row
+        numbers only: offset stays None.
+        """
+        import pandas as pd
+
+        self.offset = None
+        try:
+            reader = pd.read_csv(
+                self.path,
+                dtype=str,
+                keep_default_na=False,
+                encoding='utf-8-sig' if self.encoding == 'utf-8' else self.encoding,
+                skiprows=range(1, start_row + 1),
+                nrows=limit,
+                chunksize=chunk_size,
+            )
+        except pd.errors.EmptyDataError:
+            return
+        with reader:
+            yield from reader
+
+
+def cell_text(value) -> str:
+    """A spreadsheet/JSON value as the text a CSV export would hold."""
+    if value is None:
+        return ''
+    if isinstance(value, bool):
+        return 'TRUE' if value else 'FALSE'
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    if isinstance(value, (datetime.datetime, datetime.date)):
+        return value.isoformat()
+    return str(value)
+
+
+class XlsxSource:
+    """
+    One worksheet of an Excel export (the active one unless `sheet` is
+    given). The header is the first non-empty row.
+    """
+
+    def __init__(self, path, sheet=None):
+        self.path = str(path)
+        self.sheet = sheet
+        self.offset = None
+        self._hash = None
+
+    def content_hash(self) -> str:
+        if self._hash is None:
+            self._hash = file_sha256(self.path)
+        return self._hash
+
+    def rows(self, start_row=0, start_offset=None):
+        from openpyxl import load_workbook
+
+        workbook = load_workbook(self.path, read_only=True, data_only=True)
+        try:
+            worksheet = workbook[self.sheet] if self.sheet else workbook.active
+            values = worksheet.iter_rows(values_only=True)
+            header = None
+            for cells in values:
+                if any(c is not None for c in cells):
+                    header = [cell_text(c).strip() for c in cells]
+                    break
+            if header is None:
+                return
+            for cells in itertools.islice(values, start_row, None):
+                yield {name: cell_text(c) for name, c in zip(header, cells) if name}
+        finally:
+            workbook.close()  # read-only workbooks keep the file open until closed
+
+
+class JsonArrayReader:
+    """
+    Reads the items of a JSON array one at a time from a text file, holding
+    only the current item (plus one read block) in memory. Each item is
+    decoded with json's raw_decode; the scanner only steps over the
+    punctuation between them.
+    """
+
+    decoder = json.JSONDecoder()
+
+    def __init__(self, f):
+        self.f = f
+        self.buffer = ''
+        self.pos = 0
+        self.eof = False
+
+    def _fill(self) -> bool:
+        if self.eof:
+            return False
+        chunk = self.f.read(JSON_READ_SIZE)
+        if not chunk:
+            self.eof = True
+            return False
+        self.buffer = self.buffer[self.pos:] + chunk
+        self.pos = 0
+        return True
+
+    def peek(self) -> str:
+        """The next non-whitespace character, '' at the end of the file."""
+        while True:
+            while self.pos < len(self.buffer) and self.buffer[self.pos] in ' \t\r\n':
+                self.pos += 1
+            if self.pos < len(self.buffer):
+                return self.buffer[self.pos]
+            if not self._fill():
+                return ''
+
+    def expect(self, chars) -> str:
+        char = self.peek()
+        if not char or char not in chars:
+            raise ValueError(f"Invalid JSON: expected one of {chars!r}, found {char or 'end of file'!r}")
+        self.pos += 1
+        return char
+
+    def value(self):
+        """Decodes the next complete JSON value."""
+        self.peek()
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buffer, self.pos)
+            except json.JSONDecodeError:
+                if self._fill():
+                    continue  # cut off by the end of the block
+                raise
+            if end == len(self.buffer) and self._fill():
+                continue  # a number may go on in the next block
+            self.pos = end
+            return value
+
+    def array(self):
+        """Yields the items of the array starting at the current position."""
+        self.expect('[')
+        if self.peek() == ']':
+            self.pos += 1
+            return
+        while True:
+            yield self.value()
+            if self.expect(',]') == ']':
+                return
+
+    def page_items(self):
+        """Items of a Graph page: the `value` array of a response object, or a bare list."""
+        if self.peek() == '[':
+            yield from self.array()
+            return
+        self.expect('{')
+        if self.peek() == '}':
+            return
+        while True:
+            key = self.value()
+            self.expect(':')
+            if key == 'value' and self.peek() == '[':
+                yield from self.array()
+            else:
+                self.value()  # @odata.context, @odata.nextLink, ...
+            if self.expect(',}') == '}':
+                return
+
+
+class GraphJsonSource:
+    """
+    Microsoft Graph list item exports: a single .json page, a directory of
+    page files (read in name order), or a .jsonl file with one item per
+    line. A page is either a Graph response ({"value": [...], ...}) or a
+    plain list of items.
+
+    Item `fields` are flattened into export headers (internal names such as
+    Project_x0020_Name are decoded to "Project Name"); the item's file name,
+    creation time, author and download URL fill in Document Name, Upload
+    Date, Uploaded By and File URL when the fields do not have them.
+    """
+
+    def __init__(self, path):
+        self.path = str(path)
+        self.offset = None
+        self._hash = None
+
+    def _files(self):
+        path = Path(self.path)
+        if path.is_dir():
+            return sorted(p for p in path.iterdir() if p.suffix in ('.json', '.jsonl'))
+        return [path]
+
+    def content_hash(self) -> str:
+        if self._hash is None:
+            digest = hashlib.sha256()
+            for path in self._files():
+                digest.update(path.name.encode() + b'\0' + file_sha256(path).encode())
+            self._hash = digest.hexdigest()
+        return self._hash
+
+    def _items(self):
+        for path in self._files():
+            if path.suffix == '.jsonl':
+                with open(path, encoding='utf-8') as f:
+                    for line in f:
+                        if line.strip():
+                            yield json.loads(line)
+                continue
+            with open(path, encoding='utf-8') as f:
+                yield from JsonArrayReader(f).page_items()
+
+    def rows(self, start_row=0, start_offset=None):
+        for item in itertools.islice(self._items(), start_row, None):
+            yield graph_item_row(item)
+
+
+def graph_item_row(item) -> dict:
+    """Flattens one Graph listItem (or a bare fields dict) into an export row."""
+    fields = item.get('fields', item)
+    row = {}
+    for name, value in fields.items():
+        if name.startswith('@odata'):
+            continue
+        header = GRAPH_FIELD_HEADERS.get(name) or ENCODED_CHAR_RE.sub(lambda m: chr(int(m.group(1), 16)), name)
+        if isinstance(value, list):
+            value = ', '.join(_person_or_lookup(v) for v in value)
+        elif isinstance(value, dict):
+            value = _person_or_lookup(value)
+        row.setdefault(header, cell_text(value))
+    drive_item = item.get('driveItem') or {}
+    author = (item.get('createdBy') or {}).get('user') or {}
+    defaults = {
+        'Document Name': drive_item.get('name') or fields.get('Title'),
+        'Upload Date': item.get('createdDateTime'),
+        'Uploaded By': author.get('email') or author.get('displayName'),
+        'File URL': drive_item.get('@microsoft.graph.downloadUrl') or item.get('webUrl'),
+    }
+    for header, value in defaults.items():
+        if not row.get(header) and value:
+            row[header] = cell_text(value)
+    return row
+
+
+def _person_or_lookup(value) -> str:
+    if isinstance(value, dict):
+        for key in ('Email', 'email', 'LookupValue', 'displayName', 'Label'):
+            if value.get(key):
+                return str(value[key])
+        return ''
+    return cell_text(value)
+
+
+def open_source(path, **options):
+    """The reader for an export file, by extension (a directory is read as Graph JSON pages)."""
+    suffix = Path(path).suffix.lower()
+    if suffix == '.csv':
+        return CsvSource(path, **options)
+    if suffix in ('.xlsx', '.xlsm'):
+        return XlsxSource(path, **options)
+    if suffix in ('.json', '.jsonl') or Path(path).is_dir():
+        return GraphJsonSource(path)
+    raise ValueError(f"Unsupported export format: {path}")
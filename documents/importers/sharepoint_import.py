@@ -5,10 +5,14 @@ from django.contrib.auth.models import User
 from documents.models import Document, DocumentVersion
 from django.utils.timezone import now
 from guardian.shortcuts import assign_perm
-import tempfile
-import requests
-from django.core.files import File
+import logging
+import threading
+from core import role_cache
+from .downloads import Downloader, import_file_path
 from .models import SharePointImportLog
+from .readers import open_source
+
+logger = logging.getLogger(__name__)
 
 
 """
@@ -30,8 +34,8 @@ From PowerShell, Excel, or Microsoft Graph API
 Usually in CSV or Excel format
 What happens when you run it:
 
-python manage.py runscript sharepoint_import
-# or call import_from_csv("/path/to/export.csv")
+python manage.py sharepoint_import /path/to/export.csv [--dry-run]
+# or call import_from_csv("/path/to/export.csv") / import_from_file(...)
 
 Internally, it:
 Reads the exported CSV file
@@ -95,25 +99,58 @@ View config			❌		❌			✅
 import csv
 from pathlib import Path
 
-def import_from_csv(file_path):
-    """Main entry point: takes a SharePoint-exported CSV and ingests rows."""
+def import_from_csv(file_path, bulk=False, chunk_size=1000, download=True):
+    """
+    Main entry point: takes a SharePoint-exported CSV and ingests rows.
+
+    With bulk=True rows go through documents.importers.bulk.BulkImporter
+    (chunked, batched inserts); the returned stats include rows/second.
+    """
     if not Path(file_path).exists():
         raise FileNotFoundError(f"CSV file not found: {file_path}")
 
+    if bulk:
+        from .bulk import BulkImporter
+        return BulkImporter(chunk_size=chunk_size, download=download).import_csv(file_path)
+
     with open(file_path, newline='', encoding='utf-8') as f:
         reader = csv.DictReader(f)
         for i, row in enumerate(reader, start=1):
-            try:
-                parsed = parse_row(row)
-                mapped = map_fields(parsed)
-                create_project_if_needed(mapped)
-                create_document(mapped)
-                create_document_version(mapped)
-                assign_permissions_from_acl(mapped)
-                detect_power_bi_usage(mapped)
-                record_import_event(mapped, success=True)
-            except Exception as e:
-                record_import_event(row, success=False, errors=str(e))
+            import_row(row, download=download)
+
+
+def import_from_file(file_path, bulk=True, chunk_size=1000, download=True, **reader_options):
+    """
+    Ingests a CSV, Excel (.xlsx) or Graph API JSON export, picked by extension
+    (see documents/importers/readers.py); reader_options e.g. sheet="Documents".
+    """
+    if not Path(file_path).exists():
+        raise FileNotFoundError(f"Export not found: {file_path}")
+
+    source = open_source(file_path, **reader_options)
+    if bulk:
+        from .bulk import BulkImporter
+        return BulkImporter(chunk_size=chunk_size, download=download).import_source(source)
+
+    for row in source.rows():
+        import_row(row, download=download)
+
+
+def import_row(row, download=True):
+    """Imports one raw row, one query at a time; returns True on success."""
+    try:
+        parsed = parse_row(row)
+        mapped = map_fields(parsed)
+        create_project_if_needed(mapped)
+        create_document(mapped)
+        create_document_version(mapped, download=download)
+        assign_permissions_from_acl(mapped)
+        detect_power_bi_usage(mapped)
+        record_import_event(mapped, success=True)
+        return True
+    except Exception as e:
+        record_import_event(row, success=False, errors=str(e))
+        return False
 
 
 def parse_row(row):
@@ -136,7 +173,12 @@ DEFAULT_FIELD_MAP = {
     'file_url': 'file_url',
     'version': 'version',
     'tags': 'tags',
-    'powerbi_flag': 'powerbi'
+    'powerbi_flag': 'powerbi',
+    'can_view': 'can_view',
+    'can_edit': 'can_edit',
+    'is_owner': 'is_owner',
+    'source_site': 'source_site',
+    'source_list': 'source_list',
 }
 
 
@@ -178,15 +220,16 @@ def create_document(mapped_fields):
     mapped_fields['document_obj'] = doc
 
 
-def create_document_version(mapped_fields, file_blob=None):
-    """Attach a versioned file to the document. Optionally pass a file handle."""
+def create_document_version(mapped_fields, file_blob=None, download=True):
+    """Attach a versioned file to the document. Optionally pass a stored file path."""
     doc = mapped_fields.get('document_obj')
     if not doc:
         raise ValueError("Missing document reference for versioning.")
 
     version_number = int(mapped_fields.get('version', 1))
     file_url = mapped_fields.get('file_url')
-    file_blob = download_file(file_url) if file_url else None
+    if file_blob is None and file_url and download:
+        file_blob = download_file(file_url, import_file_path(doc.id, version_number, file_url))
 
     DocumentVersion.objects.create(
         document=doc,
@@ -233,6 +276,10 @@ def assign_permissions_from_acl(mapped_fields):
         for username in usernames:
             user = get_or_stub_user(username)
             assign_perm(f'documents.{role}_document', user, doc)
+            role_cache.invalidate_document(user, doc)
+
+
+POWERBI_INDICATORS = ['bi', 'dashboard', 'powerbi', 'kpi']
 
 
 def detect_power_bi_usage(mapped_fields):
@@ -241,8 +288,7 @@ def detect_power_bi_usage(mapped_fields):
     notes = mapped_fields.get('notes', '').lower()
     powerbi_flag = mapped_fields.get('powerbi', '').lower()
 
-    indicators = ['bi', 'dashboard', 'powerbi', 'kpi']
-    found = any(ind in tags or ind in notes or ind in powerbi_flag for ind in indicators)
+    found = any(ind in tags or ind in notes or ind in powerbi_flag for ind in POWERBI_INDICATORS)
 
     if found:
         mapped_fields['powerbi_detected'] = True
@@ -251,7 +297,7 @@ def detect_power_bi_usage(mapped_fields):
 def record_import_event(mapped_fields, success=True, errors=None):
     """Store a log of the import event, outcome, and metadata for traceability."""
     SharePointImportLog.objects.create(
-        title=mapped_fields.get('title'),
+        title=mapped_fields.get('title') or '',
         project=mapped_fields.get('project_obj'),
         user=get_or_stub_user(mapped_fields.get('uploaded_by')),
         success=success,
@@ -259,24 +305,31 @@ def record_import_event(mapped_fields, success=True, errors=None):
         detected_powerbi=mapped_fields.get('powerbi_detected', False),
         source_site=mapped_fields.get('source_site', ''),
         source_list=mapped_fields.get('source_list', ''),
-        raw_row=mapped_fields  # Preserve everything
+        raw_row=json_safe_row(mapped_fields)  # Preserve everything
     )
 
-DOWNLOAD_ENABLED = True  # Toggle this off for dry run
 
-def download_file(url):
-    """Download a file from SharePoint or external storage."""
-    if not DOWNLOAD_ENABLED:
-        return None
+def json_safe_row(mapped_fields):
+    """The row without the model objects attached during import (they are not JSON)."""
+    return {k: v for k, v in mapped_fields.items() if not k.endswith('_obj')}
 
+def download_file(url, path):
+    """Stream a file from SharePoint or external storage into storage at `path`; returns the path."""
     try:
-        response = requests.get(url, stream=True)
-        response.raise_for_status()
-        temp = tempfile.NamedTemporaryFile(delete=False)
-        for chunk in response.iter_content(1024 * 1024):
-            temp.write(chunk)
-        temp.seek(0)
-        return File(temp, name=Path(url).name)
+        return get_downloader().fetch(url, path)
     except Exception as e:
-        print(f"Download failed: {e}")
+        logger.warning("Download failed: %s: %s", url, e)
         return None
+
+
+_downloader = None
+_downloader_lock = threading.Lock()
+
+
+def get_downloader():
+    """Process-wide Downloader for the row-by-row path (pooled session, retries)."""
+    global _downloader
+    with _downloader_lock:
+        if _downloader is None:
+            _downloader = Downloader()
+        return _downloader
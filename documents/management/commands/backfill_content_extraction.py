@@ -0,0 +1,55 @@
+# documents/management/commands/backfill_content_extraction.py
+
+from concurrent.futures import ThreadPoolExecutor
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+from documents.models import DocumentVersion
+from documents.tasks import extract_version_batch
+
+
+def _run_batch_inline(version_ids):
+    try:
+        # No Celery time limits in this process: stop each file at the same budget instead
+        return extract_version_batch(version_ids, time_limit=getattr(settings, "CONTENT_EXTRACTION_TIME_LIMIT", 120))
+    finally:
+        close_old_connections()
+
+
+class Command(BaseCommand):
+    help = "Extract searchable text for existing document versions in parallel batches"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=100)
+        parser.add_argument("--retry-failed", action="store_true", help="Also re-process versions that failed before")
+        parser.add_argument("--sync", action="store_true", help="Run in this process instead of queueing Celery tasks")
+        parser.add_argument("--workers", type=int, default=4, help="Thread pool size for --sync")
+
+    def handle(self, *args, **kwargs):
+        statuses = ["pending", "failed"] if kwargs["retry_failed"] else ["pending"]
+        ids = DocumentVersion.objects.filter(extraction_status__in=statuses).order_by("id").values_list("id", flat=True)
+
+        batch_size = kwargs["batch_size"]
+        batches, batch = [], []
+        for version_id in ids.iterator(chunk_size=batch_size * 10):
+            batch.append(version_id)
+            if len(batch) == batch_size:
+                batches.append(batch)
+                batch = []
+        if batch:
+            batches.append(batch)
+
+        total = sum(len(b) for b in batches)
+        if kwargs["sync"]:
+            with ThreadPoolExecutor(max_workers=kwargs["workers"]) as pool:
+                results = {}
+                for done in pool.map(_run_batch_inline, batches):
+                    results.update(done)
+            summary = {}
+            for status in results.values():
+                summary[status] = summary.get(status, 0) + 1
+            self.stdout.write(self.style.SUCCESS(f"Extracted {total} versions: {summary}"))
+        else:
+            for batch in batches:
+                extract_version_batch.delay(batch)
+            self.stdout.write(self.style.SUCCESS(f"Queued {total} versions in {len(batches)} batches."))
@@ -0,0 +1,37 @@
+# documents/management/commands/backfill_version_stats.py
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import F, Max, OuterRef, Subquery
+from django.db.models.functions import Coalesce, Greatest
+from documents.models import Document, DocumentVersion
+from documents.services import refresh_version_stats
+
+
+class Command(BaseCommand):
+    help = "Fill Document.latest_version, version_count, last_uploaded_at and the version counter for existing rows"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=1000)
+
+    def handle(self, *args, **kwargs):
+        batch_size = kwargs["batch_size"]
+        highest = (
+            DocumentVersion.objects.filter(document_id=OuterRef("pk"))
+            .order_by()
+            .values("document_id")
+            .annotate(highest=Max("version_number"))
+            .values("highest")
+        )
+        ids = list(Document.objects.order_by("id").values_list("id", flat=True))
+        updated = 0
+        for start in range(0, len(ids), batch_size):
+            batch = ids[start:start + batch_size]
+            # One short transaction (two UPDATEs) per batch keeps row locks brief
+            with transaction.atomic():
+                updated += refresh_version_stats(batch)
+                Document.objects.filter(pk__in=batch).update(
+                    last_version_number=Greatest(F("last_version_number"), Coalesce(Subquery(highest), 0))
+                )
+            self.stdout.write(f"{min(start + batch_size, len(ids))}/{len(ids)} documents")
+        self.stdout.write(self.style.SUCCESS(f"Backfilled version stats for {updated} documents."))
@@ -0,0 +1,88 @@
+# documents/management/commands/benchmark_version_uploads.py
+
+import os
+import threading
+import time
+import uuid
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from django.contrib.auth.models import User
+from django.core.files.base import ContentFile
+from django.core.management.base import BaseCommand
+from django.db import IntegrityError, close_old_connections
+from documents.models import Document, DocumentVersion
+from documents.services import create_version
+from projects.models import Project
+from storage.factory import get_storage_backend
+
+
+def _legacy_upload(document, file, user, storage):
+    """The old read-then-write allocation, kept here for comparison."""
+    latest = document.versions.order_by('-version_number').first()
+    number = latest.version_number + 1 if latest else 1
+    path = storage.save(file, f"documents/{document.id}/versions/{number}/{file.name}")
+    return DocumentVersion.objects.create(document=document, version_number=number, file=path, uploaded_by=user)
+
+
+class Command(BaseCommand):
+    help = "Hammer one throwaway document with parallel version uploads and report collisions and throughput"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--uploads", type=int, default=200)
+        parser.add_argument("--threads", type=int, default=16)
+        parser.add_argument("--size", type=int, default=4096, help="Bytes per uploaded file")
+        parser.add_argument("--legacy", action="store_true", help="Use the old latest+1 allocation instead")
+
+    def handle(self, *args, **kwargs):
+        storage = get_storage_backend()
+        tag = uuid.uuid4().hex[:8]
+        user = User.objects.create_user(f"bench-{tag}")
+        project = Project.objects.create(name=f"bench-{tag}", created_by=user)
+        document = Document.objects.create(project=project, title=f"Version benchmark {tag}", created_by=user)
+        upload = _legacy_upload if kwargs["legacy"] else create_version
+        outcomes = Counter()
+        latencies = []
+        lock = threading.Lock()
+
+        def worker(i):
+            file = ContentFile(os.urandom(kwargs["size"]), name=f"bench-{i}.bin")
+            started = time.perf_counter()
+            try:
+                upload(Document.objects.get(pk=document.pk), file, user, storage=storage)
+                outcome = "ok"
+            except IntegrityError:
+                outcome = "collisions"
+            except Exception as e:
+                outcome = type(e).__name__
+            finally:
+                close_old_connections()
+            with lock:
+                outcomes[outcome] += 1
+                latencies.append(time.perf_counter() - started)
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=kwargs["threads"]) as pool:
+            list(pool.map(worker, range(kwargs["uploads"])))
+        elapsed = time.perf_counter() - started
+
+        numbers = sorted(document.versions.values_list("version_number", flat=True))
+        contiguous = numbers == list(range(1, len(numbers) + 1))
+        latencies.sort()
+        p50 = latencies[len(latencies) // 2] * 1000
+        p95 = latencies[int(len(latencies) * 0.95) - 1] * 1000
+
+        self.stdout.write(
+            f"{kwargs['uploads']} uploads, {kwargs['threads']} threads, "
+            f"{'legacy' if kwargs['legacy'] else 'counter'} allocation: {elapsed:.2f}s "
+            f"({outcomes['ok'] / elapsed:.1f} versions/s), p50 {p50:.1f}ms, p95 {p95:.1f}ms"
+        )
+        self.stdout.write(f"Outcomes: {dict(outcomes)}; versions 1..{len(numbers)} contiguous: {contiguous}")
+
+        for path in document.versions.values_list("file", flat=True):
+            storage.delete(path)
+        project.delete()
+        user.delete()
+        if outcomes["ok"] != kwargs["uploads"] or not contiguous:
+            self.stdout.write(self.style.WARNING("Some uploads failed; see outcomes above."))
+        else:
+            self.stdout.write(self.style.SUCCESS("No collisions."))
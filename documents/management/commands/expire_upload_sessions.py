@@ -0,0 +1,17 @@
+# documents/management/commands/expire_upload_sessions.py
+
+from datetime import timedelta
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from documents.uploads import expire_sessions
+
+
+class Command(BaseCommand):
+    help = "Abort idle resumable upload sessions and delete their staged data"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--hours", type=int, default=getattr(settings, "UPLOAD_SESSION_TTL_HOURS", 24))
+
+    def handle(self, *args, **kwargs):
+        count = expire_sessions(timedelta(hours=kwargs["hours"]))
+        self.stdout.write(self.style.SUCCESS(f"Expired {count} upload sessions."))
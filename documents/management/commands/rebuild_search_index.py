@@ -0,0 +1,15 @@
+# documents/management/commands/rebuild_search_index.py
+
+from django.core.management.base import BaseCommand
+from documents.search import rebuild_index
+
+
+class Command(BaseCommand):
+    help = "Rebuild the document full-text search index from scratch"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=500)
+
+    def handle(self, *args, **kwargs):
+        count = rebuild_index(batch_size=kwargs["batch_size"])
+        self.stdout.write(self.style.SUCCESS(f"Indexed {count} documents."))
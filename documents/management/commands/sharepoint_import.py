@@ -0,0 +1,160 @@
+# documents/management/commands/sharepoint_import.py
+
+import time
+from datetime import timedelta
+from pathlib import Path
+from django.core.management.base import BaseCommand, CommandError
+from documents.importers.bulk import BulkImporter
+from documents.importers.downloads import Downloader
+from documents.importers.models import ImportCheckpoint
+from documents.importers.readers import open_source
+
+STAGES = ["parse", "map", "user", "project", "document", "download", "version", "acl", "log"]
+
+
+def _duration(seconds):
+    return str(timedelta(seconds=round(seconds)))
+
+
+class Command(BaseCommand):
+    help = (
+        "Import a SharePoint export (CSV, XLSX, or a Graph JSON page file/directory) in bulk. "
+        "--dry-run validates every row against the database without writing and prints a throughput profile."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("path")
+        parser.add_argument("--sheet", help="XLSX worksheet (default: the active one)")
+        parser.add_argument("--chunk-size", type=int, default=1000)
+        parser.add_argument("--dry-run", action="store_true", help="Parse, map and validate only; write nothing")
+        parser.add_argument("--limit", type=int, help="Stop after this many rows (a later run resumes from there)")
+        parser.add_argument("--restart", action="store_true", help="Ignore the checkpoint of an earlier run")
+        parser.add_argument("--no-download", action="store_true", help="Do not fetch file_urls (placeholder paths)")
+        parser.add_argument("--no-index", action="store_true", help="Skip search indexing (run rebuild_search_index after)")
+        parser.add_argument("--no-vectorize", action="store_true", help="Preprocess row by row instead of with pandas")
+        parser.add_argument(
+            "--count", action="store_true",
+            help="Count the rows exactly before starting (an extra full read; by default the total comes from an "
+                 "earlier run or, for CSV, a line count)",
+        )
+        parser.add_argument("--workers", type=int, help="Parallel downloads (default IMPORT_DOWNLOAD_WORKERS)")
+        parser.add_argument("--per-host", type=int, help="Parallel downloads per host (default IMPORT_DOWNLOAD_PER_HOST)")
+
+    def handle(self, *args, **kwargs):
+        if not Path(kwargs["path"]).exists():
+            raise CommandError(f"Export not found: {kwargs['path']}")
+        try:
+            source = open_source(kwargs["path"], **({"sheet": kwargs["sheet"]} if kwargs["sheet"] else {}))
+        except ValueError as e:
+            raise CommandError(e)
+
+        # One pass over the bytes; the source keeps the hash for import_source()
+        checkpoint = ImportCheckpoint.objects.filter(source_hash=source.content_hash()).first()
+        total = self._total(source, checkpoint, kwargs["count"])
+
+        dry_run = kwargs["dry_run"]
+        download = not kwargs["no_download"] and not dry_run
+        downloader = Downloader(workers=kwargs["workers"], per_host=kwargs["per_host"]) if download else None
+        importer = BulkImporter(
+            chunk_size=kwargs["chunk_size"],
+            progress=self._progress,
+            index=not kwargs["no_index"],
+            download=download,
+            downloader=downloader,
+            dry_run=dry_run,
+            vectorize=not kwargs["no_vectorize"],
+        )
+        self._to_do = total
+        if not dry_run and not kwargs["restart"] and checkpoint and checkpoint.rows_done:
+            self.stdout.write(f"Resuming after row {checkpoint.rows_done} (use --restart to start over)")
+            if total is not None:
+                self._to_do = max(total - checkpoint.rows_done, 0)
+        if kwargs["limit"] is not None:
+            self._to_do = kwargs["limit"] if self._to_do is None else min(self._to_do, kwargs["limit"])
+
+        try:
+            importer.import_source(source, resume=not kwargs["restart"], limit=kwargs["limit"])
+        finally:
+            if downloader:
+                downloader.close()
+        self._report(importer, total)
+
+    def _total(self, source, checkpoint, count):
+        """Rows in the export: counted on request, else known from a completed run, else estimated (CSV) or None."""
+        if count:
+            started = time.perf_counter()
+            total = sum(1 for _ in source.rows())
+            self.stdout.write(f"{total} rows in {source.path} (counted in {time.perf_counter() - started:.1f}s)")
+            return total
+        if checkpoint and checkpoint.rows_total is not None:
+            self.stdout.write(f"{checkpoint.rows_total} rows in {source.path} (from an earlier run)")
+            return checkpoint.rows_total
+        if hasattr(source, "approximate_rows"):
+            total = source.approximate_rows()
+            self.stdout.write(f"About {total} rows in {source.path} (line count; --count for an exact one)")
+            return total
+        self.stdout.write(f"Row count of {source.path} unknown until the first run completes (--count to count first)")
+        return None
+
+    def _progress(self, importer):
+        done = importer.stats["rows"]
+        rate = importer.rows_per_second
+        if self._to_do is None:
+            self.stdout.write(f"  {done} rows, {rate:.0f} rows/s")
+            return
+        eta = _duration(max(self._to_do - done, 0) / rate) if rate else "?"
+        self.stdout.write(f"  {done}/{self._to_do} rows, {rate:.0f} rows/s, ETA {eta}")
+
+    def _report(self, importer, total):
+        s, t = importer.stats, importer.timings
+        verb = "would be" if importer.dry_run else "were"
+        self.stdout.write("")
+        if importer.dry_run:
+            self.stdout.write(self.style.WARNING("Dry run: nothing was written."))
+        self.stdout.write(
+            f"{s['rows']} rows: {s['imported']} {verb} imported, {s['skipped']} already imported, "
+            f"{s['failed']} {verb} logged as failures"
+        )
+
+        self.stdout.write(f"\n{'':<12}{'new':>10}{'existing':>10}")
+        for label, new, existing in [
+            ("users", s["users"], s["users_existing"]),
+            ("projects", s["projects"], s["projects_existing"]),
+            ("documents", s["documents"], s["documents_existing"]),
+            ("versions", s["versions"], s["skipped"]),
+            ("permissions", s["permissions"], s["permissions_existing"]),
+        ]:
+            self.stdout.write(f"{label:<12}{new:>10}{existing:>10}")
+
+        self.stdout.write(f"\n{'stage':<12}{'seconds':>10}{'rows/s':>12}")
+        for stage in STAGES:
+            if stage in t:
+                rate = s["rows"] / t[stage] if t[stage] else 0
+                self.stdout.write(f"{stage:<12}{t[stage]:>10.2f}{rate:>12.0f}")
+        other = importer.elapsed - sum(t.values())
+        self.stdout.write(f"{'other':<12}{other:>10.2f}")
+        self.stdout.write(f"{'total':<12}{importer.elapsed:>10.2f}{importer.rows_per_second:>12.0f}")
+
+        if total is not None and importer.rows_per_second:
+            self.stdout.write(
+                f"\nProjected time for all {total} rows at this rate: {_duration(total / importer.rows_per_second)}"
+            )
+        if importer.dry_run:
+            self._project_import(s["imported"])
+
+    def _project_import(self, rows):
+        """A dry run measures no writes; estimate them from the last completed import's throughput."""
+        previous = (
+            ImportCheckpoint.objects.filter(completed_at__isnull=False, rows_done__gt=0, import_seconds__gt=0)
+            .order_by("-completed_at")
+            .first()
+        )
+        if previous is None:
+            self.stdout.write("No completed import to estimate write throughput from; try a real run with --limit.")
+            return
+        # Time spent importing, so pauses between resumed runs do not drag the rate down
+        rate = previous.rows_done / previous.import_seconds
+        self.stdout.write(
+            f"Projected import time for the {rows} new rows: {_duration(rows / rate)} at {rate:.0f} rows/s, "
+            f"the throughput of the last completed import ({previous.source_path})"
+        )
@@ -1,5 +1,7 @@
 # documents/models.py
 
+import uuid
+
 from django.db import models
 from django.contrib.auth.models import User
 from projects.models import Project
@@ -12,6 +14,12 @@ class Document(models.Model):
     created_by = models.ForeignKey(User, null=True, on_delete=models.SET_NULL, related_name='created_documents')
     created_at = models.DateTimeField(auto_now_add=True)
     active = models.BooleanField(default=True)
+    # Highest version number handed out so far (see documents.services.allocate_version_number)
+    last_version_number = models.PositiveIntegerField(default=0)
+    # Denormalized from versions; kept current by documents.services.refresh_version_stats
+    latest_version = models.ForeignKey("DocumentVersion", null=True, blank=True, on_delete=models.SET_NULL, related_name="+")
+    version_count = models.PositiveIntegerField(default=0)
+    last_uploaded_at = models.DateTimeField(null=True, blank=True)
 	
     class Meta:
         permissions = [
@@ -19,9 +27,15 @@ class Document(models.Model):
             ("editor_document", "Can edit document"),
             ("commenter_document", "Can comment on document"),
         ]
-
-    def latest_version(self):
-        return self.versions.order_by('-version_number').first()
+        # Keyset pagination (core.pagination) pages by (sort field, id), per list scope
+        indexes = [
+            models.Index(fields=["created_at", "id"], name="document_created_idx"),
+            models.Index(fields=["title", "id"], name="document_title_idx"),
+            models.Index(fields=["project", "created_at", "id"], name="document_project_created_idx"),
+            models.Index(fields=["project", "title", "id"], name="document_project_title_idx"),
+            models.Index(fields=["created_by", "created_at", "id"], name="document_creator_created_idx"),
+            models.Index(fields=["created_by", "title", "id"], name="document_creator_title_idx"),
+        ]
 
     def __str__(self):
         return f"{self.title} (Project: {self.project})"
@@ -31,6 +45,13 @@ class DocumentVersion(models.Model):
     """
     Represents a specific version of a document.
     """
+    EXTRACTION_CHOICES = [
+        ("pending", "Pending"),
+        ("done", "Done"),
+        ("skipped", "Skipped"),
+        ("failed", "Failed"),
+    ]
+
     document = models.ForeignKey(Document, on_delete=models.CASCADE, related_name='versions')
     version_number = models.PositiveIntegerField()
     file = models.FileField(upload_to='documents/%Y/%m/')
@@ -38,6 +59,13 @@ class DocumentVersion(models.Model):
     uploaded_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True)
     uploaded_at = models.DateTimeField(auto_now_add=True)
 
+    # Text extracted from the file for search (see documents/extraction.py)
+    content_text = models.TextField(blank=True, default="")
+    extraction_status = models.CharField(max_length=16, choices=EXTRACTION_CHOICES, default="pending", db_index=True)
+
+    # SHA-256 of the file when stored with STORAGE_DEDUPLICATE (versions sharing it share one blob)
+    content_digest = models.CharField(max_length=64, blank=True, default="", db_index=True)
+
     class Meta:
         unique_together = ('document', 'version_number')
         ordering = ['-version_number']
@@ -58,6 +86,110 @@ class Comment(models.Model):
 
     class Meta:
         ordering = ['created_at']
+        indexes = [
+            models.Index(fields=["document", "created_at", "id"], name="comment_document_created_idx"),
+            models.Index(fields=["user", "created_at", "id"], name="comment_user_created_idx"),  # profile page
+        ]
 
     def __str__(self):
         return f"Comment by {self.user} on {self.document} v{self.version.version_number if self.version else 'latest'}"
+
+
+class UploadSession(models.Model):
+    """
+    An upload of a new version (see documents/uploads.py). Chunked sessions
+    append chunks in order to a staging object in the storage backend; direct
+    sessions hand the client a presigned URL to put the staging object itself.
+    Either way the DocumentVersion is only created on commit.
+    """
+    STATUS_CHOICES = [
+        ("open", "Open"),
+        ("committing", "Committing"),
+        ("committed", "Committed"),
+        ("aborted", "Aborted"),
+    ]
+    MODE_CHOICES = [
+        ("chunked", "Chunked"),
+        ("direct", "Direct to storage"),
+    ]
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    document = models.ForeignKey(Document, on_delete=models.CASCADE, related_name='upload_sessions')
+    user = models.ForeignKey(User, on_delete=models.CASCADE)
+    filename = models.CharField(max_length=255)
+    notes = models.TextField(blank=True)
+    total_size = models.PositiveBigIntegerField()
+    received_bytes = models.PositiveBigIntegerField(default=0)
+    mode = models.CharField(max_length=16, choices=MODE_CHOICES, default="chunked")
+    checksum = models.CharField(max_length=64, blank=True)  # chunked: chained SHA-256 so far; direct: declared SHA-256
+    staging_path = models.CharField(max_length=512)
+    status = models.CharField(max_length=16, choices=STATUS_CHOICES, default="open")
+    version = models.ForeignKey(DocumentVersion, on_delete=models.SET_NULL, null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Upload {self.id} for {self.document.title} ({self.received_bytes}/{self.total_size})"
+
+
+class ExportJob(models.Model):
+    """
+    An export written by a Celery worker into the storage backend (see
+    documents/exports.py). Identical requests made while one is queued or
+    running share it: at most one active job per dedup_key.
+    """
+    KIND_CHOICES = [
+        ("audit", "Audit log"),
+        ("inventory", "Document inventory"),
+    ]
+    STATUS_CHOICES = [
+        ("queued", "Queued"),
+        ("running", "Running"),
+        ("done", "Done"),
+        ("failed", "Failed"),
+    ]
+    ACTIVE_STATUSES = ("queued", "running")
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    kind = models.CharField(max_length=16, choices=KIND_CHOICES)
+    project = models.ForeignKey(Project, on_delete=models.CASCADE, null=True, blank=True, related_name='export_jobs')
+    document = models.ForeignKey(Document, on_delete=models.CASCADE, null=True, blank=True, related_name='export_jobs')
+    format = models.CharField(max_length=16, default="csv")
+    gzip = models.BooleanField(default=False)
+    dedup_key = models.CharField(max_length=64, db_index=True)
+    requested_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, related_name='export_jobs')
+    status = models.CharField(max_length=16, choices=STATUS_CHOICES, default="queued")
+    rows_total = models.PositiveBigIntegerField(null=True, blank=True)
+    rows_done = models.PositiveBigIntegerField(default=0)
+    output_path = models.CharField(max_length=512, blank=True)
+    filename = models.CharField(max_length=255, blank=True)
+    size = models.PositiveBigIntegerField(null=True, blank=True)
+    error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["dedup_key"],
+                condition=models.Q(status__in=["queued", "running"]),
+                name="unique_active_export_job",
+            ),
+        ]
+
+    @property
+    def progress(self):
+        """Fraction done (0-1), None while the row count is unknown."""
+        if self.status == "done":
+            return 1.0
+        if not self.rows_total:
+            return None
+        return min(self.rows_done / self.rows_total, 1.0)
+
+    def __str__(self):
+        return f"Export {self.id} ({self.kind}, {self.format}, {self.status})"
+
+
+# Defined with the importer; imported here so the documents app registers (and migrates) them
+from documents.importers.models import ImportCheckpoint, SharePointImportLog  # noqa: E402,F401
@@ -0,0 +1,85 @@
+# documents/search/__init__.py
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+from django.db.models import prefetch_related_objects
+
+from documents.models import Document, DocumentVersion, Comment
+from documents.search.backends import get_search_backend
+
+"""
+Document Search
+---------------
+Full-text search over document titles, descriptions, version notes,
+comments and the extracted text of the latest version (documents/extraction.py).
+The index is maintained by signal handlers in documents/signals.py (one
+re-index per affected document, after commit) and can be rebuilt with
+`python manage.py rebuild_search_index`. Its tables are created by
+`migrate` (create_search_schema).
+"""
+
+
+def collect_document_text(document: Document) -> dict:
+	"""Gathers the indexed text for one document."""
+	notes = DocumentVersion.objects.filter(document=document).values_list("notes", flat=True)
+	comments = Comment.objects.filter(document=document).values_list("body", flat=True)
+	latest_content = (
+		DocumentVersion.objects.filter(document=document)
+		.order_by("-version_number")
+		.values_list("content_text", flat=True)
+		.first()
+	)
+	return {
+		"title": document.title,
+		"description": document.description,
+		"notes": "\n".join(n for n in notes if n),
+		"comments": "\n".join(c for c in comments if c),
+		"content": latest_content or "",
+	}
+
+
+def create_search_schema(using=DEFAULT_DB_ALIAS, **kwargs) -> None:
+	"""post_migrate receiver: creates the index tables of the default database if missing."""
+	if using == DEFAULT_DB_ALIAS:
+		get_search_backend().ensure_schema()
+
+
+def index_document(document_id: int) -> None:
+	"""(Re)indexes a document, or drops it from the index if it no longer exists."""
+	backend = get_search_backend()
+	document = Document.objects.filter(id=document_id).first()
+	if document is None:
+		backend.delete(document_id)
+		return
+	backend.upsert(document.id, collect_document_text(document))
+
+
+def remove_document(document_id: int) -> None:
+	get_search_backend().delete(document_id)
+
+
+def rebuild_index(batch_size: int = 500) -> int:
+	"""Clears and repopulates the whole index. Returns the number of documents indexed."""
+	backend = get_search_backend()
+	backend.reset()
+	count = 0
+	for document in Document.objects.order_by("id").iterator(chunk_size=batch_size):
+		backend.upsert(document.id, collect_document_text(document))
+		count += 1
+	return count
+
+
+def search_documents(user, query: str, *, project_id=None, created_by_id=None, limit=None) -> list[Document]:
+	"""
+	Ranked documents matching `query` that `user` can access (project member,
+	active document). Each result carries a `rank` attribute, higher is better.
+	"""
+	query = (query or "").strip()
+	if not user or not user.is_authenticated or not query:
+		return []
+	limit = limit or getattr(settings, "SEARCH_RESULT_LIMIT", 50)
+	results = get_search_backend().search(
+		user, query, project_id=project_id, created_by_id=created_by_id, limit=limit
+	)
+	prefetch_related_objects(results, "project", "created_by", "latest_version")
+	return results
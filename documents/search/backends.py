@@ -0,0 +1,228 @@
+# documents/search/backends.py
+
+from abc import ABC, abstractmethod
+
+from django.db import connection, transaction
+from django.db.models import Q
+
+from documents.models import Document
+
+"""
+Search Backends
+---------------
+Each backend owns one inverted index keyed by document id and answers ranked
+queries with permission filtering (active document + project membership)
+pushed into the same SQL statement.
+
+- PostgresSearchBackend: tsvector column with a GIN index, ts_rank_cd ranking
+- SQLiteSearchBackend:   FTS5 virtual table, bm25 ranking
+- FallbackSearchBackend: no index, icontains scan (other databases)
+
+Indexed fields and weights: title > description > version notes > comments
+> latest file content.
+
+The index tables are not Django models: ensure_schema() creates them after
+every `migrate` (a post_migrate receiver), never from a request.
+"""
+
+MEMBERSHIP_CLAUSE = (
+	"EXISTS (SELECT 1 FROM projects_projectmembership m "
+	"WHERE m.project_id = d.project_id AND m.user_id = %s)"
+)
+
+
+def _filter_clauses(user, project_id, created_by_id):
+	"""Shared WHERE fragments (beyond the match itself) and their params."""
+	clauses = ["d.active", MEMBERSHIP_CLAUSE]
+	params = [user.pk]
+	if project_id:
+		clauses.append("d.project_id = %s")
+		params.append(project_id)
+	if created_by_id:
+		clauses.append("d.created_by_id = %s")
+		params.append(created_by_id)
+	return clauses, params
+
+
+class SearchBackend(ABC):
+	def ensure_schema(self) -> None:
+		"""Creates the index structures if missing (idempotent). Run after every migrate (see documents/apps.py)."""
+
+	def drop_schema(self) -> None:
+		"""Drops the index structures (used by rebuilds to pick up schema changes)."""
+
+	def reset(self) -> None:
+		self.drop_schema()
+		self.ensure_schema()
+
+	@abstractmethod
+	def upsert(self, document_id: int, fields: dict) -> None:
+		pass
+
+	@abstractmethod
+	def delete(self, document_id: int) -> None:
+		pass
+
+	@abstractmethod
+	def clear(self) -> None:
+		pass
+
+	@abstractmethod
+	def search(self, user, query: str, *, project_id=None, created_by_id=None, limit=50) -> list[Document]:
+		pass
+
+
+class PostgresSearchBackend(SearchBackend):
+	table = "documents_search_index"
+	config = "english"
+
+	def ensure_schema(self):
+		with connection.cursor() as cursor:
+			cursor.execute(
+				f"CREATE TABLE IF NOT EXISTS {self.table} ("
+				"document_id bigint PRIMARY KEY REFERENCES documents_document(id) ON DELETE CASCADE, "
+				"vector tsvector NOT NULL)"
+			)
+			cursor.execute(f"CREATE INDEX IF NOT EXISTS {self.table}_vector_gin ON {self.table} USING gin (vector)")
+
+	def upsert(self, document_id, fields):
+		with connection.cursor() as cursor:
+			cursor.execute(
+				f"INSERT INTO {self.table} (document_id, vector) VALUES (%s, "
+				"setweight(to_tsvector(%s::regconfig, %s), 'A') || "
+				"setweight(to_tsvector(%s::regconfig, %s), 'B') || "
+				"setweight(to_tsvector(%s::regconfig, %s), 'C') || "
+				"setweight(to_tsvector(%s::regconfig, %s), 'D') || "
+				"setweight(to_tsvector(%s::regconfig, %s), 'D')) "
+				"ON CONFLICT (document_id) DO UPDATE SET vector = EXCLUDED.vector",
+				[
+					document_id,
+					self.config, fields["title"],
+					self.config, fields["description"],
+					self.config, fields["notes"],
+					self.config, fields["comments"],
+					self.config, fields["content"],
+				],
+			)
+
+	def drop_schema(self):
+		with connection.cursor() as cursor:
+			cursor.execute(f"DROP TABLE IF EXISTS {self.table}")
+
+	def delete(self, document_id):
+		with connection.cursor() as cursor:
+			cursor.execute(f"DELETE FROM {self.table} WHERE document_id = %s", [document_id])
+
+	def clear(self):
+		with connection.cursor() as cursor:
+			cursor.execute(f"TRUNCATE {self.table}")
+
+	def search(self, user, query, *, project_id=None, created_by_id=None, limit=50):
+		clauses, params = _filter_clauses(user, project_id, created_by_id)
+		sql = (
+			"SELECT d.*, ts_rank_cd(s.vector, q) AS rank "
+			f"FROM {self.table} s "
+			"JOIN documents_document d ON d.id = s.document_id, "
+			"websearch_to_tsquery(%s::regconfig, %s) q "
+			f"WHERE s.vector @@ q AND {' AND '.join(clauses)} "
+			"ORDER BY rank DESC, d.id DESC LIMIT %s"
+		)
+		return list(Document.objects.raw(sql, [self.config, query, *params, limit]))
+
+
+class SQLiteSearchBackend(SearchBackend):
+	table = "documents_search_fts"
+	weights = "10.0, 5.0, 2.0, 1.0, 0.5"
+
+	def ensure_schema(self):
+		with connection.cursor() as cursor:
+			cursor.execute(
+				f"CREATE VIRTUAL TABLE IF NOT EXISTS {self.table} "
+				"USING fts5(title, description, notes, comments, content, tokenize='porter unicode61')"
+			)
+
+	def drop_schema(self):
+		with connection.cursor() as cursor:
+			cursor.execute(f"DROP TABLE IF EXISTS {self.table}")
+
+	def upsert(self, document_id, fields):
+		# One transaction so concurrent re-indexes of a document can't interleave DELETE/INSERT
+		with transaction.atomic(), connection.cursor() as cursor:
+			cursor.execute(f"DELETE FROM {self.table} WHERE rowid = %s", [document_id])
+			cursor.execute(
+				f"INSERT INTO {self.table} (rowid, title, description, notes, comments, content) "
+				"VALUES (%s, %s, %s, %s, %s, %s)",
+				[
+					document_id,
+					fields["title"], fields["description"], fields["notes"], fields["comments"], fields["content"],
+				],
+			)
+
+	def delete(self, document_id):
+		with connection.cursor() as cursor:
+			cursor.execute(f"DELETE FROM {self.table} WHERE rowid = %s", [document_id])
+
+	def clear(self):
+		with connection.cursor() as cursor:
+			cursor.execute(f"DELETE FROM {self.table}")
+
+	@staticmethod
+	def to_match_expression(query: str) -> str:
+		"""Quotes each term so user input can't inject FTS5 operators (terms are AND-ed)."""
+		terms = [term.replace('"', '""') for term in query.split()]
+		return " ".join(f'"{term}"' for term in terms)
+
+	def search(self, user, query, *, project_id=None, created_by_id=None, limit=50):
+		match = self.to_match_expression(query)
+		if not match:
+			return []
+		clauses, params = _filter_clauses(user, project_id, created_by_id)
+		# bm25() is lower-is-better; negate so rank is higher-is-better on every backend
+		sql = (
+			f"SELECT d.*, -bm25({self.table}, {self.weights}) AS rank "
+			f"FROM {self.table} "
+			f"JOIN documents_document d ON d.id = {self.table}.rowid "
+			f"WHERE {self.table} MATCH %s AND {' AND '.join(clauses)} "
+			"ORDER BY rank DESC, d.id DESC LIMIT %s"
+		)
+		return list(Document.objects.raw(sql, [match, *params, limit]))
+
+
+class FallbackSearchBackend(SearchBackend):
+	"""Unindexed substring search for databases without a native full-text engine."""
+
+	def upsert(self, document_id, fields):
+		pass
+
+	def delete(self, document_id):
+		pass
+
+	def clear(self):
+		pass
+
+	def search(self, user, query, *, project_id=None, created_by_id=None, limit=50):
+		qs = Document.objects.filter(active=True, project__memberships__user=user)
+		if project_id:
+			qs = qs.filter(project_id=project_id)
+		if created_by_id:
+			qs = qs.filter(created_by_id=created_by_id)
+		for term in query.split():
+			qs = qs.filter(
+				Q(title__icontains=term) |
+				Q(description__icontains=term) |
+				Q(versions__notes__icontains=term) |
+				Q(comments__body__icontains=term) |
+				Q(versions__content_text__icontains=term)
+			)
+		results = list(qs.distinct().order_by("-created_at", "-id")[:limit])
+		for doc in results:
+			doc.rank = 0.0
+		return results
+
+
+def get_search_backend() -> SearchBackend:
+	if connection.vendor == "postgresql":
+		return PostgresSearchBackend()
+	if connection.vendor == "sqlite":
+		return SQLiteSearchBackend()
+	return FallbackSearchBackend()
@@ -1,10 +1,20 @@
 # documents/services.py
 
-from django.contrib.auth.models import User
+import uuid
+
+from django.conf import settings
+from django.contrib.auth.models import Permission, User
+from django.contrib.contenttypes.models import ContentType
+from django.db import transaction
+from django.db.models import Count, F, Max, OuterRef, Subquery
+from django.db.models.functions import Coalesce, Greatest
+from guardian.models import UserObjectPermission
 from guardian.shortcuts import assign_perm, remove_perm
-from documents.models import Document
-from auditlog.models import ShareActionLog
-from core.permissions import ROLE_PERM_MAP, can_manage_permissions
+from documents.models import Document, DocumentVersion
+from auditlog import writer as audit
+from core.permissions import ROLE_PERM_MAP, can_manage_permissions, resolve_document_roles
+from core import role_cache
+from storage.factory import get_storage_backend
 
 
 def share_document(document: Document, actor: User, target: User, role: str) -> None:
@@ -20,8 +30,9 @@ def share_document(document: Document, actor: User, target: User, role: str) ->
         raise ValueError(f"Invalid role: {role}")
 
     assign_perm(perm, target, document)
+    role_cache.invalidate_document(target, document)
 
-    ShareActionLog.objects.create(
+    audit.record(
         actor=actor,
         target_user=target,
         role=role,
@@ -42,8 +53,9 @@ def unshare_document(document: Document, actor: User, target: User) -> None:
     # Remove all role-specific perms
     for role, perm_name in ROLE_PERM_MAP.items():
         remove_perm(f"documents.{perm_name}", target, document)
+    role_cache.invalidate_document(target, document)
 
-    ShareActionLog.objects.create(
+    audit.record(
         actor=actor,
         target_user=target,
         role="all",
@@ -66,8 +78,9 @@ def change_document_role(document: Document, actor: User, target: User, new_role
         remove_perm(f"documents.{perm_name}", target, document)
 
     assign_perm(f"documents.{ROLE_PERM_MAP[new_role]}", target, document)
+    role_cache.invalidate_document(target, document)
 
-    ShareActionLog.objects.create(
+    audit.record(
         actor=actor,
         target_user=target,
         role=new_role,
@@ -77,6 +90,196 @@ def change_document_role(document: Document, actor: User, target: User, new_role
     )
 
 
+def bulk_update_access(actor: User, documents, users, role: str | None = None, remove: bool = False) -> dict:
+    """
+    Gives every user in `users` exactly `role` on every document in
+    `documents`, or with remove=True takes all their roles away. Pairs that
+    already match are left alone.
+
+    The existing role permissions of all pairs are read in one query; the
+    change is one DELETE (roles being replaced or revoked) and one bulk
+    INSERT, with one audit entry per changed pair, in a single transaction.
+
+    Returns:
+        {"shared", "role_changed", "unshared", "unchanged"} pair counts
+
+    Raises:
+        ValueError: Invalid role, or more than BULK_SHARE_MAX_PAIRS pairs
+        PermissionError: `actor` cannot manage some of the documents
+    """
+    documents, users = list(documents), list(users)
+    if not remove and role not in ROLE_PERM_MAP:
+        raise ValueError(f"Invalid role: {role}")
+    limit = getattr(settings, "BULK_SHARE_MAX_PAIRS", 100000)
+    if len(documents) * len(users) > limit:
+        raise ValueError(f"At most {limit} (document, user) pairs per call.")
+    counts = {"shared": 0, "role_changed": 0, "unshared": 0, "unchanged": 0}
+    if not documents or not users:
+        return counts
+
+    access = resolve_document_roles(actor, documents)
+    denied = sorted(doc.id for doc in documents if not access[doc.id]["can_manage"])
+    if denied:
+        raise PermissionError(f"User lacks permission to share documents: {denied}")
+
+    content_type = ContentType.objects.get_for_model(Document)
+    perm_ids = dict(
+        Permission.objects.filter(content_type=content_type, codename__in=ROLE_PERM_MAP.values())
+        .values_list("codename", "id")
+    )
+    role_perms = UserObjectPermission.objects.filter(
+        content_type=content_type,
+        object_pk__in=[str(doc.id) for doc in documents],
+        user_id__in=[user.id for user in users],
+        permission_id__in=perm_ids.values(),
+    )
+    target_perm = None if remove else perm_ids[ROLE_PERM_MAP[role]]
+
+    with audit.buffered():
+        held = {}
+        for user_id, object_pk, permission_id in role_perms.values_list("user_id", "object_pk", "permission_id"):
+            held.setdefault((user_id, int(object_pk)), set()).add(permission_id)
+
+        grants, changed = [], []
+        for doc in documents:
+            for user in users:
+                perms = held.get((user.id, doc.id), set())
+                if remove:
+                    action = "unshared" if perms else None
+                elif perms == {target_perm}:
+                    action = None
+                else:
+                    action = "role_changed" if perms else "shared"
+                    if target_perm not in perms:
+                        grants.append(UserObjectPermission(
+                            user_id=user.id, permission_id=target_perm,
+                            content_type=content_type, object_pk=str(doc.id),
+                        ))
+                if action is None:
+                    counts["unchanged"] += 1
+                    continue
+                counts[action] += 1
+                changed.append((user.id, doc.id))
+                audit.record(
+                    actor=actor,
+                    target_user=user,
+                    role="all" if remove else role,
+                    action=action,
+                    document=doc,
+                    project_id=doc.project_id,
+                )
+
+        if changed:
+            (role_perms if remove else role_perms.exclude(permission_id=target_perm)).delete()
+            UserObjectPermission.objects.bulk_create(grants, batch_size=500, ignore_conflicts=True)
+            role_cache.invalidate_documents(changed)
+    return counts
+
+
+def allocate_version_number(document: Document) -> int:
+    """
+    Reserves the next version number of `document`.
+
+    A single UPDATE bumps Document.last_version_number; the row lock it takes
+    serializes concurrent uploads to the same document (and only to it) until
+    the surrounding transaction ends, so numbers never collide. The counter
+    also catches up with versions created with explicit numbers (imports,
+    documents predating the counter). If the transaction rolls back, the
+    number is released with it.
+    """
+    highest = (
+        DocumentVersion.objects.filter(document_id=OuterRef("pk"))
+        .order_by()
+        .values("document_id")
+        .annotate(highest=Max("version_number"))
+        .values("highest")
+    )
+    with transaction.atomic():
+        Document.objects.filter(pk=document.pk).update(
+            last_version_number=Greatest(F("last_version_number"), Coalesce(Subquery(highest), 0)) + 1
+        )
+        number = Document.objects.filter(pk=document.pk).values_list("last_version_number", flat=True).get()
+    document.last_version_number = number
+    return number
+
+
+def refresh_version_stats(document_ids) -> int:
+    """
+    Recomputes latest_version, version_count and last_uploaded_at for the
+    given documents in a single UPDATE. Returns the number of rows updated.
+    """
+    versions = DocumentVersion.objects.filter(document_id=OuterRef("pk")).order_by()
+    return Document.objects.filter(pk__in=list(document_ids)).update(
+        latest_version_id=Subquery(versions.order_by("-version_number").values("id")[:1]),
+        version_count=Coalesce(Subquery(versions.values("document_id").annotate(n=Count("id")).values("n")), 0),
+        last_uploaded_at=Subquery(versions.values("document_id").annotate(at=Max("uploaded_at")).values("at")),
+    )
+
+
+def version_file_path(document: Document, filename: str) -> str:
+    """
+    Where a new version's file is stored. It does not depend on the version
+    number, so the bytes are put in place before the number is allocated.
+    """
+    return f"documents/{document.id}/versions/{uuid.uuid4().hex}/{filename}"
+
+
+def _record_version(document: Document, path: str, user: User, notes: str, storage, on_created=None,
+                    version=None) -> DocumentVersion:
+    """
+    Allocates the number and INSERTs the row of a version whose file is
+    already at `path`. Only this runs under the document's counter lock.
+    `version` is an unsaved instance to fill in and write (e.g. from
+    DocumentUploadForm.save(commit=False)); by default a new one is created.
+    """
+    digest = storage.digest(path) or ""
+    version = version or DocumentVersion()
+    version.document = document
+    version.file = path
+    version.notes = notes
+    version.uploaded_by = user
+    version.content_digest = digest
+    with transaction.atomic():
+        version.version_number = allocate_version_number(document)
+        version.save(force_insert=True)
+        if on_created:
+            on_created(version)
+    return version
+
+
+def create_version(document: Document, file, user: User, notes: str = "", storage=None, version=None) -> DocumentVersion:
+    """
+    Stores `file` and records it as the document's next version.
+
+    The bytes are written to their final path first, outside any lock and
+    transaction; only the number allocation and the INSERT run inside the
+    (short) transaction. Whatever fails, no file is left behind.
+    """
+    storage = storage or get_storage_backend()
+    path = storage.save(file, version_file_path(document, file.name))
+    try:
+        return _record_version(document, path, user, notes, storage, version=version)
+    except BaseException:
+        storage.delete(path)
+        raise
+
+
+def publish_staged_version(document: Document, staging_path: str, filename: str, user: User, notes: str, storage,
+                           on_created=None, version=None) -> DocumentVersion:
+    """
+    Turns a staged file (e.g. a finished upload) into the document's next
+    version. The move, which may copy or hash the bytes (object storage,
+    STORAGE_DEDUPLICATE), happens before the transaction; `on_created(version)`
+    runs inside it. If the row cannot be created the file is moved back.
+    """
+    final_path = storage.move(staging_path, version_file_path(document, filename))
+    try:
+        return _record_version(document, final_path, user, notes, storage, on_created, version)
+    except BaseException:
+        storage.move(final_path, staging_path)
+        raise
+
+
 def assign_document_permissions():
     '''Central logic for assigning viewer/editor roles.'''
 
@@ -0,0 +1,147 @@
+# documents/signals.py
+
+import logging
+
+from django.conf import settings
+from django.contrib.auth.models import Group, User
+from django.contrib.contenttypes.models import ContentType
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_save, post_delete, pre_delete
+from django.dispatch import receiver
+from guardian.models import GroupObjectPermission
+
+from core import role_cache
+from documents.models import Document, DocumentVersion, Comment
+from documents import search, services
+from projects.models import ProjectMembership
+from storage.factory import get_storage_backend
+
+logger = logging.getLogger(__name__)
+
+
+def _schedule_reindex(document_id):
+	# Index after commit so the indexer reads committed rows (and nothing on rollback)
+	transaction.on_commit(lambda: _reindex(document_id))
+
+
+def _reindex(document_id):
+	try:
+		search.index_document(document_id)
+	except Exception:
+		# The write already committed; a stale index entry is fixed by the next save or a rebuild
+		logger.exception("Could not re-index document %s", document_id)
+
+
+@receiver(post_save, sender=Document)
+def reindex_saved_document(sender, instance, **kwargs):
+	_schedule_reindex(instance.id)
+
+
+@receiver(post_delete, sender=Document)
+def unindex_deleted_document(sender, instance, **kwargs):
+	transaction.on_commit(lambda: search.remove_document(instance.id))
+
+
+@receiver(post_save, sender=DocumentVersion)
+@receiver(post_delete, sender=DocumentVersion)
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def reindex_parent_document(sender, instance, **kwargs):
+	_schedule_reindex(instance.document_id)
+
+
+@receiver(post_save, sender=DocumentVersion)
+@receiver(post_delete, sender=DocumentVersion)
+def update_version_stats(sender, instance, **kwargs):
+	# Same transaction as the version write. Lock the document row first so
+	# concurrent writers recompute one after another from committed data.
+	update_fields = kwargs.get("update_fields")
+	if update_fields and not {"version_number", "uploaded_at", "document"} & set(update_fields):
+		return  # e.g. content extraction writing back text
+	with transaction.atomic():
+		if not Document.objects.select_for_update().filter(pk=instance.document_id).exists():
+			return  # document itself is being deleted
+		services.refresh_version_stats([instance.document_id])
+
+
+@receiver(post_delete, sender=DocumentVersion)
+def delete_version_file(sender, instance, **kwargs):
+	# After commit, so a rolled-back delete keeps its file. With STORAGE_DEDUPLICATE
+	# this drops the path's blob reference; the blob goes once nothing else uses it.
+	if instance.file.name:
+		transaction.on_commit(lambda: _delete_file(instance.file.name))
+
+
+def _delete_file(path):
+	try:
+		get_storage_backend().delete(path)
+	except Exception:
+		# Left for gc_blobs (deduplicated storage) or a manual cleanup
+		logger.exception("Could not delete stored file %s", path)
+
+
+@receiver(post_save, sender=DocumentVersion)
+def queue_content_extraction(sender, instance, created, **kwargs):
+	if not created or not getattr(settings, "CONTENT_EXTRACTION_ENABLED", True):
+		return
+	transaction.on_commit(lambda: _dispatch_extraction(instance.id))
+
+
+def _dispatch_extraction(version_id):
+	from documents.tasks import extract_version_text
+	app = extract_version_text.app
+	try:
+		with app.connection_for_write() as connection:
+			if not app.conf.task_always_eager:
+				# The upload request waits on this: one connection attempt, no publish retries
+				connection.ensure_connection(max_retries=0)
+			extract_version_text.apply_async((version_id,), connection=connection, retry=False)
+	except Exception as e:
+		# Broker down: leave the version pending for backfill_content_extraction
+		logger.warning("Could not queue content extraction for version %s: %s", version_id, e)
+
+
+# Effective-role cache (core/role_cache.py). Document shares invalidate
+# explicitly in documents/services.py and core/access.py; these cover the
+# other inputs of resolve_document_roles, including edits made in the admin.
+
+@receiver(post_save, sender=ProjectMembership)
+@receiver(post_delete, sender=ProjectMembership)
+def invalidate_membership_roles(sender, instance, **kwargs):
+	role_cache.invalidate_project(instance.user_id, instance.project_id)
+
+
+@receiver(post_save, sender=User)
+def invalidate_user_roles(sender, instance, created, update_fields=None, **kwargs):
+	# is_superuser and is_active feed guardian's checks; skip new users and e.g. last_login updates
+	if created or (update_fields and not {"is_superuser", "is_active"} & set(update_fields)):
+		return
+	role_cache.invalidate_users([instance.pk])
+
+
+@receiver(m2m_changed, sender=User.groups.through)
+def invalidate_group_member_roles(sender, instance, action, reverse, pk_set, **kwargs):
+	if action not in ("post_add", "post_remove", "pre_clear"):
+		return
+	if not reverse:
+		user_ids = [instance.pk]  # user.groups.add(...)
+	elif pk_set is not None:
+		user_ids = pk_set  # group.user_set.add(...)
+	else:
+		user_ids = instance.user_set.values_list("pk", flat=True)  # group.user_set.clear()
+	role_cache.invalidate_users(user_ids)
+
+
+@receiver(pre_delete, sender=Group)
+def invalidate_deleted_group_roles(sender, instance, **kwargs):
+	role_cache.invalidate_users(instance.user_set.values_list("pk", flat=True))
+
+
+@receiver(post_save, sender=GroupObjectPermission)
+@receiver(post_delete, sender=GroupObjectPermission)
+def invalidate_group_document_roles(sender, instance, **kwargs):
+	if instance.content_type_id != ContentType.objects.get_for_model(Document).id:
+		return
+	document_id = int(instance.object_pk)
+	members = User.objects.filter(groups=instance.group_id).values_list("pk", flat=True)
+	role_cache.invalidate_documents((user_id, document_id) for user_id in members)
@@ -1,12 +1,17 @@
 # documents/tasks.py
 
 from celery import shared_task
+from celery.exceptions import SoftTimeLimitExceeded
+from django.conf import settings
 from django.core.mail import send_mail
 from django.utils.timezone import now, timedelta
 
-from documents.models import Document, Comment
+from documents.models import Document, DocumentVersion, Comment
+from documents import extraction, exports
 from core.permissions import get_user_document_role
 
+EXTRACTION_TIME_LIMIT = getattr(settings, "CONTENT_EXTRACTION_TIME_LIMIT", 120)
+
 
 @shared_task
 def send_document_comment_notification(document_id, comment_id):
@@ -38,14 +43,14 @@ def send_periodic_document_reminders():
     This is a placeholder and should be scheduled with Celery beat.
     """
     cutoff = now() - timedelta(days=7)
-    docs = Document.objects.filter(created_at__lt=cutoff)
+    docs = Document.objects.filter(created_at__lt=cutoff).select_related("created_by", "latest_version")
 
-    for doc in docs:
+    for doc in docs.iterator(chunk_size=500):
         owner = doc.created_by
         if not owner or not owner.email:
             continue
 
-        latest = doc.latest_version()
+        latest = doc.latest_version
         version_info = f"Latest version: v{latest.version_number}" if latest else "No versions uploaded."
 
         send_mail(
@@ -54,3 +59,53 @@ def send_periodic_document_reminders():
             from_email="noreply@example.com",
             recipient_list=[owner.email],
         )
+
+
+
+@shared_task(soft_time_limit=EXTRACTION_TIME_LIMIT, time_limit=EXTRACTION_TIME_LIMIT + 30, ignore_result=True)
+def extract_version_text(version_id):
+    """
+    Extract searchable text from one uploaded version's file.
+    """
+    version = DocumentVersion.objects.filter(id=version_id).first()
+    if not version:
+        return None
+    try:
+        return extraction.extract_version(version)
+    except SoftTimeLimitExceeded:
+        extraction.mark_failed(version_id)
+        return "failed"
+
+
+@shared_task(soft_time_limit=EXTRACTION_TIME_LIMIT * 10, time_limit=EXTRACTION_TIME_LIMIT * 10 + 30, ignore_result=True)
+def extract_version_batch(version_ids, time_limit=None):
+    """
+    Backfill helper: extract a batch of versions in one worker round trip.
+    `time_limit` caps each file (seconds) where no soft time limit applies (backfill --sync).
+    """
+    results = {}
+    for version in DocumentVersion.objects.filter(id__in=version_ids):
+        try:
+            results[version.id] = extraction.extract_version(version, time_limit=time_limit)
+        except SoftTimeLimitExceeded:
+            extraction.mark_failed(version.id)
+            results[version.id] = "failed"
+            break
+    return results
+
+
+@shared_task
+def run_export_job(job_id):
+    """
+    Write one queued ExportJob's file into storage (see documents/exports.py).
+    """
+    return exports.run_export(job_id)
+
+
+@shared_task
+def purge_export_jobs():
+    """
+    Delete finished export jobs and their files after EXPORT_JOB_RETENTION_DAYS.
+    Schedule with Celery beat.
+    """
+    return exports.purge_finished_jobs()
@@ -0,0 +1,78 @@
+# documents/tests/test_downloads.py
+
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+from django.test import SimpleTestCase
+
+from documents.importers.downloads import Downloader
+
+BODY = b"x" * 100000
+
+
+class MemoryStorage:
+    def __init__(self):
+        self.files = {}
+        self.deleted = []
+
+    def save(self, file, path):
+        self.files[path] = b"".join(file.chunks())
+        return path
+
+    def delete(self, path):
+        self.deleted.append(path)
+        return self.files.pop(path, None) is not None
+
+
+class TruncatingHandler(BaseHTTPRequestHandler):
+    """Announces the full body but closes after 1,000 bytes, `truncate` times; then serves it whole."""
+
+    truncate = 0
+    requests_seen = 0
+
+    def do_GET(self):
+        cls = type(self)
+        cls.requests_seen += 1
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(BODY)))
+        self.end_headers()
+        if cls.requests_seen <= cls.truncate:
+            self.wfile.write(BODY[:1000])
+            self.wfile.flush()
+            self.close_connection = True
+            return
+        self.wfile.write(BODY)
+
+    def log_message(self, *args):
+        pass
+
+
+class DownloaderRetryTests(SimpleTestCase):
+    def serve(self, truncate):
+        handler = type("Handler", (TruncatingHandler,), {"truncate": truncate, "requests_seen": 0})
+        server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        return handler, f"http://127.0.0.1:{server.server_address[1]}/file.bin"
+
+    def downloader(self, storage):
+        downloader = Downloader(storage=storage, workers=1, retries=2, backoff=0, timeout=5)
+        self.addCleanup(downloader.close)
+        return downloader
+
+    def test_truncated_body_is_retried(self):
+        handler, url = self.serve(truncate=1)
+        storage = MemoryStorage()
+        self.assertEqual(self.downloader(storage).fetch(url, "a/file.bin"), "a/file.bin")
+        self.assertEqual(storage.files["a/file.bin"], BODY)
+        self.assertEqual(handler.requests_seen, 2)
+
+    def test_truncated_body_gives_up_after_retries(self):
+        handler, url = self.serve(truncate=10)
+        storage = MemoryStorage()
+        with self.assertRaises(requests.exceptions.ChunkedEncodingError):
+            self.downloader(storage).fetch(url, "a/file.bin")
+        self.assertEqual(handler.requests_seen, 3)
+        self.assertNotIn("a/file.bin", storage.files)
@@ -0,0 +1,48 @@
+# documents/tests/test_extraction.py
+
+import io
+import time
+import zipfile
+from unittest import mock
+
+from django.test import SimpleTestCase
+
+from documents import extraction
+from documents.signals import _dispatch_extraction
+from documents.tasks import extract_version_text
+
+
+def docx(paragraphs):
+    body = "".join(f"<w:p><w:r><w:t>{text}</w:t></w:r></w:p>" for text in paragraphs)
+    xml = (
+        '<w:document xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main">'
+        f"<w:body>{body}</w:body></w:document>"
+    )
+    fileobj = io.BytesIO()
+    with zipfile.ZipFile(fileobj, "w") as archive:
+        archive.writestr("word/document.xml", xml)
+    fileobj.seek(0)
+    return fileobj
+
+
+class ExtractionDeadlineTests(SimpleTestCase):
+    def test_extracts_within_the_deadline(self):
+        text = extraction.extract_text(docx(["alpha", "beta"]), "a.docx", 1000, deadline=time.monotonic() + 60)
+        self.assertEqual(text.split(), ["alpha", "beta"])
+
+    def test_stops_at_the_deadline(self):
+        with self.assertRaises(extraction.ExtractionTimeout):
+            extraction.extract_text(docx(["alpha"] * 100), "a.docx", 1000, deadline=time.monotonic() - 1)
+
+
+class DispatchExtractionTests(SimpleTestCase):
+    def test_unreachable_broker_does_not_hold_up_the_caller(self):
+        app = extract_version_text.app
+        if app.conf.task_always_eager:
+            self.skipTest("Celery runs tasks eagerly in these settings")
+        connect = app.connection_for_write
+        with mock.patch.object(app, "connection_for_write", lambda: connect("redis://127.0.0.1:1/0")):
+            started = time.monotonic()
+            with self.assertLogs("documents.signals", "WARNING"):
+                _dispatch_extraction(1)
+        self.assertLess(time.monotonic() - started, 0.5)
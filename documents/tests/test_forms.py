@@ -0,0 +1,53 @@
+# documents/tests/test_forms.py
+
+import tempfile
+
+from django.contrib.auth.models import User
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, override_settings
+
+from documents.forms import DocumentUploadForm
+from documents.models import Document
+from projects.models import Project, ProjectMembership
+from storage.factory import get_storage_backend
+
+
+class DocumentUploadFormTests(TestCase):
+    def setUp(self):
+        media_root = tempfile.TemporaryDirectory()
+        self.addCleanup(media_root.cleanup)
+        settings_override = override_settings(MEDIA_ROOT=media_root.name, STORAGE_BACKEND="windows", STORAGE_DEDUPLICATE=False)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        self.user = User.objects.create_user("editor", password="pw")
+        project = Project.objects.create(name="P", created_by=self.user)
+        ProjectMembership.objects.create(project=project, user=self.user, role="owner")
+        self.document = Document.objects.create(project=project, title="Doc", created_by=self.user)
+
+    def form(self):
+        form = DocumentUploadForm(
+            {"notes": "draft"}, {"file": SimpleUploadedFile("v.txt", b"body")}, user=self.user, document=self.document
+        )
+        self.assertTrue(form.is_valid(), form.errors)
+        return form
+
+    def test_save_records_the_next_version(self):
+        version = self.form().save()
+        self.assertEqual((version.version_number, version.notes), (1, "draft"))
+        with get_storage_backend().open(version.file.name) as fh:
+            self.assertEqual(fh.read(), b"body")
+
+    def test_save_without_commit_defers_storing_the_file(self):
+        form = self.form()
+        version = form.save(commit=False)
+        self.assertIsNone(version.pk)
+        self.assertEqual((version.document, version.uploaded_by), (self.document, self.user))
+        self.assertFalse(self.document.versions.exists())
+
+        version.notes = "final"
+        saved = form.save()
+        self.assertIs(saved, version)
+        self.assertEqual((saved.version_number, saved.notes), (1, "final"))
+        with get_storage_backend().open(saved.file.name) as fh:
+            self.assertEqual(fh.read(), b"body")
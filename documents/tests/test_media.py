@@ -0,0 +1,64 @@
+# documents/tests/test_media.py
+
+import os
+import tempfile
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.test import TestCase, override_settings
+
+from config.urls import safe_serve, urlpatterns
+from documents.models import Document
+from projects.models import Project, ProjectMembership
+
+
+class SafeServeTests(TestCase):
+    def setUp(self):
+        media_root = tempfile.TemporaryDirectory()
+        self.addCleanup(media_root.cleanup)
+        settings_override = override_settings(MEDIA_ROOT=media_root.name, STORAGE_BACKEND="windows", FILE_SERVE_MODE="django")
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        # The media route binds document_root when the URLconf is imported
+        media_route = next(pattern for pattern in urlpatterns if getattr(pattern, "callback", None) is safe_serve)
+        root_override = mock.patch.dict(media_route.default_args, {"document_root": media_root.name})
+        root_override.start()
+        self.addCleanup(root_override.stop)
+
+        self.user = User.objects.create_user("member", password="pw")
+        owner = User.objects.create_user("owner", password="pw")
+        own_project = Project.objects.create(name="P1", created_by=owner)
+        other_project = Project.objects.create(name="P2", created_by=owner)
+        ProjectMembership.objects.create(project=own_project, user=self.user, role="viewer")
+        self.own = Document.objects.create(project=own_project, title="Mine", created_by=owner)
+        self.other = Document.objects.create(project=other_project, title="Theirs", created_by=owner)
+        for document, body in ((self.own, b"public"), (self.other, b"TOPSECRET")):
+            path = os.path.join(media_root.name, "documents", str(document.id), "versions", "abc", "s.txt")
+            os.makedirs(os.path.dirname(path))
+            with open(path, "wb") as fh:
+                fh.write(body)
+        self.client.force_login(self.user)
+
+    def get(self, path):
+        response = self.client.get("/media/" + path)
+        body = b"".join(response.streaming_content) if response.status_code == 200 else b""
+        return response.status_code, body
+
+    def test_serves_own_document(self):
+        self.assertEqual(self.get(f"documents/{self.own.id}/versions/abc/s.txt"), (200, b"public"))
+
+    def test_other_project_document_is_refused(self):
+        self.assertEqual(self.get(f"documents/{self.other.id}/versions/abc/s.txt")[0], 404)
+
+    def test_traversal_out_of_an_accessible_document_is_refused(self):
+        for path in (
+            f"documents/{self.own.id}/../../documents/{self.other.id}/versions/abc/s.txt",
+            f"documents/{self.own.id}/../{self.other.id}/versions/abc/s.txt",
+            f"documents/{self.own.id}/versions/..%2F..%2F{self.other.id}/versions/abc/s.txt",
+            f"documents/{self.own.id}/..\\..\\documents\\{self.other.id}\\versions\\abc\\s.txt",
+            f"/documents/{self.other.id}/versions/abc/s.txt",
+        ):
+            with self.subTest(path=path):
+                status, body = self.get(path)
+                self.assertEqual(status, 404)
+                self.assertNotIn(b"TOPSECRET", body)
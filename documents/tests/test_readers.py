@@ -0,0 +1,60 @@
+# documents/tests/test_readers.py
+
+import json
+import os
+import tempfile
+import tracemalloc
+from unittest import mock
+
+from django.test import SimpleTestCase
+
+from documents.importers import readers
+from documents.importers.readers import GraphJsonSource
+
+
+def graph_item(n):
+    return {
+        "id": str(n),
+        "createdDateTime": "2024-01-02T03:04:05Z",
+        "fields": {"Title": f"Doc {n}, \"quoted\" ]}}", "Project_x0020_Name": "Apollo", "Size": n * 1.5},
+        "driveItem": {"name": f"doc{n}.pdf"},
+    }
+
+
+class GraphJsonSourceTests(SimpleTestCase):
+    def write(self, name, page, **dump_kwargs):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        path = os.path.join(directory.name, name)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(page, f, **dump_kwargs)
+        return path
+
+    def test_page_items_match_a_full_parse(self):
+        items = [graph_item(n) for n in range(50)]
+        for page in ({"@odata.context": "ctx", "value": items, "@odata.nextLink": "next"}, items, {"value": []}):
+            for indent in (None, 2):
+                path = self.write("page.json", page, indent=indent)
+                with self.subTest(page=type(page).__name__, indent=indent), mock.patch.object(readers, "JSON_READ_SIZE", 13):
+                    expected = [readers.graph_item_row(item) for item in (page["value"] if isinstance(page, dict) else page)]
+                    self.assertEqual(list(GraphJsonSource(path).rows()), expected)
+
+    def test_large_page_is_streamed(self):
+        items = [graph_item(n) for n in range(20000)]
+        path = self.write("page.json", {"value": items})
+        del items
+        tracemalloc.start()
+        self.addCleanup(tracemalloc.stop)
+        with mock.patch.object(readers, "JSON_READ_SIZE", 64 * 1024):
+            count = sum(1 for _ in GraphJsonSource(path).rows())
+        peak = tracemalloc.get_traced_memory()[1]
+        self.assertEqual(count, 20000)
+        # A few read blocks, not the page (~4 MB of JSON, several times that parsed)
+        self.assertLess(peak, os.path.getsize(path) / 4)
+
+    def test_truncated_page_is_an_error(self):
+        path = self.write("page.json", {"value": [graph_item(1), graph_item(2)]})
+        with open(path, "r+", encoding="utf-8") as f:
+            f.truncate(os.path.getsize(path) - 10)
+        with self.assertRaises(ValueError):
+            list(GraphJsonSource(path).rows())
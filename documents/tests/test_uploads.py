@@ -0,0 +1,125 @@
+# documents/tests/test_uploads.py
+
+import hashlib
+import io
+import tempfile
+
+from django.contrib.auth.models import User
+from django.test import TestCase, override_settings
+
+from documents import uploads
+from documents.models import Document, UploadSession
+from projects.models import Project, ProjectMembership
+from storage.factory import get_storage_backend
+
+DATA = b"0123456789"
+
+
+class BrokenStream:
+    """Hands out `head`, then fails like a client that hung up mid-body."""
+
+    def __init__(self, head):
+        self.head = head
+
+    def read(self, size):
+        if self.head:
+            piece, self.head = self.head, b""
+            return piece
+        raise OSError("connection reset")
+
+
+class ChunkedUploadTests(TestCase):
+    backend = "linux"
+
+    def setUp(self):
+        media_root = tempfile.TemporaryDirectory()
+        self.addCleanup(media_root.cleanup)
+        settings_override = override_settings(MEDIA_ROOT=media_root.name, STORAGE_BACKEND=self.backend, STORAGE_DEDUPLICATE=False)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        self.user = User.objects.create_user("uploader", password="pw")
+        project = Project.objects.create(name="P", created_by=self.user)
+        ProjectMembership.objects.create(project=project, user=self.user, role="owner")
+        self.document = Document.objects.create(project=project, title="Doc", created_by=self.user)
+        self.session = uploads.init_session(self.document, self.user, "s.txt", len(DATA))
+
+    def committed_bytes(self):
+        version = uploads.commit_session(self.session.id, self.user)
+        with get_storage_backend().open(version.file.name) as fh:
+            return fh.read()
+
+    def test_interrupted_chunk_is_cut_off_and_can_be_resent(self):
+        with self.assertRaises(OSError):
+            uploads.append_chunk(self.session.id, self.user, 0, BrokenStream(b"XXX"), len(DATA))
+        session = UploadSession.objects.get(id=self.session.id)
+        self.assertEqual((session.status, session.received_bytes), ("open", 0))
+
+        uploads.append_chunk(self.session.id, self.user, 0, io.BytesIO(DATA), len(DATA))
+        self.assertEqual(self.committed_bytes(), DATA)
+
+    def test_interrupted_later_chunk_keeps_earlier_ones(self):
+        uploads.append_chunk(self.session.id, self.user, 0, io.BytesIO(DATA[:4]), 4)
+        with self.assertRaises(OSError):
+            uploads.append_chunk(self.session.id, self.user, 4, BrokenStream(b"XX"), 6)
+        with self.assertRaises(uploads.UploadError) as raised:
+            uploads.append_chunk(self.session.id, self.user, 4, io.BytesIO(b"XXX"), 6)
+        self.assertEqual(raised.exception.extra["offset"], 4)
+
+        uploads.append_chunk(self.session.id, self.user, 4, io.BytesIO(DATA[4:]), 6)
+        self.assertEqual(self.committed_bytes(), DATA)
+
+    def test_commit_refuses_staged_object_of_the_wrong_size(self):
+        uploads.append_chunk(self.session.id, self.user, 0, io.BytesIO(DATA), len(DATA))
+        get_storage_backend().append(self.session.staging_path, [b"extra"])
+        with self.assertRaises(uploads.UploadError):
+            uploads.commit_session(self.session.id, self.user)
+        self.assertEqual(UploadSession.objects.get(id=self.session.id).status, "aborted")
+        self.assertFalse(self.document.versions.exists())
+
+    def test_direct_sessions_take_no_chunks(self):
+        UploadSession.objects.filter(id=self.session.id).update(mode="direct")
+        with self.assertRaises(uploads.UploadError) as raised:
+            uploads.append_chunk(self.session.id, self.user, 0, io.BytesIO(DATA), len(DATA))
+        self.assertEqual(raised.exception.status, 409)
+
+
+class WindowsChunkedUploadTests(ChunkedUploadTests):
+    backend = "windows"
+
+
+class UnattestedStorage:
+    """A store that keeps no checksums of its own, like Azure behind a SAS upload."""
+
+    def __init__(self, files):
+        self.files = files
+
+    def size(self, path):
+        return len(self.files[path])
+
+    def open(self, path):
+        return io.BytesIO(self.files[path])
+
+    def content_sha256(self, path):
+        return None
+
+
+class DirectUploadVerificationTests(TestCase):
+    def setUp(self):
+        user = User.objects.create_user("uploader", password="pw")
+        project = Project.objects.create(name="P", created_by=user)
+        document = Document.objects.create(project=project, title="Doc", created_by=user)
+        self.session = uploads._new_session(document, user, "d.bin", len(DATA), "", "direct")
+        self.session.checksum = hashlib.sha256(DATA).hexdigest()
+        self.session.save()
+
+    def test_declared_checksum_is_checked_when_the_store_cannot_attest_it(self):
+        storage = UnattestedStorage({self.session.staging_path: b"9876543210"})
+        with self.assertRaises(uploads.UploadError) as raised:
+            uploads._verify_direct_upload(storage, self.session, None)
+        self.assertEqual(raised.exception.status, 422)
+
+    def test_matching_content_passes(self):
+        storage = UnattestedStorage({self.session.staging_path: DATA})
+        uploads._verify_direct_upload(storage, self.session, None)
+        self.assertEqual(UploadSession.objects.get(id=self.session.id).received_bytes, len(DATA))
@@ -0,0 +1,302 @@
+# documents/uploads.py
+
+import hashlib
+import logging
+import re
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.utils.timezone import now
+
+from documents.models import Document, DocumentVersion, UploadSession
+from documents.services import publish_staged_version
+from storage.factory import get_storage_backend
+
+"""
+Resumable Chunked Uploads
+-------------------------
+Three-step protocol for large versions:
+
+1. init:   create an UploadSession (declared filename + total size)
+2. chunk:  append bytes at the session's current offset; a client that lost
+           its connection asks for the session and resumes from `offset`
+3. commit: once every byte has arrived, move the staged object into its
+           version path, then create the DocumentVersion in a short
+           transaction (see commit_session)
+
+Chunks are streamed straight into the storage backend (no temp files, no
+full-request buffering). The checksum is a chained SHA-256 so it can be
+carried across requests/workers:
+
+	checksum_0 = ""
+	checksum_n = sha256(checksum_{n-1} + sha256(chunk_n).hexdigest()).hexdigest()
+
+Clients that want end-to-end verification compute the same chain and pass it
+to commit.
+
+A chunk that fails part-way (short body, client disconnect, checksum
+mismatch) is cut off again, leaving the session at its previous offset for
+the client to resend; on backends that cannot truncate (Azure append blobs)
+the session is aborted instead. Commit also checks the staged object's size.
+
+Direct uploads (object-storage backends) skip step 2 on our side: init
+returns a presigned PUT for the staging object, the client uploads straight
+to the bucket, and commit checks the stored object's size (and SHA-256, when
+declared) before creating the version. No file bytes pass through Django,
+except that a declared SHA-256 the store cannot attest itself (Azure; S3
+multipart objects) is checked by reading the object back.
+"""
+
+logger = logging.getLogger(__name__)
+
+
+class UploadError(Exception):
+	"""Raised for protocol violations; `status` is the HTTP status to report."""
+	def __init__(self, message, status=400, **extra):
+		super().__init__(message)
+		self.status = status
+		self.extra = extra
+
+
+def chain_checksum(previous: str, chunk_digest: str) -> str:
+	return hashlib.sha256((previous + chunk_digest).encode()).hexdigest()
+
+
+SHA256_RE = re.compile(r"^[0-9a-fA-F]{64}$")
+
+
+def max_chunk_size() -> int:
+	return getattr(settings, "UPLOAD_CHUNK_SIZE", 8 * 1024 * 1024)
+
+
+def _new_session(document, user, filename, total_size, notes, mode) -> UploadSession:
+	filename = filename.replace("\\", "/").rsplit("/", 1)[-1]
+	if not filename:
+		raise UploadError("Filename required.")
+	if total_size <= 0:
+		raise UploadError("Size must be positive.")
+	max_size = getattr(settings, "UPLOAD_MAX_SIZE", None)
+	if max_size and total_size > max_size:
+		raise UploadError("File too large.", status=413)
+
+	session = UploadSession(document=document, user=user, filename=filename, total_size=total_size, notes=notes, mode=mode)
+	session.staging_path = f"uploads/{session.id}/{filename}"
+	return session
+
+
+def init_session(document: Document, user, filename: str, total_size: int, notes: str = "") -> UploadSession:
+	if not get_storage_backend().supports_append:
+		raise UploadError("Chunked uploads are not supported by the configured storage backend.", status=501)
+	session = _new_session(document, user, filename, total_size, notes, "chunked")
+	session.save()
+	return session
+
+
+def init_direct_session(document: Document, user, filename: str, total_size: int, notes: str = "",
+						content_type: str | None = None, sha256: str | None = None) -> tuple[UploadSession, dict]:
+	"""
+	Opens a direct-to-storage session. Returns the session and the presigned
+	upload target ({"method", "url", "headers"}) the client must use.
+	"""
+	storage = get_storage_backend()
+	if not storage.supports_presigned_upload:
+		raise UploadError("Direct uploads are not supported by the configured storage backend.", status=501)
+	if sha256 and not SHA256_RE.match(sha256):
+		raise UploadError("sha256 must be 64 hex characters.")
+
+	session = _new_session(document, user, filename, total_size, notes, "direct")
+	session.checksum = (sha256 or "").lower()
+	target = storage.presign_upload(session.staging_path, total_size, content_type=content_type, sha256=session.checksum or None)
+	session.save()
+	return session, target
+
+
+def _read_stream(stream, limit, digest, piece_size=64 * 1024):
+	"""Yields at most `limit` bytes from a file-like stream, feeding `digest` as it goes."""
+	remaining = limit
+	while remaining > 0:
+		piece = stream.read(min(piece_size, remaining))
+		if not piece:
+			break
+		digest.update(piece)
+		remaining -= len(piece)
+		yield piece
+
+
+def append_chunk(session_id, user, offset: int, stream, length: int, expected_sha256: str | None = None) -> UploadSession:
+	"""
+	Appends one chunk read from `stream` (e.g. the request body) at `offset`.
+	Requests for an offset other than the current one are rejected with 409
+	and the current offset, so clients can resume.
+	"""
+	storage = get_storage_backend()
+	if length <= 0 or length > max_chunk_size():
+		raise UploadError(f"Chunk length must be between 1 and {max_chunk_size()} bytes.", status=413)
+
+	failed = error = None
+	with transaction.atomic():
+		# Row lock serializes concurrent chunks for the same session
+		session = UploadSession.objects.select_for_update().filter(id=session_id, user=user).first()
+		if not session:
+			raise UploadError("Upload session not found.", status=404)
+		if session.status != "open":
+			raise UploadError(f"Upload session is {session.status}.", status=409)
+		if session.mode != "chunked":
+			raise UploadError("Direct upload sessions take no chunks.", status=409)
+		if offset != session.received_bytes:
+			raise UploadError("Offset mismatch.", status=409, offset=session.received_bytes)
+		if session.received_bytes + length > session.total_size:
+			raise UploadError("Chunk exceeds declared size.", status=413)
+
+		digest = hashlib.sha256()
+		try:
+			written = storage.append(session.staging_path, _read_stream(stream, length, digest))
+		except Exception as e:
+			# Client gone or read/storage error mid-chunk: part of it may be stored
+			error, written = e, None
+		if written != length or (expected_sha256 and digest.hexdigest() != expected_sha256.lower()):
+			# The object may have a bad tail. Cut it back to the last whole chunk so the
+			# client can resend from `offset`; where the backend can't, abort the session.
+			failed = True
+			if not _truncate(storage, session):
+				session.status = "aborted"
+		else:
+			session.received_bytes += written
+			session.checksum = chain_checksum(session.checksum, digest.hexdigest())
+		session.save(update_fields=["status", "received_bytes", "checksum", "updated_at"])
+
+	if failed:
+		if session.status == "aborted":
+			storage.delete(session.staging_path)
+		if error is not None:
+			raise error
+		if session.status == "aborted":
+			raise UploadError("Chunk incomplete or checksum mismatch; session aborted.", status=422)
+		raise UploadError("Chunk incomplete or checksum mismatch; resend it.", status=422, offset=session.received_bytes)
+	return session
+
+
+def _truncate(storage, session) -> bool:
+	"""Drops whatever a failed chunk left behind the session's offset. False if that isn't possible."""
+	if not storage.supports_truncate:
+		return False
+	try:
+		storage.truncate(session.staging_path, session.received_bytes)
+	except FileNotFoundError:
+		# First chunk, nothing stored yet
+		return True
+	except Exception:
+		logger.exception("Could not truncate upload %s after a failed chunk", session.id)
+		return False
+	return True
+
+
+def commit_session(session_id, user, expected_checksum: str | None = None) -> DocumentVersion:
+	"""
+	Turns a complete upload into the document's next version. For chunked
+	sessions `expected_checksum` is the chained checksum; for direct sessions
+	it is the plain SHA-256 of the file.
+
+	The session is claimed ("committing") in a short transaction. Verifying
+	the object and moving it into place (a server-side copy on object
+	storage, a hash with STORAGE_DEDUPLICATE) then run outside any
+	transaction, so the document's version counter is only locked for the
+	number allocation and the INSERT. On failure the session is reopened.
+	"""
+	storage = get_storage_backend()
+	with transaction.atomic():
+		session = UploadSession.objects.select_for_update().select_related("document").filter(id=session_id, user=user).first()
+		if not session:
+			raise UploadError("Upload session not found.", status=404)
+		if session.status != "open":
+			raise UploadError(f"Upload session is {session.status}.", status=409)
+		if session.mode == "chunked":
+			if session.received_bytes != session.total_size:
+				raise UploadError("Upload incomplete.", status=409, offset=session.received_bytes)
+			if expected_checksum and expected_checksum.lower() != session.checksum:
+				raise UploadError("Checksum mismatch.", status=422)
+		session.status = "committing"
+		session.save(update_fields=["status", "updated_at"])
+
+	def committed(version):
+		session.status = "committed"
+		session.version = version
+		session.save(update_fields=["status", "version", "updated_at"])
+
+	try:
+		if session.mode == "direct":
+			_verify_direct_upload(storage, session, expected_checksum)
+		else:
+			_verify_chunked_upload(storage, session)
+		return publish_staged_version(
+			session.document, session.staging_path, session.filename, user, session.notes, storage, on_created=committed
+		)
+	except BaseException:
+		UploadSession.objects.filter(id=session.id, status="committing").update(status="open", updated_at=now())
+		raise
+
+
+def _verify_chunked_upload(storage, session) -> None:
+	"""Checks that the staged object holds exactly the bytes the session accounted for."""
+	try:
+		size = storage.size(session.staging_path)
+	except Exception:
+		size = None
+	if size != session.total_size:
+		# received_bytes says complete but the object disagrees: its content can't be trusted
+		UploadSession.objects.filter(id=session.id, status="committing").update(status="aborted", updated_at=now())
+		storage.delete(session.staging_path)
+		raise UploadError("Staged upload does not match the declared size; session aborted.", status=422, size=size)
+
+
+def _verify_direct_upload(storage, session, expected_checksum) -> None:
+	"""Checks the object the client put in storage against what the session declared."""
+	try:
+		size = storage.size(session.staging_path)
+	except Exception:
+		raise UploadError("Uploaded object not found.", status=409)
+	if size != session.total_size:
+		raise UploadError("Uploaded size does not match the declared size.", status=422, size=size)
+
+	declared = {c.lower() for c in (session.checksum, expected_checksum) if c}
+	if declared:
+		if len(declared) > 1:
+			raise UploadError("Checksum mismatch.", status=422)
+		stored = storage.content_sha256(session.staging_path)
+		if stored is None:
+			# The store can't vouch for the content (e.g. Azure SAS uploads): hash it ourselves
+			digest = hashlib.sha256()
+			with storage.open(session.staging_path) as source:
+				for piece in iter(lambda: source.read(1024 * 1024), b""):
+					digest.update(piece)
+			stored = digest.hexdigest()
+		if stored not in declared:
+			raise UploadError("Checksum mismatch.", status=422)
+		session.checksum = declared.pop()
+	session.received_bytes = size
+	session.save(update_fields=["checksum", "received_bytes", "updated_at"])
+
+
+def abort_session(session_id, user) -> None:
+	with transaction.atomic():
+		session = UploadSession.objects.select_for_update().filter(id=session_id, user=user, status="open").first()
+		if not session:
+			raise UploadError("Upload session not found.", status=404)
+		session.status = "aborted"
+		session.save(update_fields=["status", "updated_at"])
+	get_storage_backend().delete(session.staging_path)
+
+
+def expire_sessions(max_age: timedelta) -> int:
+	"""Aborts open (or stuck committing) sessions idle for longer than `max_age` and deletes their staged data."""
+	storage = get_storage_backend()
+	# "committing" sessions this old were left behind by a worker that died mid-commit
+	stale = UploadSession.objects.filter(status__in=("open", "committing"), updated_at__lt=now() - max_age)
+	count = 0
+	for session in stale.iterator():
+		storage.delete(session.staging_path)
+		session.status = "aborted"
+		session.save(update_fields=["status", "updated_at"])
+		count += 1
+	return count
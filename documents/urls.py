@@ -6,6 +6,8 @@ from documents.views import document, share, comment
 from auditlog.views import audit_log_filtered_view 
 from documents.views.document import inline_update_document
 from documents.views import access
+from documents.views import upload
+from documents.views import exports
 
 app_name = "documents"
 
@@ -21,10 +23,24 @@ urlpatterns = [
     # Upload a new version
     path("<int:doc_id>/upload/", document.upload_version, name="upload"),
 
+    # Resumable chunked uploads (init / chunk / commit) and presigned direct-to-storage uploads (init / commit)
+    path("<int:doc_id>/uploads/", upload.init_upload, name="upload_init"),
+    path("<int:doc_id>/uploads/direct/", upload.init_direct_upload, name="upload_init_direct"),
+    path("uploads/<uuid:upload_id>/", upload.upload_status, name="upload_status"),
+    path("uploads/<uuid:upload_id>/chunk/", upload.upload_chunk, name="upload_chunk"),
+    path("uploads/<uuid:upload_id>/commit/", upload.commit_upload, name="upload_commit"),
+
+    # Background export jobs (audit logs, project inventories)
+    path("exports/", exports.start_export, name="export_start"),
+    path("exports/<uuid:job_id>/", exports.export_job, name="export_job"),
+    path("exports/<uuid:job_id>/status/", exports.export_job_status, name="export_status"),
+    path("exports/<uuid:job_id>/download/", exports.export_download, name="export_download"),
+
     # Share/unshare/change-role (POST only)
     path("<int:document_id>/share/", share.share_document_view, name="share"),
     path("<int:document_id>/unshare/", share.unshare_document_view, name="unshare"),
     path("<int:document_id>/change-role/", share.change_role_view, name="change_role"),
+    path("share/bulk/", share.bulk_share_view, name="bulk_share"),
 
     # Comments
     path("<int:document_id>/comment/", comment.post_comment, name="comment"),
@@ -2,10 +2,11 @@
 
 from django.shortcuts import get_object_or_404, render, redirect
 from django.contrib.auth.decorators import login_required
+from asgiref.sync import sync_to_async
 from django.http import HttpResponseForbidden, JsonResponse
 from documents.models import Document
 from documents.forms import DocumentUploadForm, DocumentForm
-from core.permissions import (can_edit_document, has_document_role, get_user_document_role,can_comment_on_document, can_manage_permissions)
+from core.permissions import (can_edit_document, has_document_role, get_user_document_role,can_comment_on_document, can_manage_permissions, resolve_document_roles)
 from projects.models import ProjectMembership
 from core.permissions import get_user_document_role, can_edit_document, can_comment_on_document
 from django.contrib import messages
@@ -14,6 +15,11 @@ from projects.models import Project
 from django.views.decorators.http import require_POST
 from django.views.decorators.csrf import csrf_protect
 from django.urls import reverse
+from core.pagination import paginate_request
+from core.async_views import aget_object_or_404, async_login_required
+from documents.search import search_documents
+
+DOCUMENT_SORT_FIELDS = {"created": "created_at", "title": "title"}
 
 @login_required
 def document_list(request):
@@ -23,6 +29,7 @@ def document_list(request):
 	queryset = Document.objects.filter(active=True, project__memberships__user=user).distinct()
 
 	# === Filtering logic ===
+	search_query = request.GET.get("q", "").strip()
 	title_query = request.GET.get("title", "").strip()
 	project_id = request.GET.get("project")
 	uploaded_by_id = request.GET.get("uploaded_by")
@@ -34,28 +41,34 @@ def document_list(request):
 	if uploaded_by_id:
 		queryset = queryset.filter(created_by_id=uploaded_by_id)
 
-	# Preload all user memberships
-	memberships = ProjectMembership.objects.filter(user=request.user).select_related("project")
-	membership_map = {m.project_id: m.role for m in memberships}
-
-	# Role per document based on project
-	user_roles = {doc.id: membership_map.get(doc.project_id, "member") for doc in queryset}
-
-	# Permission flags (for template use)
-	can_edit = {doc.id: can_edit_document(request.user, doc) for doc in queryset}
-	can_comment = {doc.id: can_comment_on_document(request.user, doc) for doc in queryset}
+	if search_query:
+		# Ranked full-text results (top SEARCH_RESULT_LIMIT), permission-filtered in the same query
+		page = None
+		documents = search_documents(user, search_query, project_id=project_id, created_by_id=uploaded_by_id)
+	else:
+		# One keyset page; roles and flags are resolved in bulk for it
+		page = paginate_request(request, queryset.select_related("project", "created_by", "latest_version"), sort_fields=DOCUMENT_SORT_FIELDS)
+		documents = page.object_list
+	access = resolve_document_roles(user, documents)
+
+	# Permission maps (for template use)
+	user_roles = {doc_id: flags["role"] or "member" for doc_id, flags in access.items()}
+	can_edit = {doc_id: flags["can_edit"] for doc_id, flags in access.items()}
+	can_comment = {doc_id: flags["can_comment"] for doc_id, flags in access.items()}
 
 	# For dropdowns
 	accessible_projects = Project.objects.filter(id__in=queryset.values("project_id"))
 	uploading_users = User.objects.filter(id__in=queryset.values("created_by_id"))
 	
 	return render(request, "documents/document_list.html", {
-		"documents": queryset.select_related("project", "created_by"),
+		"documents": documents,
+		"page": page,
 		"user_roles": user_roles,
 		"can_edit": can_edit,
 		"can_comment": can_comment,
 		"projects": accessible_projects,
 		"users": uploading_users,
+		"search_query": search_query,
 		"title_query": title_query,
 		"project_id": project_id,
 		"uploaded_by_id": uploaded_by_id,
@@ -130,25 +143,28 @@ def document_detail(request, doc_id):
 		"members": members,
 	})
 
-@login_required
-def upload_version(request, doc_id):
+@async_login_required
+async def upload_version(request, doc_id):
     """
     Upload a new version of an existing document.
+    Async: the file is written through the storage backend's async API.
     """
-    document = get_object_or_404(Document, id=doc_id)
+    document = await aget_object_or_404(Document.objects, id=doc_id)
 
-    if not can_edit_document(request.user, document):
+    if not await sync_to_async(can_edit_document)(request.user, document):
         return HttpResponseForbidden("You do not have permission to upload to this document.")
 
     if request.method == "POST":
-        form = DocumentUploadForm(request.POST, request.FILES, user=request.user, document=document)
-        if form.is_valid():
-            form.save()
+        # Multipart parsing spools to disk; keep it off the event loop
+        data, files = await sync_to_async(lambda: (request.POST, request.FILES), thread_sensitive=False)()
+        form = DocumentUploadForm(data, files, user=request.user, document=document)
+        if await sync_to_async(form.is_valid)():
+            await form.asave()
             return redirect("documents:detail", doc_id=document.id)
     else:
         form = DocumentUploadForm(user=request.user, document=document)
 
-    return render(request, "documents/upload_version.html", {
+    return await sync_to_async(render)(request, "documents/upload_version.html", {
         "form": form,
         "document": document,
     })
@@ -0,0 +1,122 @@
+# documents/views/exports.py
+
+from django.conf import settings
+from django.contrib.auth.decorators import login_required
+from django.http import Http404, HttpResponseRedirect, JsonResponse
+from django.shortcuts import get_object_or_404, redirect, render
+from django.urls import reverse
+from django.views.decorators.http import require_GET, require_POST
+from core.exports import ExportUnavailable
+from core.file_serving import serve_file
+from core.permissions import can_manage_permissions
+from documents import exports
+from documents.models import Document, ExportJob
+from projects.models import Project, ProjectMembership
+from storage.factory import get_storage_backend
+
+
+def _can_export(user, project, document):
+	"""Audit logs: whoever manages the document's permissions; project exports: project owners."""
+	if document is not None:
+		return can_manage_permissions(user, document)
+	if user.is_superuser:
+		return True
+	return ProjectMembership.objects.filter(project=project, user=user, role="owner").exists()
+
+
+def _job_or_404(user, job_id):
+	job = get_object_or_404(ExportJob.objects.select_related("project", "document"), id=job_id)
+	if not _can_export(user, job.project, job.document):
+		raise Http404("Export not found.")
+	return job
+
+
+def _job_payload(job):
+	return {
+		"job_id": str(job.id),
+		"kind": job.kind,
+		"format": job.format,
+		"gzip": job.gzip,
+		"status": job.status,
+		"rows_total": job.rows_total,
+		"rows_done": job.rows_done,
+		"progress": job.progress,
+		"size": job.size,
+		"error": job.error,
+		"download_url": reverse("documents:export_download", args=[job.id]) if job.status == "done" else None,
+	}
+
+
+def _wants_json(request):
+	return "application/json" in request.headers.get("Accept", "")
+
+
+@require_POST
+@login_required
+def start_export(request):
+	"""
+	POST /documents/exports/
+	Params: kind ("audit" or "inventory"), document_id (audit log of one
+	document) or project_id, format (csv, jsonl, parquet), gzip (optional)
+	Joins an identical export already in progress. Redirects to the job page,
+	or returns the job as JSON when the client accepts JSON.
+	"""
+	kind = request.POST.get("kind", "")
+	document = project = None
+	if kind == "audit" and request.POST.get("document_id"):
+		document = get_object_or_404(Document, id=request.POST["document_id"], active=True)
+	else:
+		project = get_object_or_404(Project, id=request.POST.get("project_id") or 0, active=True)
+	if not _can_export(request.user, project, document):
+		return JsonResponse({"error": "Permission denied"}, status=403)
+
+	try:
+		job, created = exports.request_export(
+			request.user, kind,
+			fmt=request.POST.get("format", "csv").strip().lower(),
+			gzip=request.POST.get("gzip", "").lower() in ("1", "true", "yes", "on"),
+			project=project,
+			document=document,
+		)
+	except ValueError as e:
+		return JsonResponse({"error": str(e)}, status=400)
+	except ExportUnavailable as e:
+		return JsonResponse({"error": str(e)}, status=501)
+
+	if _wants_json(request):
+		return JsonResponse({**_job_payload(job), "created": created}, status=202)
+	return redirect("documents:export_job", job_id=job.id)
+
+
+@require_GET
+@login_required
+def export_job(request, job_id):
+	"""GET /documents/exports/<uuid>/ - progress page, refreshing itself until the file is ready."""
+	job = _job_or_404(request.user, job_id)
+	return render(request, "documents/export_job.html", {"job": job, "payload": _job_payload(job)})
+
+
+@require_GET
+@login_required
+def export_job_status(request, job_id):
+	"""GET /documents/exports/<uuid>/status/"""
+	return JsonResponse(_job_payload(_job_or_404(request.user, job_id)))
+
+
+@require_GET
+@login_required
+def export_download(request, job_id):
+	"""GET /documents/exports/<uuid>/download/"""
+	job = _job_or_404(request.user, job_id)
+	if job.status != "done":
+		raise Http404("Export not ready.")
+	storage = get_storage_backend()
+	if storage.presigned_urls:
+		return HttpResponseRedirect(storage.url(job.output_path))
+	response = serve_file(request, storage.resolve(job.output_path), settings.MEDIA_ROOT, filename=job.filename)
+	if response.has_header("Content-Encoding"):
+		# A .gz download is the file itself, not a transfer encoding for the browser to undo
+		del response["Content-Encoding"]
+		response["Content-Type"] = "application/gzip"
+	response["Content-Disposition"] = f'attachment; filename="{job.filename}"'
+	return response
@@ -1,26 +1,27 @@
 # documents/views/share.py
 
+import json
+
+from asgiref.sync import sync_to_async
 from django.contrib.auth.models import User
 from django.http import JsonResponse
-from django.views.decorators.http import require_POST
-from django.views.decorators.csrf import csrf_exempt
-from django.shortcuts import get_object_or_404
 from documents.models import Document
-from documents.services import share_document, unshare_document, change_document_role
-from core.permissions import can_manage_permissions
+from documents.services import share_document, unshare_document, change_document_role, bulk_update_access
+from core.permissions import can_manage_permissions, resolve_document_roles
+from core.async_views import aget_object_or_404, aget_user, async_csrf_exempt, async_login_required, async_require_POST
 
 
-@csrf_exempt
-@require_POST
-def share_document_view(request, document_id):
+@async_csrf_exempt
+@async_require_POST
+async def share_document_view(request, document_id):
     """
     POST /documents/<id>/share/
     Params: target_username, role
     """
-    user = request.user
-    doc = get_object_or_404(Document, pk=document_id)
+    user = await aget_user(request)
+    doc = await aget_object_or_404(Document.objects, pk=document_id)
 
-    if not can_manage_permissions(user, doc):
+    if not await sync_to_async(can_manage_permissions)(user, doc):
         return JsonResponse({'error': 'Forbidden'}, status=403)
 
     target_username = request.POST.get("target_username")
@@ -29,52 +30,52 @@ def share_document_view(request, document_id):
     if not target_username or not role:
         return JsonResponse({'error': 'Missing parameters'}, status=400)
 
-    target = get_object_or_404(User, username=target_username)
+    target = await aget_object_or_404(User.objects, username=target_username)
 
     try:
-        share_document(doc, user, target, role)
+        await sync_to_async(share_document)(doc, user, target, role)
         return JsonResponse({'status': 'shared', 'user': target.username, 'role': role})
     except Exception as e:
         return JsonResponse({'error': str(e)}, status=400)
 
 
-@csrf_exempt
-@require_POST
-def unshare_document_view(request, document_id):
+@async_csrf_exempt
+@async_require_POST
+async def unshare_document_view(request, document_id):
     """
     POST /documents/<id>/unshare/
     Params: target_username
     """
-    user = request.user
-    doc = get_object_or_404(Document, pk=document_id)
+    user = await aget_user(request)
+    doc = await aget_object_or_404(Document.objects, pk=document_id)
 
-    if not can_manage_permissions(user, doc):
+    if not await sync_to_async(can_manage_permissions)(user, doc):
         return JsonResponse({'error': 'Forbidden'}, status=403)
 
     target_username = request.POST.get("target_username")
     if not target_username:
         return JsonResponse({'error': 'Missing target_username'}, status=400)
 
-    target = get_object_or_404(User, username=target_username)
+    target = await aget_object_or_404(User.objects, username=target_username)
 
     try:
-        unshare_document(doc, user, target)
+        await sync_to_async(unshare_document)(doc, user, target)
         return JsonResponse({'status': 'unshared', 'user': target.username})
     except Exception as e:
         return JsonResponse({'error': str(e)}, status=400)
 
 
-@csrf_exempt
-@require_POST
-def change_role_view(request, document_id):
+@async_csrf_exempt
+@async_require_POST
+async def change_role_view(request, document_id):
     """
     POST /documents/<id>/change-role/
     Params: target_username, new_role
     """
-    user = request.user
-    doc = get_object_or_404(Document, pk=document_id)
+    user = await aget_user(request)
+    doc = await aget_object_or_404(Document.objects, pk=document_id)
 
-    if not can_manage_permissions(user, doc):
+    if not await sync_to_async(can_manage_permissions)(user, doc):
         return JsonResponse({'error': 'Forbidden'}, status=403)
 
     target_username = request.POST.get("target_username")
@@ -83,10 +84,67 @@ def change_role_view(request, document_id):
     if not target_username or not new_role:
         return JsonResponse({'error': 'Missing parameters'}, status=400)
 
-    target = get_object_or_404(User, username=target_username)
+    target = await aget_object_or_404(User.objects, username=target_username)
 
     try:
-        change_document_role(doc, user, target, new_role)
+        await sync_to_async(change_document_role)(doc, user, target, new_role)
         return JsonResponse({'status': 'role_changed', 'user': target.username, 'role': new_role})
     except Exception as e:
         return JsonResponse({'error': str(e)}, status=400)
+
+
+def _bulk_params(request) -> dict:
+    """The bulk share parameters from the JSON body."""
+    data = json.loads(request.body or b"{}")
+    if not isinstance(data, dict):
+        raise ValueError("Expected a JSON object")
+    return data
+
+
+@async_require_POST
+@async_login_required
+async def bulk_share_view(request):
+    """
+    POST /documents/share/bulk/ (JSON body, CSRF token required)
+    Params: usernames, document_ids, role, remove
+    Gives every user `role` on every document, or revokes all their roles
+    with remove=true. Returns the pair counts per action.
+
+    Documents that do not exist and documents the caller cannot manage get
+    the same 403, and unknown usernames are only reported after that check,
+    so the endpoint tells nobody else what exists.
+    """
+    if request.content_type != "application/json":
+        return JsonResponse({'error': 'Expected an application/json body'}, status=415)
+    try:
+        params = _bulk_params(request)
+        usernames = params.get("usernames") or []
+        if not all(isinstance(name, str) for name in usernames):
+            raise ValueError("usernames must be strings")
+        usernames = set(usernames)
+        document_ids = {int(i) for i in params.get("document_ids") or []}
+    except (ValueError, TypeError) as e:
+        return JsonResponse({'error': f'Invalid parameters: {e}'}, status=400)
+    remove = params.get("remove") is True
+    role = params.get("role")
+
+    if not usernames or not document_ids or not (role or remove):
+        return JsonResponse({'error': 'Missing parameters'}, status=400)
+
+    docs = [d async for d in Document.objects.filter(id__in=document_ids, active=True)]
+    access = await sync_to_async(resolve_document_roles)(request.user, docs)
+    if len(docs) != len(document_ids) or not all(access[d.id]["can_manage"] for d in docs):
+        return JsonResponse({'error': 'Forbidden'}, status=403)
+
+    targets = [u async for u in User.objects.filter(username__in=usernames)]
+    missing_users = sorted(usernames - {u.username for u in targets})
+    if missing_users:
+        return JsonResponse({'error': 'Users not found', 'usernames': missing_users}, status=404)
+
+    try:
+        counts = await sync_to_async(bulk_update_access)(request.user, docs, targets, role=role, remove=remove)
+    except PermissionError:
+        return JsonResponse({'error': 'Forbidden'}, status=403)
+    except ValueError as e:
+        return JsonResponse({'error': str(e)}, status=400)
+    return JsonResponse({'status': 'unshared' if remove else 'shared', 'role': None if remove else role, **counts})
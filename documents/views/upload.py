@@ -0,0 +1,143 @@
+# documents/views/upload.py
+
+from django.contrib.auth.decorators import login_required
+from django.http import JsonResponse
+from django.shortcuts import get_object_or_404
+from django.views.decorators.http import require_GET, require_http_methods, require_POST
+from documents.models import Document, UploadSession
+from documents import uploads
+from core.permissions import can_edit_document
+
+
+def _session_payload(session):
+	return {
+		"upload_id": str(session.id),
+		"status": session.status,
+		"filename": session.filename,
+		"size": session.total_size,
+		"offset": session.received_bytes,
+		"mode": session.mode,
+		"checksum": session.checksum,
+		"chunk_size": uploads.max_chunk_size(),
+	}
+
+
+def _error(e):
+	return JsonResponse({"error": str(e), **e.extra}, status=e.status)
+
+
+@require_POST
+@login_required
+def init_upload(request, doc_id):
+	"""
+	POST /documents/<id>/uploads/
+	Params: filename, size, notes (optional)
+	"""
+	document = get_object_or_404(Document, id=doc_id, active=True)
+	if not can_edit_document(request.user, document):
+		return JsonResponse({"error": "Permission denied"}, status=403)
+
+	try:
+		size = int(request.POST.get("size", ""))
+	except ValueError:
+		return JsonResponse({"error": "Size required"}, status=400)
+
+	try:
+		session = uploads.init_session(
+			document, request.user, request.POST.get("filename", ""), size, notes=request.POST.get("notes", "")
+		)
+	except uploads.UploadError as e:
+		return _error(e)
+	return JsonResponse(_session_payload(session), status=201)
+
+
+@require_POST
+@login_required
+def init_direct_upload(request, doc_id):
+	"""
+	POST /documents/<id>/uploads/direct/
+	Params: filename, size, content_type (optional), sha256 (optional, hex)
+	Returns the session plus an `upload` target: PUT the file to upload.url with
+	upload.headers, then POST /documents/uploads/<uuid>/commit/.
+	"""
+	document = get_object_or_404(Document, id=doc_id, active=True)
+	if not can_edit_document(request.user, document):
+		return JsonResponse({"error": "Permission denied"}, status=403)
+
+	try:
+		size = int(request.POST.get("size", ""))
+	except ValueError:
+		return JsonResponse({"error": "Size required"}, status=400)
+
+	try:
+		session, target = uploads.init_direct_session(
+			document, request.user, request.POST.get("filename", ""), size,
+			notes=request.POST.get("notes", ""),
+			content_type=request.POST.get("content_type") or None,
+			sha256=request.POST.get("sha256") or None,
+		)
+	except uploads.UploadError as e:
+		return _error(e)
+	return JsonResponse({**_session_payload(session), "upload": target}, status=201)
+
+
+@require_http_methods(["GET", "DELETE"])
+@login_required
+def upload_status(request, upload_id):
+	"""
+	GET    /documents/uploads/<uuid>/  -> current offset (resume point)
+	DELETE /documents/uploads/<uuid>/  -> abort and discard staged bytes
+	"""
+	if request.method == "DELETE":
+		try:
+			uploads.abort_session(upload_id, request.user)
+		except uploads.UploadError as e:
+			return _error(e)
+		return JsonResponse({"status": "aborted"})
+
+	session = get_object_or_404(UploadSession, id=upload_id, user=request.user)
+	return JsonResponse(_session_payload(session))
+
+
+@require_http_methods(["PUT", "PATCH"])
+@login_required
+def upload_chunk(request, upload_id):
+	"""
+	PUT /documents/uploads/<uuid>/chunk/
+	Body: raw chunk bytes
+	Headers: Upload-Offset, Content-Length, X-Chunk-SHA256 (optional)
+	"""
+	try:
+		offset = int(request.headers.get("Upload-Offset", ""))
+		length = int(request.headers.get("Content-Length", ""))
+	except ValueError:
+		return JsonResponse({"error": "Upload-Offset and Content-Length headers required"}, status=400)
+
+	try:
+		# Stream from the request instead of request.body so the chunk is never buffered whole
+		session = uploads.append_chunk(
+			upload_id, request.user, offset, request, length,
+			expected_sha256=request.headers.get("X-Chunk-SHA256"),
+		)
+	except uploads.UploadError as e:
+		return _error(e)
+	return JsonResponse(_session_payload(session))
+
+
+@require_POST
+@login_required
+def commit_upload(request, upload_id):
+	"""
+	POST /documents/uploads/<uuid>/commit/
+	Params: checksum (optional; chained SHA-256 for chunked sessions, plain
+	SHA-256 of the file for direct ones, see documents/uploads.py)
+	"""
+	session = get_object_or_404(UploadSession, id=upload_id, user=request.user)
+	if not can_edit_document(request.user, session.document):
+		return JsonResponse({"error": "Permission denied"}, status=403)
+
+	try:
+		version = uploads.commit_session(upload_id, request.user, expected_checksum=request.POST.get("checksum"))
+	except uploads.UploadError as e:
+		return _error(e)
+	return JsonResponse({"status": "committed", "version_number": version.version_number, "version_id": version.id})
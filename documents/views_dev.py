@@ -20,6 +20,6 @@ def switch_role(request, project_id, role):
 
 	membership, _ = ProjectMembership.objects.get_or_create(user=request.user, project_id=project_id)
 	membership.role = role
-	membership.save()
+	membership.save()  # the role cache is invalidated by documents/signals.py
 	messages.success(request, f"Switched role to {role}")
 	return redirect("documents:list")
@@ -8,7 +8,8 @@ from django.contrib import messages
 from django.http import JsonResponse
 from django.contrib.auth.models import User
 from django.views.decorators.http import require_POST
-from auditlog.models import ShareActionLog
+from auditlog import writer as audit
+from core.pagination import paginate_request
 
 @login_required
 def project_list(request):
@@ -30,7 +31,7 @@ def project_detail(request, project_id):
 	user_role = membership.role if membership else None
 
 	members = ProjectMembership.objects.filter(project=project).select_related("user")
-	documents = project.documents.all()
+	documents = paginate_request(request, project.documents.all(), sort_fields={"created": "created_at", "title": "title"})
 
 	from django.contrib.auth.models import User
 	all_users = User.objects.exclude(id=request.user.id).order_by("username")
@@ -139,7 +140,7 @@ def update_project_access(request, project_id):
 		if entry:
 			entry.delete()
 			
-			ShareActionLog.objects.create(
+			audit.record(
 				actor=request.user,
 				target_user=target_user,
 				project=project,
@@ -159,7 +160,7 @@ def update_project_access(request, project_id):
 	entry.save()
 	
 	action = "shared" if created else "role_changed"
-	ShareActionLog.objects.create(
+	audit.record(
 		actor=request.user,
 		target_user=target_user,
 		project=project,
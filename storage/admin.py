@@ -0,0 +1,18 @@
+# storage/admin.py
+
+from django.contrib import admin
+from storage.models import Blob, BlobReference
+
+
+@admin.register(Blob)
+class BlobAdmin(admin.ModelAdmin):
+    list_display = ("digest", "size", "ref_count", "created_at")
+    search_fields = ("digest",)
+    ordering = ("-created_at",)
+
+
+@admin.register(BlobReference)
+class BlobReferenceAdmin(admin.ModelAdmin):
+    list_display = ("path", "blob", "created_at")
+    search_fields = ("path", "blob__digest")
+    ordering = ("-created_at",)
@@ -1,9 +1,11 @@
+import io
+from datetime import datetime, timedelta, timezone
 from storage.base import StorageBackend
-# from azure.storage.blob import BlobServiceClient
 from django.conf import settings
 
 class AzureStorage(StorageBackend):
 	def __init__(self):
+		from azure.storage.blob import BlobServiceClient  # optional dependency, only needed for this backend
 		self.client = BlobServiceClient.from_connection_string(settings.AZURE_STORAGE_CONNECTION_STRING)
 		self.container = settings.AZURE_CONTAINER
 
@@ -17,5 +19,98 @@ class AzureStorage(StorageBackend):
 		blob_client.delete_blob()
 		return True
 
+	def open(self, path):
+		blob_client = self.client.get_blob_client(container=self.container, blob=path)
+		stream = blob_client.download_blob()
+		return _BlobReader(stream.chunks())
+
+	def size(self, path) -> int:
+		blob_client = self.client.get_blob_client(container=self.container, blob=path)
+		return blob_client.get_blob_properties().size
+
+	def append(self, path, chunks) -> int:
+		blob_client = self.client.get_blob_client(container=self.container, blob=path)
+		if not blob_client.exists():
+			blob_client.create_append_blob()
+		written = 0
+		for chunk in chunks:
+			blob_client.append_block(chunk)
+			written += len(chunk)
+		return written
+
+	def move(self, src, dst) -> str:
+		source = self.client.get_blob_client(container=self.container, blob=src)
+		target = self.client.get_blob_client(container=self.container, blob=dst)
+		target.start_copy_from_url(source.url, requires_sync=True)
+		source.delete_blob()
+		return dst
+
 	def url(self, path) -> str:
 		return f"https://{self.client.account_name}.blob.core.windows.net/{self.container}/{path}"
+
+	def presign_upload(self, path, size, content_type=None, sha256=None) -> dict:
+		# Account-key SAS scoped to this one blob, create+write only. A SAS can't bind
+		# `sha256` and content_sha256() has none to report, so commit hashes the blob.
+		from azure.storage.blob import BlobSasPermissions, generate_blob_sas
+		expiry = datetime.now(timezone.utc) + timedelta(seconds=getattr(settings, "UPLOAD_PRESIGN_EXPIRY", 900))
+		sas = generate_blob_sas(
+			account_name=self.client.account_name,
+			container_name=self.container,
+			blob_name=path,
+			account_key=self.client.credential.account_key,
+			permission=BlobSasPermissions(create=True, write=True),
+			expiry=expiry,
+		)
+		headers = {"x-ms-blob-type": "BlockBlob", "Content-Length": str(size)}
+		if content_type:
+			headers["x-ms-blob-content-type"] = content_type
+		return {"method": "PUT", "url": f"{self.url(path)}?{sas}", "headers": headers}
+
+	# Native async I/O (azure.storage.blob.aio) for ASGI views
+
+	def _async_client(self):
+		from azure.storage.blob.aio import BlobServiceClient as AsyncBlobServiceClient
+		return AsyncBlobServiceClient.from_connection_string(settings.AZURE_STORAGE_CONNECTION_STRING)
+
+	async def asave(self, file, path) -> str:
+		async with self._async_client() as client:
+			blob_client = client.get_blob_client(container=self.container, blob=path)
+			await blob_client.upload_blob(file.chunks() if hasattr(file, "chunks") else file, overwrite=True)
+		return path
+
+	async def adelete(self, path) -> bool:
+		async with self._async_client() as client:
+			await client.get_blob_client(container=self.container, blob=path).delete_blob()
+		return True
+
+	async def asize(self, path) -> int:
+		async with self._async_client() as client:
+			properties = await client.get_blob_client(container=self.container, blob=path).get_blob_properties()
+		return properties.size
+
+	async def astream(self, path, chunk_size=64 * 1024):
+		async with self._async_client() as client:
+			stream = await client.get_blob_client(container=self.container, blob=path).download_blob()
+			async for chunk in stream.chunks():
+				yield chunk
+
+
+class _BlobReader(io.RawIOBase):
+	"""Minimal read-only file object over a blob chunk iterator."""
+	def __init__(self, chunks):
+		self._chunks = iter(chunks)
+		self._buffer = b""
+
+	def readable(self):
+		return True
+
+	def readinto(self, b):
+		while not self._buffer:
+			try:
+				self._buffer = next(self._chunks)
+			except StopIteration:
+				return 0
+		n = min(len(b), len(self._buffer))
+		b[:n] = self._buffer[:n]
+		self._buffer = self._buffer[n:]
+		return n
@@ -1,6 +1,10 @@
 from abc import ABC, abstractmethod
+from asgiref.sync import sync_to_async
 
 class StorageBackend(ABC):
+	# True when url() hands out signed, directly downloadable URLs (the media view redirects to them)
+	presigned_urls = False
+
 	@abstractmethod
 	def save(self, file, path) -> str:
 		pass
@@ -12,3 +16,81 @@ class StorageBackend(ABC):
 	@abstractmethod
 	def url(self, path) -> str:
 		pass
+
+	@abstractmethod
+	def open(self, path):
+		"""Returns a readable binary file-like object for a stored path."""
+		pass
+
+	@abstractmethod
+	def size(self, path) -> int:
+		pass
+
+	def append(self, path, chunks) -> int:
+		"""Appends an iterable of bytes to a stored object, creating it if needed. Returns bytes written."""
+		raise NotImplementedError(f"{type(self).__name__} does not support appends")
+
+	@property
+	def supports_append(self) -> bool:
+		return type(self).append is not StorageBackend.append
+
+	def truncate(self, path, size) -> None:
+		"""Cuts a stored object back to its first `size` bytes (drops a partly appended chunk)."""
+		raise NotImplementedError(f"{type(self).__name__} does not support truncation")
+
+	@property
+	def supports_truncate(self) -> bool:
+		return type(self).truncate is not StorageBackend.truncate
+
+	def move(self, src, dst) -> str:
+		"""Moves a stored object to a new path. Returns the new path."""
+		raise NotImplementedError(f"{type(self).__name__} does not support moves")
+
+	def presign_upload(self, path, size, content_type=None, sha256=None) -> dict:
+		"""
+		Authorizes a client to upload `size` bytes straight to `path`. Returns
+		{"method", "url", "headers"}; the client must send those headers.
+		"""
+		raise NotImplementedError(f"{type(self).__name__} does not support direct uploads")
+
+	@property
+	def supports_presigned_upload(self) -> bool:
+		return type(self).presign_upload is not StorageBackend.presign_upload
+
+	def content_sha256(self, path) -> str | None:
+		"""Hex SHA-256 of a stored object as verified by the store itself, when it records one."""
+		return None
+
+	def resolve(self, path) -> str:
+		"""Physical path of the bytes behind a logical path (differs for content-addressed storage)."""
+		return path
+
+	def digest(self, path) -> str | None:
+		"""SHA-256 of the stored content, if the backend tracks it."""
+		return None
+
+	# --- async API -------------------------------------------------------
+	# Defaults run the blocking call in a worker thread (never the event loop);
+	# backends with a native async client override them.
+
+	async def asave(self, file, path) -> str:
+		return await sync_to_async(self.save, thread_sensitive=False)(file, path)
+
+	async def adelete(self, path) -> bool:
+		return await sync_to_async(self.delete, thread_sensitive=False)(path)
+
+	async def asize(self, path) -> int:
+		return await sync_to_async(self.size, thread_sensitive=False)(path)
+
+	async def astream(self, path, chunk_size=64 * 1024):
+		"""Async iterator over a stored object's bytes."""
+		fh = await sync_to_async(self.open, thread_sensitive=False)(path)
+		read = sync_to_async(fh.read, thread_sensitive=False)
+		try:
+			while True:
+				piece = await read(chunk_size)
+				if not piece:
+					break
+				yield piece
+		finally:
+			fh.close()
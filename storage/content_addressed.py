@@ -0,0 +1,251 @@
+import hashlib
+import uuid
+
+from asgiref.sync import sync_to_async
+from django.db import transaction
+from django.db.models import F
+
+from storage.base import StorageBackend
+
+"""
+Content-Addressed Storage
+-------------------------
+Wraps another StorageBackend so identical content is stored once.
+
+Callers keep using logical paths (documents/<id>/versions/<token>/<name>); each
+logical path is a BlobReference pointing at a Blob stored in the inner backend
+under blobs/<aa>/<bb>/<sha256>-<token>. Blobs are reference counted and their
+bytes are only reclaimed once no reference is left.
+
+The token makes every Blob row's path unique. Reclaiming deletes the bytes
+after commit; if the same content is saved again meanwhile, its new row gets
+a new path, so that late delete can't remove the new bytes.
+
+Paths written before deduplication was enabled have no reference and are
+passed straight through to the inner backend.
+"""
+
+STAGING_PREFIX = "blobs/tmp"
+
+
+def blob_path(digest: str) -> str:
+	return f"blobs/{digest[:2]}/{digest[2:4]}/{digest}-{uuid.uuid4().hex[:12]}"
+
+
+class _HashingFile:
+	"""Feeds a Django File (or any iterable of bytes) through a digest as chunks are read."""
+	def __init__(self, source):
+		self.source = source
+		self.digest = hashlib.sha256()
+		self.size = 0
+
+	def chunks(self, chunk_size=None):
+		pieces = self.source.chunks() if hasattr(self.source, "chunks") else self.source
+		for piece in pieces:
+			self.digest.update(piece)
+			self.size += len(piece)
+			yield piece
+
+
+def _iter_file(fileobj, chunk_size=1024 * 1024):
+	while True:
+		piece = fileobj.read(chunk_size)
+		if not piece:
+			break
+		yield piece
+
+
+class ContentAddressedStorage(StorageBackend):
+	def __init__(self, inner: StorageBackend):
+		self.inner = inner
+
+	# --- reference bookkeeping -------------------------------------------
+
+	def _reference(self, path):
+		from storage.models import BlobReference
+		return BlobReference.objects.select_related("blob").filter(path=path).first()
+
+	def _ingest(self, staging_path, path, digest, size) -> None:
+		"""Turns a staged object into a reference to the blob with `digest`."""
+		from storage.models import Blob, BlobReference
+
+		with transaction.atomic():
+			blob, created = Blob.objects.select_for_update().get_or_create(
+				digest=digest, defaults={"size": size, "path": blob_path(digest)}
+			)
+			if created:
+				self.inner.move(staging_path, blob.path)
+			else:
+				self.inner.delete(staging_path)
+
+			reference = BlobReference.objects.select_for_update().filter(path=path).first()
+			if reference and reference.blob_id == digest:
+				return
+			if reference:
+				# Path overwritten with different content: repoint, then release the old
+				# blob (which checks for remaining references)
+				previous = reference.blob_id
+				reference.blob = blob
+				reference.save(update_fields=["blob"])
+				self._release(previous)
+			else:
+				BlobReference.objects.create(path=path, blob=blob)
+			Blob.objects.filter(digest=digest).update(ref_count=F("ref_count") + 1)
+
+	def _release(self, digest) -> None:
+		"""Drops one reference to a blob and reclaims it when none are left. Caller holds a transaction."""
+		from storage.models import Blob
+
+		Blob.objects.filter(digest=digest, ref_count__gt=0).update(ref_count=F("ref_count") - 1)
+		blob = Blob.objects.select_for_update().filter(digest=digest, ref_count=0).first()
+		if blob and not blob.references.exists():
+			path = blob.path
+			blob.delete()
+			transaction.on_commit(lambda: self.inner.delete(path))
+
+	# --- StorageBackend ----------------------------------------------------
+
+	def save(self, file, path) -> str:
+		staging_path = f"{STAGING_PREFIX}/{uuid.uuid4().hex}"
+		hashing = _HashingFile(file)
+		self.inner.save(hashing, staging_path)
+		self._ingest(staging_path, path, hashing.digest.hexdigest(), hashing.size)
+		return path
+
+	def delete(self, path) -> bool:
+		with transaction.atomic():
+			reference = self._reference(path)
+			if reference is None:
+				return self.inner.delete(path)
+			digest = reference.blob_id
+			reference.delete()
+			self._release(digest)
+		return True
+
+	@property
+	def presigned_urls(self):
+		return self.inner.presigned_urls
+
+	def url(self, path) -> str:
+		if self.inner.presigned_urls:
+			# Signed URLs must name the blob itself
+			return self.inner.url(self.resolve(path))
+		# Logical URL; the serving view maps it back through resolve()
+		return self.inner.url(path)
+
+	def open(self, path):
+		return self.inner.open(self.resolve(path))
+
+	def size(self, path) -> int:
+		reference = self._reference(path)
+		return reference.blob.size if reference else self.inner.size(path)
+
+	def append(self, path, chunks) -> int:
+		# Appends target staging objects (resumable uploads); they are deduplicated on move()
+		return self.inner.append(path, chunks)
+
+	@property
+	def supports_append(self) -> bool:
+		return self.inner.supports_append
+
+	def truncate(self, path, size) -> None:
+		self.inner.truncate(path, size)
+
+	@property
+	def supports_truncate(self) -> bool:
+		return self.inner.supports_truncate
+
+	# Direct uploads land as raw staging objects; move() ingests them
+
+	def presign_upload(self, path, size, content_type=None, sha256=None) -> dict:
+		return self.inner.presign_upload(path, size, content_type, sha256)
+
+	@property
+	def supports_presigned_upload(self) -> bool:
+		return self.inner.supports_presigned_upload
+
+	def content_sha256(self, path) -> str | None:
+		return self.digest(path) or self.inner.content_sha256(path)
+
+	def move(self, src, dst) -> str:
+		reference = self._reference(src)
+		if reference is not None:
+			# Pure metadata change, the bytes stay where they are
+			with transaction.atomic():
+				existing = self._reference(dst)
+				if existing is not None:
+					existing.delete()
+					self._release(existing.blob_id)
+				reference.path = dst
+				reference.save(update_fields=["path"])
+			return dst
+
+		# Raw object (e.g. a finished chunked upload): hash it once, then ingest
+		digest = hashlib.sha256()
+		size = 0
+		with self.inner.open(src) as source:
+			for piece in _iter_file(source):
+				digest.update(piece)
+				size += len(piece)
+		self._ingest(src, dst, digest.hexdigest(), size)
+		return dst
+
+	# Blob bytes go through the inner backend's async API; the reference
+	# bookkeeping is ORM work and runs via sync_to_async.
+
+	async def asave(self, file, path) -> str:
+		staging_path = f"{STAGING_PREFIX}/{uuid.uuid4().hex}"
+		hashing = _HashingFile(file)
+		await self.inner.asave(hashing, staging_path)
+		await sync_to_async(self._ingest)(staging_path, path, hashing.digest.hexdigest(), hashing.size)
+		return path
+
+	async def adelete(self, path) -> bool:
+		return await sync_to_async(self.delete)(path)
+
+	async def asize(self, path) -> int:
+		return await sync_to_async(self.size)(path)
+
+	async def astream(self, path, chunk_size=64 * 1024):
+		physical = await sync_to_async(self.resolve)(path)
+		async for piece in self.inner.astream(physical, chunk_size):
+			yield piece
+
+	def resolve(self, path) -> str:
+		reference = self._reference(path)
+		return self.inner.resolve(reference.blob.path if reference else path)
+
+	def digest(self, path) -> str | None:
+		reference = self._reference(path)
+		return reference.blob_id if reference else None
+
+
+def collect_garbage(inner: StorageBackend, dry_run: bool = False) -> dict:
+	"""
+	Repairs ref_count drift (e.g. from crashes between the bytes and the rows)
+	and reclaims blobs nothing references. Returns counts of what was done.
+	"""
+	from django.db.models import Count
+	from storage.models import Blob
+
+	stats = {"recounted": 0, "reclaimed": 0, "reclaimed_bytes": 0}
+	counted = Blob.objects.annotate(actual=Count("references"))
+	for blob in counted.iterator(chunk_size=1000):
+		if blob.actual != blob.ref_count:
+			stats["recounted"] += 1
+			if not dry_run:
+				Blob.objects.filter(digest=blob.digest).update(ref_count=blob.actual)
+
+	for digest in Blob.objects.filter(references__isnull=True).values_list("digest", flat=True).iterator():
+		with transaction.atomic():
+			# Re-check under lock: a concurrent save may have just referenced it
+			blob = Blob.objects.select_for_update().filter(digest=digest).first()
+			if blob is None or blob.references.exists():
+				continue
+			stats["reclaimed"] += 1
+			stats["reclaimed_bytes"] += blob.size
+			if not dry_run:
+				path = blob.path
+				blob.delete()
+				transaction.on_commit(lambda: inner.delete(path))
+	return stats
@@ -1,15 +1,46 @@
+import threading
 from django.conf import settings
+from django.core.signals import setting_changed
+from django.dispatch import receiver
 from storage.base import StorageBackend
 from storage.windows import WindowsStorage
 from storage.azure import AzureStorage
-# from storage.linux import LinuxStorage (future)
+from storage.linux import LinuxStorage
+from storage.s3 import S3Storage, reset_s3_client
+from storage.content_addressed import ContentAddressedStorage
 
-def get_storage_backend() -> StorageBackend:
+# Backends are stateless apart from their (pooled) clients, so one instance per
+# process is shared instead of being rebuilt on every form/view construction.
+_instances = {}
+_lock = threading.Lock()
+
+def _base_backend() -> StorageBackend:
 	if settings.STORAGE_BACKEND == "windows":
 		return WindowsStorage()
 	elif settings.STORAGE_BACKEND == "azure":
 		return AzureStorage()
-	# elif settings.STORAGE_BACKEND == "linux":
-	#	return LinuxStorage()
+	elif settings.STORAGE_BACKEND == "linux":
+		return LinuxStorage()
+	elif settings.STORAGE_BACKEND == "s3":
+		return S3Storage()
 	else:
 		raise ValueError("Unsupported storage backend")
+
+def get_storage_backend() -> StorageBackend:
+	key = (settings.STORAGE_BACKEND, getattr(settings, "STORAGE_DEDUPLICATE", False))
+	backend = _instances.get(key)
+	if backend is None:
+		with _lock:
+			backend = _instances.get(key)
+			if backend is None:
+				backend = _base_backend()
+				if key[1]:
+					backend = ContentAddressedStorage(backend)
+				_instances[key] = backend
+	return backend
+
+@receiver(setting_changed)
+def _reset_backends(setting, **kwargs):
+	if setting.startswith(("STORAGE_", "MEDIA_", "AWS_", "AZURE_")):
+		_instances.clear()
+		reset_s3_client()
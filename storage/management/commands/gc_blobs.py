@@ -0,0 +1,22 @@
+# storage/management/commands/gc_blobs.py
+
+from django.core.management.base import BaseCommand
+from storage.content_addressed import ContentAddressedStorage, collect_garbage
+from storage.factory import get_storage_backend
+
+
+class Command(BaseCommand):
+    help = "Recount blob references and delete deduplicated blobs that are no longer referenced"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--dry-run", action="store_true", help="Report what would change without modifying anything")
+
+    def handle(self, *args, **kwargs):
+        storage = get_storage_backend()
+        inner = storage.inner if isinstance(storage, ContentAddressedStorage) else storage
+        stats = collect_garbage(inner, dry_run=kwargs["dry_run"])
+        prefix = "Would reclaim" if kwargs["dry_run"] else "Reclaimed"
+        self.stdout.write(self.style.SUCCESS(
+            f"{prefix} {stats['reclaimed']} blobs ({stats['reclaimed_bytes']} bytes); "
+            f"fixed {stats['recounted']} reference counts."
+        ))
@@ -0,0 +1,31 @@
+# storage/models.py
+
+from django.db import models
+
+
+class Blob(models.Model):
+    """
+    One unique piece of content, stored once under a path derived from its
+    SHA-256 digest. ref_count mirrors the number of BlobReference rows.
+    """
+    digest = models.CharField(max_length=64, primary_key=True)
+    size = models.PositiveBigIntegerField()
+    path = models.CharField(max_length=512)
+    ref_count = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.digest[:12]} ({self.size} bytes, {self.ref_count} refs)"
+
+
+class BlobReference(models.Model):
+    """
+    Maps a logical storage path (e.g. documents/<id>/versions/<token>/<name>)
+    to the blob holding its bytes.
+    """
+    path = models.CharField(max_length=512, unique=True)
+    blob = models.ForeignKey(Blob, on_delete=models.PROTECT, related_name="references")
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.path} -> {self.blob_id[:12]}"
@@ -0,0 +1,146 @@
+import base64
+import binascii
+import threading
+from django.conf import settings
+from storage.base import StorageBackend
+
+"""
+S3-Compatible Storage
+---------------------
+Works with AWS S3 and S3-compatible servers (MinIO, Ceph RGW, moto's server
+mode) via AWS_S3_ENDPOINT_URL.
+
+- One boto3 client per process, shared by every S3Storage instance and
+  thread (boto3 clients are thread-safe); its urllib3 pool holds up to
+  AWS_S3_MAX_POOL_CONNECTIONS keep-alive connections.
+- save()/move() go through boto3's managed transfer: objects above
+  AWS_S3_MULTIPART_THRESHOLD are sent as a multipart upload/copy with
+  AWS_S3_MAX_CONCURRENCY parts in flight.
+- url() returns a presigned GET URL, so downloads go straight from the
+  bucket to the browser after safe_serve has checked access.
+- presign_upload() returns a presigned PUT bound to the object's length,
+  type and (optionally) SHA-256, which S3 verifies on receipt.
+"""
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_s3_client():
+	global _client
+	if _client is None:
+		with _client_lock:
+			if _client is None:
+				import boto3
+				from botocore.config import Config
+
+				_client = boto3.session.Session().client(
+					"s3",
+					endpoint_url=getattr(settings, "AWS_S3_ENDPOINT_URL", None) or None,
+					region_name=getattr(settings, "AWS_S3_REGION_NAME", None) or None,
+					aws_access_key_id=getattr(settings, "AWS_ACCESS_KEY_ID", None) or None,
+					aws_secret_access_key=getattr(settings, "AWS_SECRET_ACCESS_KEY", None) or None,
+					config=Config(
+						max_pool_connections=getattr(settings, "AWS_S3_MAX_POOL_CONNECTIONS", 50),
+						retries={"max_attempts": 5, "mode": "adaptive"},
+						signature_version="s3v4",
+						s3={"addressing_style": getattr(settings, "AWS_S3_ADDRESSING_STYLE", "auto")},
+					),
+				)
+	return _client
+
+
+def reset_s3_client():
+	"""Drops the shared client (e.g. after settings change in tests)."""
+	global _client
+	with _client_lock:
+		_client = None
+
+
+class _ChunkReader:
+	"""File-like view over a Django File's chunks() for boto3's upload_fileobj."""
+	def __init__(self, file):
+		self._chunks = file.chunks() if hasattr(file, "chunks") else iter(file)
+		self._buffer = b""
+
+	def read(self, size=-1):
+		while size < 0 or len(self._buffer) < size:
+			try:
+				self._buffer += next(self._chunks)
+			except StopIteration:
+				break
+		if size < 0:
+			data, self._buffer = self._buffer, b""
+		else:
+			data, self._buffer = self._buffer[:size], self._buffer[size:]
+		return data
+
+
+class S3Storage(StorageBackend):
+	presigned_urls = True
+
+	def __init__(self):
+		from boto3.s3.transfer import TransferConfig
+
+		self.bucket = settings.AWS_STORAGE_BUCKET_NAME
+		self.client = get_s3_client()
+		self.transfer_config = TransferConfig(
+			multipart_threshold=getattr(settings, "AWS_S3_MULTIPART_THRESHOLD", 8 * 1024 * 1024),
+			multipart_chunksize=getattr(settings, "AWS_S3_MULTIPART_CHUNKSIZE", 8 * 1024 * 1024),
+			max_concurrency=getattr(settings, "AWS_S3_MAX_CONCURRENCY", 8),
+		)
+
+	def save(self, file, path) -> str:
+		# Real files (temp uploads) are seekable, which lets multipart parts go out in parallel
+		fileobj = getattr(file, "file", None)
+		if fileobj is None or not hasattr(fileobj, "seek"):
+			fileobj = _ChunkReader(file)
+		else:
+			fileobj.seek(0)
+		self.client.upload_fileobj(fileobj, self.bucket, path, Config=self.transfer_config)
+		return path
+
+	def delete(self, path) -> bool:
+		self.client.delete_object(Bucket=self.bucket, Key=path)
+		return True
+
+	def url(self, path) -> str:
+		return self.client.generate_presigned_url(
+			"get_object",
+			Params={"Bucket": self.bucket, "Key": path},
+			ExpiresIn=getattr(settings, "AWS_QUERYSTRING_EXPIRE", 300),
+		)
+
+	def open(self, path):
+		return self.client.get_object(Bucket=self.bucket, Key=path)["Body"]
+
+	def size(self, path) -> int:
+		return self.client.head_object(Bucket=self.bucket, Key=path)["ContentLength"]
+
+	def move(self, src, dst) -> str:
+		# Managed copy switches to multipart (UploadPartCopy) above the threshold / 5 GB limit
+		self.client.copy({"Bucket": self.bucket, "Key": src}, self.bucket, dst, Config=self.transfer_config)
+		self.client.delete_object(Bucket=self.bucket, Key=src)
+		return dst
+
+	def presign_upload(self, path, size, content_type=None, sha256=None) -> dict:
+		params = {"Bucket": self.bucket, "Key": path, "ContentLength": size}
+		headers = {"Content-Length": str(size)}
+		if content_type:
+			params["ContentType"] = content_type
+			headers["Content-Type"] = content_type
+		if sha256:
+			# Signed into the URL; S3 rejects a body whose digest differs
+			params["ChecksumSHA256"] = base64.b64encode(binascii.unhexlify(sha256)).decode()
+			headers["x-amz-checksum-sha256"] = params["ChecksumSHA256"]
+		url = self.client.generate_presigned_url(
+			"put_object", Params=params, ExpiresIn=getattr(settings, "UPLOAD_PRESIGN_EXPIRY", 900)
+		)
+		return {"method": "PUT", "url": url, "headers": headers}
+
+	def content_sha256(self, path) -> str | None:
+		head = self.client.head_object(Bucket=self.bucket, Key=path, ChecksumMode="ENABLED")
+		checksum = head.get("ChecksumSHA256")
+		if not checksum or "-" in checksum:
+			return None  # absent, or a composite checksum of multipart parts
+		return binascii.hexlify(base64.b64decode(checksum)).decode()
@@ -0,0 +1,53 @@
+# storage/tests/test_content_addressed.py
+
+import os
+import tempfile
+
+from django.core.files.base import ContentFile
+from django.test import TestCase, override_settings
+
+from storage.content_addressed import ContentAddressedStorage
+from storage.models import Blob
+from storage.windows import WindowsStorage
+
+
+class ContentAddressedStorageTests(TestCase):
+    def setUp(self):
+        media_root = tempfile.TemporaryDirectory()
+        self.addCleanup(media_root.cleanup)
+        settings_override = override_settings(MEDIA_ROOT=media_root.name)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.media_root = media_root.name
+        self.storage = ContentAddressedStorage(WindowsStorage())
+
+    def stored(self, blob):
+        return os.path.exists(os.path.join(self.media_root, blob.path))
+
+    def read(self, path):
+        with self.storage.open(path) as fh:
+            return fh.read()
+
+    def test_overwritten_path_releases_its_old_blob(self):
+        self.storage.save(ContentFile(b"old"), "documents/1/a.txt")
+        old = Blob.objects.get()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.storage.save(ContentFile(b"new"), "documents/1/a.txt")
+        self.assertFalse(Blob.objects.filter(digest=old.digest).exists())
+        self.assertFalse(self.stored(old))
+        self.assertEqual(self.read("documents/1/a.txt"), b"new")
+
+    def test_late_delete_of_a_reclaimed_blob_spares_its_successor(self):
+        self.storage.save(ContentFile(b"same"), "documents/1/a.txt")
+        reclaimed = Blob.objects.get()
+        with self.captureOnCommitCallbacks() as pending_deletes:
+            self.storage.delete("documents/1/a.txt")
+        # The same content arrives again before the reclaiming transaction's delete has run
+        self.storage.save(ContentFile(b"same"), "documents/2/a.txt")
+        for callback in pending_deletes:
+            callback()
+
+        successor = Blob.objects.get()
+        self.assertNotEqual(successor.path, reclaimed.path)
+        self.assertFalse(self.stored(reclaimed))
+        self.assertEqual(self.read("documents/2/a.txt"), b"same")
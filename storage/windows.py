@@ -20,3 +20,29 @@ class WindowsStorage(StorageBackend):
 
 	def url(self, path) -> str:
 		return os.path.join(settings.MEDIA_URL, path).replace('\\', '/')
+
+	def open(self, path):
+		return open(os.path.join(settings.MEDIA_ROOT, path), 'rb')
+
+	def size(self, path) -> int:
+		return os.path.getsize(os.path.join(settings.MEDIA_ROOT, path))
+
+	def append(self, path, chunks) -> int:
+		full_path = os.path.join(settings.MEDIA_ROOT, path)
+		os.makedirs(os.path.dirname(full_path), exist_ok=True)
+		written = 0
+		with open(full_path, 'ab') as destination:
+			for chunk in chunks:
+				destination.write(chunk)
+				written += len(chunk)
+		return written
+
+	def truncate(self, path, size) -> None:
+		with open(os.path.join(settings.MEDIA_ROOT, path), 'r+b') as destination:
+			destination.truncate(size)
+
+	def move(self, src, dst) -> str:
+		full_dst = os.path.join(settings.MEDIA_ROOT, dst)
+		os.makedirs(os.path.dirname(full_dst), exist_ok=True)
+		os.replace(os.path.join(settings.MEDIA_ROOT, src), full_dst)
+		return dst
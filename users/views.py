@@ -5,6 +5,7 @@ from django.contrib.auth.models import User
 from django.shortcuts import get_object_or_404, render
 from documents.models import Document, Comment
 from projects.models import Project
+from core.pagination import paginate_request
 
 
 @login_required
@@ -26,8 +27,18 @@ def user_profile(request, username):
     user_obj = get_object_or_404(User, username=username)
 
     created_projects = Project.objects.filter(created_by=user_obj)
-    created_documents = Document.objects.filter(created_by=user_obj)
-    comments = Comment.objects.filter(user=user_obj)
+    created_documents = paginate_request(
+        request,
+        Document.objects.filter(created_by=user_obj).select_related("project"),
+        sort_fields={"created": "created_at", "title": "title"},
+        prefix="doc_",
+    )
+    comments = paginate_request(
+        request,
+        Comment.objects.filter(user=user_obj).select_related("document", "version"),
+        sort_fields={"created": "created_at"},
+        prefix="comment_",
+    )
 
     return render(request, "users/user_profile.html", {
         "profile_user": user_obj,